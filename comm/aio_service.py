@@ -0,0 +1,383 @@
+from __future__ import annotations
+import asyncio, collections, os, time, logging
+from dataclasses import replace
+from typing import Callable, Container, Deque, Optional, Set, Tuple
+
+from .framer import Decoder
+from .protocol import CMD, is_ack, is_push
+from .request_window import CommStats, PendingRequest, RequestWindow
+from .service import CommState
+from .utils import to_hex
+
+try:
+    import serial  # pip install pyserial（仅用于打开并配置串口，读写走非阻塞 fd）
+except Exception:
+    serial = None
+
+class _FdChannel:
+    """
+    非阻塞 fd 读写：loop.add_reader 回调里读，写不完的部分挂 add_writer 续写。
+    适用于 POSIX 上的串口/pty 等字符设备（Windows 的串口句柄不能用 add_reader）。
+    """
+    def __init__(self, loop: asyncio.AbstractEventLoop, fd: int,
+                 on_data: Callable[[bytes], None], on_error: Callable[[Exception], None]):
+        self.loop = loop
+        self.fd = fd
+        self._on_data = on_data
+        self._on_error = on_error
+        self._wbuf = bytearray()
+        self._closed = False
+        os.set_blocking(fd, False)
+        loop.add_reader(fd, self._on_readable)
+
+    def _on_readable(self):
+        try:
+            data = os.read(self.fd, 4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as e:     # 设备拔出 / pty 对端关闭（EIO）
+            self._fail(e)
+            return
+        if not data:
+            self._fail(EOFError("串口已关闭"))
+            return
+        self._on_data(data)
+
+    def write(self, data: bytes):
+        if self._closed:
+            raise ConnectionError("串口未打开")
+        if self._wbuf:
+            self._wbuf += data
+            return
+        try:
+            n = os.write(self.fd, data)
+        except (BlockingIOError, InterruptedError):
+            n = 0
+        except OSError as e:
+            self._fail(e)
+            raise
+        if n < len(data):
+            self._wbuf += data[n:]
+            self.loop.add_writer(self.fd, self._on_writable)
+
+    def _on_writable(self):
+        try:
+            n = os.write(self.fd, self._wbuf)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as e:
+            self._fail(e)
+            return
+        del self._wbuf[:n]
+        if not self._wbuf:
+            self.loop.remove_writer(self.fd)
+
+    def _fail(self, exc: Exception):
+        self.close()
+        self._on_error(exc)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self.loop.remove_reader(self.fd)
+        if self._wbuf:
+            self.loop.remove_writer(self.fd)
+            self._wbuf.clear()
+
+class PushStream:
+    """
+    PUSH 帧异步迭代器：async for cmd, payload in svc.pushes(...)。
+    队列满时丢弃最旧的帧（dropped 计数）；服务停止或 aclose() 后迭代结束。
+    """
+    _END = object()
+
+    def __init__(self, svc: "AsyncCommService", cmds: Optional[Container[int]], maxsize: int):
+        self._svc = svc
+        self.cmds = cmds
+        self._q: Deque = collections.deque(maxlen=maxsize)
+        self._wake = asyncio.Event()
+        self.dropped = 0
+
+    def _put(self, item):
+        if len(self._q) == self._q.maxlen:
+            self.dropped += 1
+        self._q.append(item)
+        self._wake.set()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Tuple[int, bytes]:
+        while not self._q:
+            self._wake.clear()
+            await self._wake.wait()
+        item = self._q.popleft()
+        if item is PushStream._END:
+            raise StopAsyncIteration
+        return item
+
+    async def aclose(self):
+        self._svc._streams.discard(self)
+        self._q.clear()
+        self._q.append(PushStream._END)
+        self._wake.set()
+
+class AsyncCommService:
+    """
+    asyncio 版 CommService：不开线程，串口 fd 设为非阻塞后由 loop.add_reader 驱动收包，
+    一个事件循环即可同时驱动传感器口、执行器口以及多台设备。
+    协议与 CommService 一致：8 位 seq（1..255）、ACK = cmd|0x80 且 payload[0] 为 seq、PUSH ≥ 0xC0。
+    - await request() 返回 (ok, ack_payload)；submit() 返回 asyncio.Future（失败时为 TimeoutError 等）
+    - 在途窗口 window（≤127），超时作废的 seq 隔离 seq_quarantine 秒（RequestWindow，与 CommService 共用），
+      超时/重试由 loop.call_later 处理
+    - pushes() 返回 PUSH 帧异步迭代器；subscribe() 注册同步回调（在事件循环中调用）
+    - 给定 port 时用 pyserial 打开并配置串口（断线后按 reconnect_interval 重开）；也可直接传入已打开的 fd（如 pty）
+    所有方法只能在事件循环所在线程调用。
+    """
+    def __init__(self, port: Optional[str] = None, baud: int = 115200, *, fd: Optional[int] = None,
+                 window: int = 8, heartbeat_interval: Optional[float] = 1.0, reconnect_interval: float = 2.0,
+                 seq_quarantine: float = 1.0):
+        if (port is None) == (fd is None):
+            raise ValueError("port 与 fd 须且只能给出一个")
+        self._win = RequestWindow(window, seq_quarantine)
+        self.port = port
+        self.baud = baud
+        self.window = window
+        self.heartbeat_interval = heartbeat_interval
+        self.reconnect_interval = reconnect_interval
+        self.seq_quarantine = seq_quarantine
+        self.decoder = Decoder()
+        self.state = CommState.DISCONNECTED
+
+        self._fd = fd
+        self._ser = None
+        self._chan: Optional[_FdChannel] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._closed = False
+        self._subscribers: list[Callable[[int, bytes], None]] = []
+        self._streams: Set[PushStream] = set()
+
+    # ---------- lifecycle ----------
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._closed = False
+        self._open()
+        if self.heartbeat_interval:
+            self._spawn(self._heartbeat_loop())
+
+    async def stop(self):
+        self._closed = True
+        for t in list(self._tasks):
+            t.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._close_port()
+        self._clear_pending(ConnectionError("AsyncCommService stopped"))
+        for s in list(self._streams):
+            await s.aclose()
+        self._set_state(CommState.DISCONNECTED)
+
+    async def __aenter__(self) -> "AsyncCommService":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    def subscribe(self, cb: Callable[[int, bytes], None]):
+        self._subscribers.append(cb)
+
+    def pushes(self, cmds: Optional[Container[int]] = None, maxsize: int = 256) -> PushStream:
+        """PUSH 帧异步迭代器；cmds 为 None 时接收全部 PUSH"""
+        s = PushStream(self, cmds, maxsize)
+        self._streams.add(s)
+        return s
+
+    async def wait_ready(self, timeout: float = 2.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while self.state != CommState.READY:
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.05)
+        return True
+
+    # ---------- API ----------
+    def submit(self, cmd: int, payload_wo_seq: bytes,
+               timeout: float = 0.5, retry: int = 2) -> asyncio.Future:
+        """非阻塞请求：窗口有空位立即发送，否则排队；Future 结果为 ACK payload"""
+        req = PendingRequest(cmd, bytes(payload_wo_seq), timeout, retry, self._loop.create_future())
+        self._win.submit(req)
+        self._pump()
+        return req.future
+
+    async def request(self, cmd: int, payload_wo_seq: bytes,
+                      timeout: float = 0.5, retry: int = 2) -> tuple[bool, bytes]:
+        """自动加 seq、封帧、等待 ACK。返回 (ok, ack_payload)"""
+        try:
+            return True, await self.submit(cmd, payload_wo_seq, timeout=timeout, retry=retry)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            return False, b""
+
+    def in_flight(self) -> int:
+        return self._win.in_flight
+
+    def stats(self) -> CommStats:
+        return replace(self._win.stats)
+
+    # ---------- internals ----------
+    def _spawn(self, coro):
+        t = self._loop.create_task(coro)
+        self._tasks.add(t)
+        t.add_done_callback(self._tasks.discard)
+
+    def _open(self) -> bool:
+        if self._chan is not None:
+            return True
+        self._set_state(CommState.CONNECTING)
+        try:
+            fd = self._fd
+            if self.port is not None:
+                if serial is None:
+                    raise RuntimeError("pyserial 未安装：pip install pyserial")
+                self._ser = serial.Serial(self.port, self.baud, timeout=0, write_timeout=0)
+                self._ser.reset_input_buffer()
+                fd = self._ser.fileno()
+            self.decoder = Decoder()
+            self._chan = _FdChannel(self._loop, fd, self._on_data, self._on_port_error)
+        except Exception as e:
+            logging.warning("Open serial failed: %s", e)
+            self._close_port()
+            self._set_state(CommState.DISCONNECTED)
+            return False
+        self._set_state(CommState.READY)  # 先标 READY，后续心跳校验
+        return True
+
+    def _close_port(self):
+        if self._chan is not None:
+            self._chan.close()
+            self._chan = None
+        if self._ser is not None:
+            try:
+                self._ser.close()
+            except Exception:
+                pass
+            self._ser = None
+
+    def _on_port_error(self, exc: Exception):
+        logging.warning("Serial error: %s", exc)
+        self._chan = None
+        self._close_port()
+        self._set_state(CommState.DISCONNECTED)
+        if self.port is not None and not self._closed:
+            self._spawn(self._reconnect())
+
+    async def _reconnect(self):
+        while not self._closed and self._chan is None:
+            await asyncio.sleep(self.reconnect_interval)
+            self._open()
+
+    def _on_data(self, data: bytes):
+        for fr in self.decoder.feed(data):
+            # ACK: payload = [seq, status, ...]；ACK 段(0x80+)与上报段(0xC0+)重叠，
+            # 按 seq 与请求 cmd 都对得上才算 ACK，否则 0xC0+ 按 PUSH 处理
+            if is_ack(fr.cmd) and self._on_ack(fr):
+                continue
+            if is_ack(fr.cmd) and not is_push(fr.cmd):
+                self._win.stats.late_acks += 1
+                continue
+            for cb in self._subscribers:
+                try: cb(fr.cmd, fr.payload)
+                except Exception as e: logging.warning("push cb err: %s", e)
+            if is_push(fr.cmd):
+                for s in self._streams:
+                    if s.cmds is None or fr.cmd in s.cmds:
+                        s._put((fr.cmd, fr.payload))
+            logging.debug("RX     cmd=0x%02X len=%d  raw=%s", fr.cmd, len(fr.payload), to_hex(fr.raw))
+
+    async def _heartbeat_loop(self):
+        miss = 0
+        while True:
+            if self._chan is None:
+                miss = 0
+                await asyncio.sleep(self.heartbeat_interval)
+                continue
+            ok, _ = await self.request(CMD.PING, b"", timeout=0.3, retry=0)
+            if ok:
+                miss = 0
+                self._set_state(CommState.READY)
+            else:
+                miss += 1
+                if miss >= 3 and self._chan is not None:
+                    self._on_port_error(TimeoutError("心跳连续 3 次无应答"))
+            await asyncio.sleep(self.heartbeat_interval)
+
+    def _write(self, frame: bytes):
+        if self._chan is None:
+            raise ConnectionError("串口未打开")
+        self._chan.write(frame)
+
+    def _pump(self):
+        while True:
+            req = self._win.next_send()
+            if req is None:
+                return
+            seq = req.seq
+            req.timer = self._loop.call_later(req.timeout, self._on_timeout, req, seq)
+            frame = self._win.frame(req)
+            try:
+                self._write(frame)
+                logging.debug("TX CMD=0x%02X SEQ=%d  %s", req.cmd, seq, to_hex(frame))
+            except Exception as e:
+                req.timer.cancel()
+                self._win.unsend(req)
+                if self._chan is not None:
+                    self._set_state(CommState.ERROR)
+                self._retry_or_fail(req, e, delay=0.1)
+
+    def _on_ack(self, fr) -> bool:
+        """匹配在途请求（seq 相同且 cmd 为其 ACK）；匹配上返回 True"""
+        req = self._win.match_ack(fr.cmd, fr.payload)
+        if req is None:
+            return False
+        req.timer.cancel()
+        if not req.future.done():
+            req.future.set_result(fr.payload)
+        logging.debug("RX ACK  cmd=0x%02X seq=%d len=%d rtt=%.1fms  raw=%s",
+                      fr.cmd, req.seq, len(fr.payload), (time.monotonic() - req.t_sent) * 1000, to_hex(fr.raw))
+        self._pump()
+        return True
+
+    def _on_timeout(self, req: PendingRequest, seq: int):
+        if not self._win.expire(req, seq):
+            return
+        self._retry_or_fail(req, TimeoutError(f"CMD=0x{req.cmd:02X} SEQ={seq} 超时"))
+        self._pump()
+
+    def _retry_or_fail(self, req: PendingRequest, exc: Exception, delay: float = 0.0):
+        if self._win.retry(req, exc, stopped=self._closed):
+            if delay > 0:
+                def requeue():
+                    self._win.requeue(req)
+                    self._pump()
+                self._loop.call_later(delay, requeue)
+            else:
+                self._win.requeue(req)
+            return
+        if not req.future.done():
+            req.future.set_exception(exc)
+
+    def _clear_pending(self, exc: Exception):
+        for req in self._win.drain():
+            if req.timer is not None:
+                req.timer.cancel()
+            if not req.future.done():
+                req.future.set_exception(exc)
+
+    def _set_state(self, st: str):
+        if self.state != st:
+            self.state = st
+            logging.info("CommState => %s", st)
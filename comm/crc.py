@@ -0,0 +1,36 @@
+# comm/crc.py
+# CRC-16/MODBUS（多项式 0xA001 反射，初值 0xFFFF，结果小端附在帧尾），上位机各帧编解码共用
+#
+# 256 项查表，每字节一次查表（原逐位实现每字节 8 次移位判断）。
+# data 接受任意 bytes 类对象（bytes/bytearray/memoryview 切片），按字节迭代，不复制缓冲区；
+# crc 参数传入上一段的结果即可分段增量计算：crc16_modbus(b, crc16_modbus(a)) == crc16_modbus(a + b)。
+# 校验整帧时可直接对“数据 + 小端 CRC”计算，结果为 0 即通过（CRC16_RESIDUE）。
+from typing import Union
+
+CRC16_INIT = 0xFFFF
+CRC16_RESIDUE = 0x0000
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+def _make_table(poly: int = 0xA001):
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = ((crc >> 1) ^ poly) if (crc & 1) else (crc >> 1)
+        table.append(crc)
+    return tuple(table)
+
+CRC16_TABLE = _make_table()
+
+def crc16_modbus(data: Buffer, crc: int = CRC16_INIT) -> int:
+    if isinstance(data, memoryview) and data.format != "B":
+        data = data.cast("B")
+    table = CRC16_TABLE
+    for b in data:
+        crc = (crc >> 8) ^ table[(crc ^ b) & 0xFF]
+    return crc
+
+def crc16_bytes(data: Buffer, crc: int = CRC16_INIT) -> bytes:
+    """帧尾 CRC 字段（小端 2 字节）"""
+    return crc16_modbus(data, crc).to_bytes(2, "little")
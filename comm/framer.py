@@ -1,7 +1,8 @@
 
 from __future__ import annotations
 from dataclasses import dataclass
-from .utils import crc16_modbus
+from typing import Any
+from .crc import CRC16_RESIDUE, crc16_modbus
 
 STX = b"\x55\xAA"
 
@@ -11,6 +12,10 @@ class Frame:
     payload: bytes
     raw: bytes
 
+    @classmethod
+    def from_raw(cls, raw: bytes) -> "Frame":
+        return cls(cmd=raw[3], payload=raw[4:-2], raw=raw)
+
 def encode_frame(cmd: int, payload: bytes) -> bytes:
     assert 0 <= cmd <= 0xFF
     body = bytes([cmd]) + payload
@@ -19,46 +24,69 @@ def encode_frame(cmd: int, payload: bytes) -> bytes:
     return frame_wo_crc + c.to_bytes(2, "little")
 
 class Decoder:
-    """状态机解包，处理拆包/粘包/错包。"""
-    def __init__(self):
+    """
+    整块扫描解包，处理拆包/粘包/错包：bytearray.find 定位 55 AA，读 LEN，整帧到齐后
+    在 memoryview 切片上校验 CRC（从帧内偏移 crc_offset 起，连同帧尾 CRC 计算余数为 0 即通过），
+    逐字节的 Python 循环只剩 CRC 查表。CRC 错或 LEN=0 时只跳过一个字节重新找帧头；
+    每次 feed 只在缓冲区头部删除一次。
+    crc_offset: CRC 覆盖范围的起点。0 = STX+LEN+BODY（本模块 encode_frame）；
+                2 = LEN+BODY（下位机帧，hardware.frame_codec）
+    frame_type: 解出的帧类型，须提供 from_raw(raw)，raw 为含 STX 与 CRC 的整帧
+    """
+    def __init__(self, crc_offset: int = 0, frame_type: Any = Frame):
+        self.crc_offset = crc_offset
+        self.frame_type = frame_type
         self.buf = bytearray()
-        self.state = 0  # 0: find 0x55, 1: find 0xAA, 2: LEN, 3: BODY+CRC
-        self.need = 1
-        self.length = 0
+        self.frames = 0       # 已解出的帧数
+        self.crc_errors = 0   # CRC 错误次数
+        self.skipped = 0      # 重新同步时丢弃的字节数（帧头前的杂字节、错帧起始字节）
+        self._need = 0        # 缓冲区头部是未到齐的帧时，其完整长度（到齐前 feed 不做任何扫描）
 
     def feed(self, data: bytes) -> list[Frame]:
         out: list[Frame] = []
-        for b in data:
-            self.buf.append(b)
-            if self.state == 0:  # find 0x55
-                if b == 0x55:
-                    self.state = 1
-                else:
-                    self.buf.clear()
-            elif self.state == 1:  # find 0xAA
-                if b == 0xAA:
-                    self.state = 2
-                else:
-                    self.buf.clear()
-                    self.state = 0
-            elif self.state == 2:  # LEN
-                self.length = b
-                self.state = 3
-                self.need = self.length + 2  # BODY + CRC
-            elif self.state == 3:  # BODY+CRC
-                self.need -= 1
-                if self.need == 0:
-                    full = bytes(self.buf)
-                    self.buf.clear()
-                    self.state = 0
-                    if len(full) < 5:
-                        continue
-                    frame_wo_crc = full[:-2]
-                    crc_recv = int.from_bytes(full[-2:], "little")
-                    if crc_recv != crc16_modbus(frame_wo_crc):
-                        # CRC 错，丢弃这帧
-                        continue
-                    cmd = full[3]
-                    payload = full[4:-2]
-                    out.append(Frame(cmd=cmd, payload=payload, raw=full))
+        buf = self.buf
+        buf += data
+        end = len(buf)
+        if end < self._need:
+            return out
+        self._need = 0
+        pos = 0
+        crc_offset = self.crc_offset
+        make = self.frame_type.from_raw
+        mv = memoryview(buf)  # del buf 前须 release
+        try:
+            while True:
+                hdr = buf.find(STX, pos)
+                if hdr < 0:
+                    # 末字节可能是下一帧帧头的前半
+                    hdr = end - 1 if end and buf[-1] == STX[0] else end
+                    self.skipped += hdr - pos
+                    pos = hdr
+                    break
+                self.skipped += hdr - pos
+                pos = hdr
+                if pos + 3 > end:
+                    break
+                length = buf[pos + 2]
+                if length < 1:
+                    self.skipped += 1
+                    pos += 1
+                    continue
+                stop = pos + 3 + length + 2  # STX + LEN + BODY + CRC
+                if stop > end:
+                    self._need = stop - pos
+                    break
+                if crc16_modbus(mv[pos + crc_offset:stop]) != CRC16_RESIDUE:
+                    # CRC 错，跳过帧头一个字节重新同步
+                    self.crc_errors += 1
+                    self.skipped += 1
+                    pos += 1
+                    continue
+                out.append(make(bytes(mv[pos:stop])))
+                self.frames += 1
+                pos = stop
+        finally:
+            mv.release()
+        if pos:
+            del buf[:pos]
         return out
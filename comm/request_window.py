@@ -0,0 +1,162 @@
+# comm/request_window.py
+# 请求/应答窗口的无 IO 核心：seq 分配与隔离、排队/窗口发送、ACK 匹配、超时作废、重试判定与清空。
+# 不做任何读写、不持有定时器与线程：CommService（线程 + TimerWheel）与
+# AsyncCommService（事件循环 + call_later）各自负责发送、定时与 Future 完成，状态机只此一份。
+from __future__ import annotations
+import collections, time
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from .framer import encode_frame
+from .protocol import ack_of
+
+SEQ_SPACE = 255          # seq 取 1..255（0 保留）
+MAX_WINDOW = SEQ_SPACE // 2
+
+@dataclass
+class CommStats:
+    submitted: int = 0     # submit() 次数
+    sent: int = 0          # 实际发出的帧（含重试）
+    acked: int = 0
+    retries: int = 0
+    timeouts: int = 0      # 重试用尽仍超时而失败的请求
+    late_acks: int = 0     # 找不到在途请求的 ACK（超时后才到达/重复）
+    inflight_high_water: int = 0
+
+class PendingRequest:
+    """一个请求（跨重试）；每次发送分配新 seq。future/timer 的类型由驱动方决定"""
+    __slots__ = ("cmd", "payload", "timeout", "retries_left", "future", "seq", "timer", "t_sent")
+
+    def __init__(self, cmd: int, payload: bytes, timeout: float, retry: int, future: Any):
+        self.cmd = cmd
+        self.payload = payload
+        self.timeout = timeout
+        self.retries_left = retry
+        self.future = future
+        self.seq = 0
+        self.timer: Any = None
+        self.t_sent = 0.0
+
+class RequestWindow:
+    """
+    在途请求窗口。驱动方的用法：
+      submit(req) 入队 → 循环 next_send() 取出可发的请求（已分配 seq），frame(req) 封帧后写串口、
+      按 req.timeout 挂定时器；写失败时 unsend(req)。
+      收到 ACK 帧 → match_ack(cmd, payload) 返回对应请求（或 None）；定时器到期 → expire(req, seq)。
+      失败时 retry(req, exc, stopped) 判定是否重试：True 则（可延时后）requeue(req)，否则以 exc 结束 Future。
+    seq 为 8 位且 window ≤ 127：分配时跳过仍在途的 seq；超时作废的 seq 在 seq_quarantine 秒内
+    不再分配，避免迟到的 ACK 被错配到新请求。
+    本类不加锁：多线程驱动方须在自己的锁内调用。
+    """
+    def __init__(self, window: int = 8, seq_quarantine: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic):
+        if not 1 <= window <= MAX_WINDOW:
+            raise ValueError(f"window 须在 1..{MAX_WINDOW} 之间")
+        self.window = window
+        self.seq_quarantine = seq_quarantine
+        self.clock = clock
+        self.stats = CommStats()
+        self._seq = 0
+        self._pending: Dict[int, PendingRequest] = {}       # seq -> 在途请求
+        self._backlog: Deque[PendingRequest] = collections.deque()  # 等待窗口的请求
+        self._retired: Dict[int, float] = {}                # 超时作废的 seq -> 可再分配的时间
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    @property
+    def queued(self) -> int:
+        return len(self._backlog)
+
+    def submit(self, req: PendingRequest):
+        self.stats.submitted += 1
+        self._backlog.append(req)
+
+    def requeue(self, req: PendingRequest):
+        self._backlog.appendleft(req)   # 重试优先于新请求
+
+    def _next_seq(self) -> Optional[int]:
+        """下一个可用 seq（跳过在途和隔离中的），没有则 None"""
+        now = self.clock()
+        for _ in range(SEQ_SPACE):
+            self._seq = self._seq % SEQ_SPACE + 1
+            seq = self._seq
+            if seq in self._pending:
+                continue
+            until = self._retired.get(seq)
+            if until is not None:
+                if until > now:
+                    continue
+                del self._retired[seq]
+            return seq
+        return None
+
+    def next_send(self) -> Optional[PendingRequest]:
+        """窗口有空位时取出队首请求、分配 seq 并登记为在途；没有可发的返回 None"""
+        backlog = self._backlog
+        while backlog and len(self._pending) < self.window:
+            req = backlog[0]
+            if req.future.done():           # 调用方已取消
+                backlog.popleft()
+                continue
+            seq = self._next_seq()
+            if seq is None:
+                return None
+            backlog.popleft()
+            req.seq = seq
+            req.t_sent = self.clock()
+            self._pending[seq] = req
+            st = self.stats
+            st.sent += 1
+            if len(self._pending) > st.inflight_high_water:
+                st.inflight_high_water = len(self._pending)
+            return req
+        return None
+
+    @staticmethod
+    def frame(req: PendingRequest) -> bytes:
+        return encode_frame(req.cmd, bytes([req.seq]) + req.payload)
+
+    def unsend(self, req: PendingRequest):
+        """next_send 取出的请求未能写出：撤销在途登记"""
+        if self._pending.get(req.seq) is req:
+            del self._pending[req.seq]
+            self.stats.sent -= 1
+
+    def match_ack(self, cmd: int, payload: bytes) -> Optional[PendingRequest]:
+        """ACK 匹配在途请求（payload[0] 为 seq 且 cmd 为其 ACK）；匹配上则移出在途表并返回"""
+        if not payload:
+            return None
+        seq = payload[0]
+        req = self._pending.get(seq)
+        if req is None or ack_of(req.cmd) != cmd:
+            return None
+        del self._pending[seq]
+        self.stats.acked += 1
+        return req
+
+    def expire(self, req: PendingRequest, seq: int) -> bool:
+        """本次发送超时：作废该 seq（隔离）；已 ACK/已清空时返回 False"""
+        if self._pending.get(seq) is not req:
+            return False
+        del self._pending[seq]
+        self._retired[seq] = self.clock() + self.seq_quarantine
+        return True
+
+    def retry(self, req: PendingRequest, exc: Exception, stopped: bool = False) -> bool:
+        """失败后是否重试（消耗一次重试次数）；不再重试且为超时时计入 timeouts"""
+        if req.retries_left > 0 and not req.future.done() and not stopped:
+            req.retries_left -= 1
+            self.stats.retries += 1
+            return True
+        if isinstance(exc, TimeoutError):
+            self.stats.timeouts += 1
+        return False
+
+    def drain(self) -> List[PendingRequest]:
+        """取出并清空全部在途与排队请求（服务停止时由驱动方逐个结束）"""
+        reqs = list(self._pending.values()) + list(self._backlog)
+        self._pending.clear()
+        self._backlog.clear()
+        return reqs
@@ -2,11 +2,14 @@
 from __future__ import annotations
 import threading, time, logging
 from concurrent.futures import Future
-from typing import Callable, Dict, Optional
+from dataclasses import replace
+from typing import Callable, Optional
 
 from .serial_port import SerialPort
-from .framer import encode_frame, Decoder
-from .protocol import CMD, is_ack, ack_of, is_push
+from .framer import Decoder
+from .protocol import CMD, is_ack, is_push
+from .request_window import CommStats, PendingRequest, RequestWindow
+from .timer_wheel import TimerWheel
 from .utils import to_hex
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
@@ -18,18 +21,33 @@ class CommState:
     ERROR        = "ERROR"
 
 class CommService:
+    """
+    串口请求/应答服务。
+    - submit() 非阻塞，返回 Future（结果为 ACK payload，失败时为 TimeoutError 等异常）；
+      在途请求数不超过 window，超出的按提交顺序排队，有 ACK/超时腾出窗口时自动发出，
+      因此连续下发 N 条指令只需约 1 个 RTT + 链路传输时间，而不是 N 个 RTT
+    - request() 为阻塞式封装，保持原有 (ok, ack_payload) 返回值
+    - 在途表由 _lock 保护，reader/心跳/调用方多线程并发安全
+    - seq 分配/隔离、窗口与 ACK 匹配由 RequestWindow（与 AsyncCommService 共用）处理
+    - 超时与重试由一个时间轮驱动线程统一处理
+    """
     def __init__(self, port: str, baud: int = 115200,
-                 heartbeat_interval: float = 1.0, reconnect_interval: float = 2.0):
+                 heartbeat_interval: float = 1.0, reconnect_interval: float = 2.0,
+                 window: int = 8, seq_quarantine: float = 1.0, timer_tick: float = 0.01):
+        self._win = RequestWindow(window, seq_quarantine)
         self.port = SerialPort(port, baud)
         self.decoder = Decoder()
         self.heartbeat_interval = heartbeat_interval
         self.reconnect_interval = reconnect_interval
+        self.window = window
+        self.seq_quarantine = seq_quarantine
 
         self._reader_th: Optional[threading.Thread] = None
         self._hb_th: Optional[threading.Thread] = None
+        self._timer_th: Optional[threading.Thread] = None
         self._stop = threading.Event()
-        self._seq = 0
-        self._pending: Dict[int, Future] = {}
+        self._lock = threading.Lock()                       # 保护 _win（在途表/排队/seq/统计）
+        self._wheel = TimerWheel(tick_s=timer_tick)
         self._subscribers: list[Callable[[int, bytes], None]] = []
         self.state = CommState.DISCONNECTED
         self._state_lock = threading.Lock()
@@ -42,6 +60,8 @@ class CommService:
         self._reader_th.start()
         self._hb_th = threading.Thread(target=self._heartbeat_loop, daemon=True)
         self._hb_th.start()
+        self._timer_th = threading.Thread(target=self._timer_loop, daemon=True)
+        self._timer_th.start()
 
     def stop(self):
         self._stop.set()
@@ -63,34 +83,37 @@ class CommService:
         return False
 
     # ---------- API ----------
+    def submit(self, cmd: int, payload_wo_seq: bytes,
+               timeout: float = 0.5, retry: int = 2) -> Future:
+        """
+        非阻塞请求：自动加 seq、封帧，窗口有空位立即发送，否则排队。
+        返回的 Future 在收到 ACK 时得到 ACK payload；每次发送超时 timeout 秒后换新 seq 重发，
+        共 retry 次仍失败则为 TimeoutError。
+        """
+        req = PendingRequest(cmd, bytes(payload_wo_seq), timeout, retry, Future())
+        req.future.set_running_or_notify_cancel()   # 已受理，不再允许 cancel()
+        with self._lock:
+            self._win.submit(req)
+        self._pump()
+        return req.future
+
     def request(self, cmd: int, payload_wo_seq: bytes,
                 timeout: float = 0.5, retry: int = 2) -> tuple[bool, bytes]:
         """阻塞式请求，内部自动加 seq、封帧、等待 ACK。返回 (ok, ack_payload)"""
-        for attempt in range(retry + 1):
-            seq = self._next_seq()
-            payload = bytes([seq]) + payload_wo_seq
-            frame = encode_frame(cmd, payload)
-            fut = Future()
-            self._pending[seq] = fut
-            try:
-                self._send(frame, note=f"CMD=0x{cmd:02X} SEQ={seq}")
-            except Exception as e:
-                self._pending.pop(seq, None)
-                self._set_state(CommState.ERROR)
-                if attempt == retry:
-                    return False, b""
-                time.sleep(0.1)
-                continue
+        fut = self.submit(cmd, payload_wo_seq, timeout=timeout, retry=retry)
+        try:
+            # 超时/重试由时间轮处理；这里的上限只防止服务停止等异常情况下永久阻塞
+            return True, fut.result(timeout=(timeout + 0.2) * (retry + 1) + 1.0)
+        except Exception:
+            return False, b""
 
-            try:
-                ok_payload = fut.result(timeout=timeout)
-                return True, ok_payload
-            except Exception:
-                # 超时/错误，重试
-                self._pending.pop(seq, None)
-                if attempt == retry:
-                    return False, b""
-        return False, b""
+    def in_flight(self) -> int:
+        with self._lock:
+            return self._win.in_flight
+
+    def stats(self) -> CommStats:
+        with self._lock:
+            return replace(self._win.stats)
 
     # ---------- internals ----------
     def _ensure_open(self):
@@ -115,21 +138,19 @@ class CommService:
                 continue
             frames = self.decoder.feed(data)
             for fr in frames:
-                if is_ack(fr.cmd):
-                    # ACK: payload = [seq, status, ...]
-                    if len(fr.payload) >= 1:
-                        seq = fr.payload[0]
-                        fut = self._pending.pop(seq, None)
-                        if fut and not fut.done():
-                            fut.set_result(fr.payload)
-                            logging.info("RX ACK  cmd=0x%02X seq=%d len=%d  raw=%s",
-                                         fr.cmd, seq, len(fr.payload), to_hex(fr.raw))
-                elif is_push(fr.cmd):
+                # ACK: payload = [seq, status, ...]；ACK 段(0x80+)与上报段(0xC0+)重叠，
+                # 按 seq 与请求 cmd 都对得上才算 ACK，否则 0xC0+ 按 PUSH 处理
+                if is_ack(fr.cmd) and self._on_ack(fr):
+                    continue
+                if is_push(fr.cmd):
                     for cb in self._subscribers:
                         try: cb(fr.cmd, fr.payload)
                         except Exception as e: logging.warning("push cb err: %s", e)
                     logging.info("RX PUSH cmd=0x%02X len=%d  raw=%s",
                                  fr.cmd, len(fr.payload), to_hex(fr.raw))
+                elif is_ack(fr.cmd):
+                    with self._lock:
+                        self._win.stats.late_acks += 1
                 else:
                     # 非ACK、非PUSH 的“普通响应”也可能存在，直接广播
                     for cb in self._subscribers:
@@ -162,21 +183,80 @@ class CommService:
                     # 等待下一轮 _ensure_open 重连
             time.sleep(self.heartbeat_interval)
 
+    def _timer_loop(self):
+        tick = self._wheel.tick_s
+        while not self._stop.wait(tick):
+            self._wheel.advance()
+
     def _send(self, frame: bytes, note: str = ""):
         self.port.write(frame)
         logging.info("TX %s  %s", note, to_hex(frame))
 
-    def _next_seq(self) -> int:
-        self._seq = (self._seq + 1) & 0xFF
-        if self._seq == 0:
-            self._seq = 1
-        return self._seq
+    def _pump(self):
+        """在窗口允许的范围内发出排队的请求（任意线程调用）"""
+        while True:
+            with self._lock:
+                req = self._win.next_send()
+            if req is None:
+                return
+            seq = req.seq
+            req.timer = self._wheel.schedule(req.timeout, lambda r=req, s=seq: self._on_timeout(r, s))
+            frame = self._win.frame(req)
+            try:
+                self._send(frame, note=f"CMD=0x{req.cmd:02X} SEQ={seq}")
+            except Exception as e:
+                req.timer.cancel()
+                with self._lock:
+                    self._win.unsend(req)
+                self._set_state(CommState.ERROR)
+                self._retry_or_fail(req, e, delay=0.1)
+
+    def _on_ack(self, fr) -> bool:
+        """匹配在途请求（seq 相同且 cmd 为其 ACK）；匹配上返回 True"""
+        with self._lock:
+            req = self._win.match_ack(fr.cmd, fr.payload)
+        if req is None:
+            return False
+        req.timer.cancel()
+        if not req.future.done():
+            req.future.set_result(fr.payload)
+        logging.info("RX ACK  cmd=0x%02X seq=%d len=%d rtt=%.1fms  raw=%s",
+                     fr.cmd, req.seq, len(fr.payload), (time.monotonic() - req.t_sent) * 1000, to_hex(fr.raw))
+        self._pump()
+        return True
+
+    def _on_timeout(self, req: PendingRequest, seq: int):
+        """时间轮线程：本次发送超时，作废该 seq 并重试或失败"""
+        with self._lock:
+            if not self._win.expire(req, seq):
+                return                  # 已 ACK
+        self._retry_or_fail(req, TimeoutError(f"CMD=0x{req.cmd:02X} SEQ={seq} 超时"))
+        self._pump()
+
+    def _retry_or_fail(self, req: PendingRequest, exc: Exception, delay: float = 0.0):
+        with self._lock:
+            retry = self._win.retry(req, exc, stopped=self._stop.is_set())
+        if retry:
+            def requeue():
+                with self._lock:
+                    self._win.requeue(req)
+                self._pump()
+            if delay > 0:
+                self._wheel.schedule(delay, requeue)
+            else:
+                requeue()
+            return
+        if not req.future.done():
+            req.future.set_exception(exc)
 
     def _clear_pending(self, exc: Exception):
-        for _, fut in list(self._pending.items()):
-            if not fut.done():
-                fut.set_exception(exc)
-        self._pending.clear()
+        with self._lock:
+            reqs = self._win.drain()
+        for req in reqs:
+            if req.timer is not None:
+                req.timer.cancel()
+            if not req.future.done():
+                req.future.set_exception(exc)
 
     def _set_state(self, st: str):
         with self._state_lock:
@@ -0,0 +1,77 @@
+from __future__ import annotations
+import threading, time
+from typing import Callable, List, Optional
+
+class Timer:
+    """TimerWheel.schedule 返回的句柄；cancel() 为惰性取消（到期时跳过）"""
+    __slots__ = ("deadline", "callback", "cancelled")
+
+    def __init__(self, deadline: float, callback: Callable[[], None]):
+        self.deadline = deadline
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+class TimerWheel:
+    """
+    哈希时间轮：slots 个槽，每槽 tick_s 秒；定时器按到期 tick 放入对应槽（超过一圈的留在槽里，
+    经过时按 deadline 判断是否到期）。schedule/cancel 为 O(1)，advance() 只处理走过的槽，
+    所有超时共用一个驱动线程，不需要每个请求各自阻塞等待。精度为一个 tick（只会晚到、不会早到）。
+    schedule 可在任意线程调用；advance 只应由驱动线程调用，回调在驱动线程中执行（在锁外）。
+    """
+    def __init__(self, tick_s: float = 0.01, slots: int = 256, clock: Callable[[], float] = time.monotonic):
+        self.tick_s = tick_s
+        self.clock = clock
+        self._slots: List[List[Timer]] = [[] for _ in range(slots)]
+        self._lock = threading.Lock()
+        self._t0 = clock()
+        self._cur = 0          # 下一个待处理的 tick 序号
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _tick_of(self, t: float) -> int:
+        return int((t - self._t0) / self.tick_s)
+
+    def schedule(self, delay_s: float, callback: Callable[[], None]) -> Timer:
+        deadline = self.clock() + max(0.0, delay_s)
+        # 向上取整到 tick，保证不早于 deadline 触发
+        tick = max(self._tick_of(deadline) + 1, 0)
+        n = len(self._slots)
+        with self._lock:
+            tick = max(tick, self._cur)
+            timer = Timer(deadline, callback)
+            self._slots[tick % n].append(timer)
+            self._count += 1
+        return timer
+
+    def advance(self, now: Optional[float] = None) -> int:
+        """处理到 now 为止的全部槽，返回触发的回调数"""
+        now = self.clock() if now is None else now
+        target = self._tick_of(now)
+        n = len(self._slots)
+        due: List[Timer] = []
+        with self._lock:
+            # 落后超过一圈时每个槽只需看一次（按 deadline 判断，不会漏掉）
+            steps = min(target - self._cur + 1, n)
+            for _ in range(max(0, steps)):
+                slot = self._slots[self._cur % n]
+                keep = []
+                for t in slot:
+                    if t.cancelled:
+                        self._count -= 1
+                    elif t.deadline > now:
+                        keep.append(t)
+                    else:
+                        self._count -= 1
+                        due.append(t)
+                self._slots[self._cur % n] = keep
+                self._cur += 1
+            if target >= self._cur:
+                self._cur = target + 1
+        for t in due:
+            t.callback()
+        return len(due)
@@ -1,14 +1,4 @@
-
-def crc16_modbus(data: bytes) -> int:
-    crc = 0xFFFF
-    for b in data:
-        crc ^= b
-        for _ in range(8):
-            if crc & 1:
-                crc = (crc >> 1) ^ 0xA001
-            else:
-                crc >>= 1
-    return crc & 0xFFFF
+from .crc import crc16_modbus  # 查表实现，见 comm/crc.py
 
 def to_hex(b: bytes) -> str:
     return b.hex(" ").upper()
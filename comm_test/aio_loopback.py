@@ -0,0 +1,95 @@
+# comm_test/aio_loopback.py
+# AsyncCommService 回环演示（Linux/macOS）：一个事件循环、零额外线程，同时驱动多台 pty 模拟设备，
+# 每台设备对请求回 ACK 并周期上报 PUSH(0xC1)；输出各台的请求耗时、PUSH 数与通信统计
+# 用法：python -m comm_test.aio_loopback [--rigs 3] [--requests 200] [--window 8]
+import argparse
+import asyncio
+import os
+import threading
+import time
+import tty
+
+from comm.aio_service import AsyncCommService
+from comm.framer import Decoder, encode_frame
+from comm.protocol import CMD
+
+async def sim_device(fd: int, stop: asyncio.Event, push_interval: float = 0.05):
+    """pty 从端上的模拟设备：收到请求回 ACK(seq, status=0)，并按 push_interval 上报姿态"""
+    loop = asyncio.get_running_loop()
+    os.set_blocking(fd, False)
+    dec = Decoder()
+
+    def on_readable():
+        try:
+            data = os.read(fd, 4096)
+        except BlockingIOError:
+            return
+        for fr in dec.feed(data):
+            seq = fr.payload[0] if fr.payload else 0
+            os.write(fd, encode_frame((fr.cmd | 0x80) & 0xFF, bytes([seq, 0x00])))
+
+    loop.add_reader(fd, on_readable)
+    try:
+        n = 0
+        while not stop.is_set():
+            n += 1
+            os.write(fd, encode_frame(0xC1, n.to_bytes(4, "little")))
+            try:
+                await asyncio.wait_for(stop.wait(), push_interval)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        loop.remove_reader(fd)
+
+async def run_rig(i: int, svc: AsyncCommService, n_requests: int):
+    pushes = 0
+
+    async def count_pushes():
+        nonlocal pushes
+        async for cmd, payload in svc.pushes(cmds={0xC1}):
+            pushes += 1
+
+    counter = asyncio.create_task(count_pushes())
+    t0 = time.perf_counter()
+    futs = [svc.submit(CMD.SET_PARAM, bytes([k & 0xFF, 0, 0, 0])) for k in range(n_requests)]
+    results = await asyncio.gather(*futs, return_exceptions=True)
+    dt = time.perf_counter() - t0
+    ok = sum(1 for r in results if not isinstance(r, Exception))
+    single = time.perf_counter()
+    await svc.request(CMD.PING, b"")
+    rtt = (time.perf_counter() - single) * 1000
+    await asyncio.sleep(0.3)
+    counter.cancel()
+    print(f"[AIO] 设备{i}: {ok}/{n_requests} 请求 {dt*1000:.0f}ms（{n_requests/dt:,.0f} 次/s），单次 PING {rtt:.2f}ms，"
+          f"PUSH {pushes} 帧，{svc.stats()}")
+
+async def main_async(args):
+    stop = asyncio.Event()
+    rigs = []
+    for _ in range(args.rigs):
+        master, slave = os.openpty()
+        tty.setraw(slave)
+        rigs.append((master, slave))
+    devices = [asyncio.create_task(sim_device(slave, stop)) for _, slave in rigs]
+    services = [AsyncCommService(fd=master, window=args.window, heartbeat_interval=0.5) for master, _ in rigs]
+    for svc in services:
+        await svc.start()
+    await asyncio.gather(*(run_rig(i, svc, args.requests) for i, svc in enumerate(services)))
+    print(f"[AIO] 线程数 {threading.active_count()}（{args.rigs} 台设备 + 模拟端共用一个事件循环）")
+    for svc in services:
+        await svc.stop()
+    stop.set()
+    await asyncio.gather(*devices)
+    for master, slave in rigs:
+        os.close(master)
+        os.close(slave)
+
+def main():
+    ap = argparse.ArgumentParser(description="AsyncCommService pty 回环演示")
+    ap.add_argument("--rigs", type=int, default=3, help="模拟设备台数")
+    ap.add_argument("--requests", type=int, default=200, help="每台设备的请求数")
+    ap.add_argument("--window", type=int, default=8, help="在途窗口")
+    asyncio.run(main_async(ap.parse_args()))
+
+if __name__ == "__main__":
+    main()
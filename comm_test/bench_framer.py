@@ -0,0 +1,113 @@
+# comm_test/bench_framer.py
+# comm.framer.Decoder 基准：逐字节状态机（旧）vs 整块扫描（新），干净/含噪声/含错帧三种输入，输出 frames/s
+# 用法：python -m comm_test.bench_framer [--frames 20000] [--chunk 64]
+import argparse
+import random
+import time
+
+from comm.crc import crc16_modbus
+from comm.framer import Decoder, Frame, encode_frame
+
+class LegacyDecoder:
+    """改造前的逐字节状态机 Decoder，仅作对照"""
+    def __init__(self):
+        self.buf = bytearray()
+        self.state = 0
+        self.need = 1
+        self.length = 0
+
+    def feed(self, data: bytes):
+        out = []
+        for b in data:
+            self.buf.append(b)
+            if self.state == 0:
+                if b == 0x55:
+                    self.state = 1
+                else:
+                    self.buf.clear()
+            elif self.state == 1:
+                if b == 0xAA:
+                    self.state = 2
+                else:
+                    self.buf.clear()
+                    self.state = 0
+            elif self.state == 2:
+                self.length = b
+                self.state = 3
+                self.need = self.length + 2
+            elif self.state == 3:
+                self.need -= 1
+                if self.need == 0:
+                    full = bytes(self.buf)
+                    self.buf.clear()
+                    self.state = 0
+                    if len(full) < 5:
+                        continue
+                    if int.from_bytes(full[-2:], "little") != crc16_modbus(full[:-2]):
+                        continue
+                    out.append(Frame(cmd=full[3], payload=full[4:-2], raw=full))
+        return out
+
+def make_frames(n: int, rnd: random.Random):
+    """ACK/心跳/遥测等长度混合的合法帧"""
+    return [encode_frame(rnd.choice((0x81, 0x82, 0xC1)), rnd.randbytes(rnd.choice((2, 8, 30, 113))))
+            for _ in range(n)]
+
+def make_stream(frames, rnd: random.Random, kind: str):
+    """
+    clean : 帧首尾相接
+    noisy : 帧间插入 0~8 个随机字节（含孤立的 55/55 AA 伪帧头）
+    bad   : noisy 基础上 5% 的帧翻转一个字节（CRC 错）
+    返回 (字节流, 期望解出的帧)
+    """
+    parts, expect = [], []
+    for f in frames:
+        if kind != "clean":
+            noise = bytearray(rnd.randbytes(rnd.randint(0, 8)))
+            if noise and rnd.random() < 0.2:
+                noise[-1:] = b"\x55"
+            parts.append(bytes(noise))
+        if kind == "bad" and rnd.random() < 0.05:
+            g = bytearray(f)
+            g[rnd.randrange(3, len(g))] ^= 0xFF
+            parts.append(bytes(g))
+            continue
+        parts.append(f)
+        expect.append(f)
+    return b"".join(parts), expect
+
+def _chunks(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)] if size > 0 else [data]
+
+def _run(dec_cls, chunks, repeat: int):
+    best, got = float("inf"), []
+    for _ in range(repeat):
+        dec = dec_cls()
+        got = []
+        t0 = time.perf_counter()
+        for c in chunks:
+            got += dec.feed(c)
+        best = min(best, time.perf_counter() - t0)
+    return best, [f.raw for f in got]
+
+def main():
+    ap = argparse.ArgumentParser(description="comm.framer.Decoder 基准")
+    ap.add_argument("--frames", type=int, default=20000, help="帧数")
+    ap.add_argument("--chunk", type=int, default=64, help="分片字节数（模拟串口逐次读取），0 为整块")
+    ap.add_argument("--repeat", type=int, default=3, help="取最好成绩的重复次数")
+    args = ap.parse_args()
+
+    rnd = random.Random(0)
+    frames = make_frames(args.frames, rnd)
+    for kind in ("clean", "noisy", "bad"):
+        data, expect = make_stream(frames, rnd, kind)
+        chunks = _chunks(data, args.chunk)
+        t_old, got_old = _run(LegacyDecoder, chunks, args.repeat)
+        t_new, got_new = _run(Decoder, chunks, args.repeat)
+        print(f"[Bench] {kind:5s} {len(data)/1024:.0f}KB：旧 {len(got_old)/t_old:,.0f} 帧/s "
+              f"(解出 {len(got_old)}/{len(expect)})，新 {len(got_new)/t_new:,.0f} 帧/s "
+              f"(解出 {len(got_new)}/{len(expect)}，{'全部正确' if got_new == expect else '不一致'})，"
+              f"提速 {t_old/t_new:.1f}x")
+
+if __name__ == "__main__":
+    main()
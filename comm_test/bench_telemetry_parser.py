@@ -0,0 +1,119 @@
+# comm_test/bench_telemetry_parser.py
+# 文本遥测解析基准：逐行 find/del + decode/strip 的旧解析 vs SensorSystem 分片批量解析，输出 lines/s
+# 用法：python -m comm_test.bench_telemetry_parser [--cycles 2000] [--chunk 64]
+import argparse
+import random
+import time
+
+from core.logger import Logger
+from core.sensor_system import SensorSystem
+
+LINES_PER_CYCLE = 37  # IMU 1 + FOR 12 + Z 12 + XY 12
+
+def make_stream(cycles: int, seed: int = 0) -> bytes:
+    """与 MockSerialDevice._telemetry_loop 同格式的遥测文本"""
+    rnd = random.Random(seed)
+    out = []
+    for _ in range(cycles):
+        out.append(f"IMU,{rnd.uniform(-0.02,0.02):.4f},{rnd.uniform(-0.02,0.02):.4f},0.0000\n")
+        for i in range(12):
+            out.append(f"FOR,{i+1},{rnd.uniform(90,110):.1f}\n")
+        for i in range(12):
+            out.append(f"Z,{i+1},{rnd.uniform(550,650):.1f}\n")
+        for i in range(12):
+            out.append(f"XY,{i+1},{rnd.uniform(-3000,3000):.1f},{rnd.uniform(-900,900):.1f}\n")
+    return "".join(out).encode("utf-8")
+
+class LegacyParser:
+    """改造前的 _on_rx_bytes/_parse_line（批量日志部分按原逻辑保留），仅作对照"""
+    def __init__(self):
+        self._buf = bytearray()
+        self._att = (0.0, 0.0, 0.0)
+        self._forces = [0.0]*12
+        self._legs_z = [600.0]*12
+        self._legs_xy = [(0.0, 0.0)]*12
+        self._batch_data = {"imu": None, "legs": [None]*12}
+        self._legs_received_count = 0
+        self.cycles = 0
+
+    def on_rx_bytes(self, chunk: bytes):
+        self._buf.extend(chunk)
+        while True:
+            pos = self._buf.find(b'\n')
+            if pos == -1: break
+            line = self._buf[:pos].decode(errors="ignore").strip()
+            del self._buf[:pos+1]
+            if line:
+                self._parse_line(line)
+
+    def _parse_line(self, line: str):
+        parts = [p.strip() for p in line.split(",")]
+        if len(parts) < 3: return
+        cmd = parts[0].upper()
+        try:
+            if cmd == "IMU":
+                self._att = (float(parts[1]), float(parts[2]), float(parts[3]))
+            elif cmd in ("FOR", "Z", "XY"):
+                idx = int(parts[1]) - 1
+                if 0 <= idx < 12:
+                    if self._batch_data["legs"][idx] is None:
+                        self._batch_data["legs"][idx] = {}
+                    leg = self._batch_data["legs"][idx]
+                    if cmd == "FOR":
+                        leg["F"] = self._forces[idx] = float(parts[2])
+                    elif cmd == "Z":
+                        leg["Z"] = self._legs_z[idx] = float(parts[2])
+                    else:
+                        x_mm, y_mm = float(parts[2]), float(parts[3])
+                        self._legs_xy[idx] = (x_mm, y_mm)
+                        leg["X"], leg["Y"] = x_mm, y_mm
+                        if all(k in leg for k in ["X", "Y", "Z", "F"]):
+                            self._legs_received_count += 1
+                        if self._legs_received_count >= 12:
+                            self._batch_data = {"imu": None, "legs": [None]*12}
+                            self._legs_received_count = 0
+                            self.cycles += 1
+        except (ValueError, IndexError):
+            pass
+
+def _chunks(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)] if size > 0 else [data]
+
+def _run(feed, chunks) -> float:
+    t0 = time.perf_counter()
+    for c in chunks:
+        feed(c)
+    return time.perf_counter() - t0
+
+def main():
+    ap = argparse.ArgumentParser(description="文本遥测解析基准")
+    ap.add_argument("--cycles", type=int, default=2000, help="遥测周期数（每周期37行）")
+    ap.add_argument("--chunk", type=int, default=64, help="小分片字节数（模拟串口逐次读取）")
+    ap.add_argument("--repeat", type=int, default=3, help="取最好成绩的重复次数")
+    args = ap.parse_args()
+
+    data = make_stream(args.cycles)
+    n_lines = args.cycles * LINES_PER_CYCLE
+    logger = Logger(level="ERROR", console=False)
+    print(f"[Bench] {n_lines} 行 / {len(data)/1024:.0f} KB")
+
+    for label, size in ((f"{args.chunk}B 分片", args.chunk), ("整块", 0)):
+        chunks = _chunks(data, size)
+        best_old = best_new = float("inf")
+        for _ in range(args.repeat):
+            old = LegacyParser()
+            best_old = min(best_old, _run(old.on_rx_bytes, chunks))
+            new = SensorSystem(logger, mode="mock")
+            new.logger = None  # 只测解析本身，不含批量日志格式化
+            best_new = min(best_new, _run(new.feed, chunks))
+
+        # 解析结果一致性
+        st = new.legs_state()
+        same = (old._att == new.estimate_attitude() and old._forces == new.latest_forces()
+                and old._legs_z == st["z"] and old._legs_xy == st["xy"]
+                and old.cycles == new._cycle_seq)
+        print(f"[Bench] {label}：旧 {n_lines/best_old:,.0f} 行/s，新 {n_lines/best_new:,.0f} 行/s，"
+              f"提速 {best_old/best_new:.1f}x，结果{'一致' if same else '不一致'}")
+
+if __name__ == "__main__":
+    main()
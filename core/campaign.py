@@ -0,0 +1,184 @@
+# core/campaign.py
+# 蒙特卡洛下降实验：对若干组增益，各随机生成 N 个初始状态（Z 散布/XY扰动/传感器噪声），
+# 用 ProcessPoolExecutor 在全部核心上并行运行 simulate()，结果汇总为 NumPy 结构化数组并可导出 CSV
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.control_system import ControlGains
+from core.simulation import Scenario, simulate
+
+RESULT_DTYPE = np.dtype([
+    ("run", np.int32),
+    ("gain_set", np.int32),
+    ("seed", np.int64),
+    ("leveling_gain", np.float64),
+    ("center_gain_xy", np.float64),
+    ("max_step_z", np.float64),
+    ("pair_jitter", np.float64),
+    ("z_spread_mm", np.float64),
+    ("disturbance_amp_mm", np.float64),
+    ("disturbance_freq_hz", np.float64),
+    ("noise_z_mm", np.float64),
+    ("completed", np.bool_),
+    ("ticks", np.int32),
+    ("time_to_completion_s", np.float64),  # 未完成为 NaN
+    ("max_corner_err_mm", np.float64),
+    ("final_corner_err_mm", np.float64),
+    ("max_corner_spread_mm", np.float64),
+    ("mean_corner_spread_mm", np.float64),
+    ("final_center_z", np.float64),
+    ("commands", np.int64),
+    ("corrections", np.int64),
+    ("wall_ms", np.float64),
+])
+
+# (run, gain_set, Scenario)
+CampaignItem = Tuple[int, int, Scenario]
+
+def make_scenarios(gain_sets: Sequence[ControlGains], runs_per_set: int, base_seed: int = 0,
+                   base: Optional[Scenario] = None, z_spread_mm: float = 20.0,
+                   disturbance_amp_max_mm: float = 3.0, disturbance_freq_range: Tuple[float, float] = (0.2, 1.0),
+                   noise_z_range: Tuple[float, float] = (0.1, 0.5)) -> List[CampaignItem]:
+    """
+    为每组增益生成 runs_per_set 个随机场景。
+    同一 run 序号在各组增益间使用相同的随机初始条件（配对比较，减小方差）。
+    """
+    base = base or Scenario()
+    rnd = random.Random(base_seed)
+    conds = []
+    for _ in range(runs_per_set):
+        conds.append(dict(
+            seed=rnd.getrandbits(63),
+            z_spread_mm=z_spread_mm,
+            disturbance_amplitude_mm=rnd.uniform(0.0, disturbance_amp_max_mm),
+            disturbance_frequency_hz=rnd.uniform(*disturbance_freq_range),
+            noise_z_mm=rnd.uniform(*noise_z_range),
+        ))
+    items: List[CampaignItem] = []
+    for g, gains in enumerate(gain_sets):
+        for r, c in enumerate(conds):
+            items.append((r, g, replace(base, gains=gains, **c)))
+    return items
+
+def _result_row(item: CampaignItem, duration: float) -> tuple:
+    run, gain_set, sc = item
+    res = simulate(sc, duration, record_trace=False)
+    g = sc.gains
+    return (run, gain_set, sc.seed, g.leveling_gain, g.center_gain_xy, g.max_step_z, g.pair_jitter,
+            sc.z_spread_mm, sc.disturbance_amplitude_mm, sc.disturbance_frequency_hz, sc.noise_z_mm,
+            res.completed, res.ticks,
+            res.completion_time_s if res.completion_time_s is not None else np.nan,
+            res.max_corner_err_mm, res.final_corner_err_mm,
+            res.max_corner_spread_mm, res.mean_corner_spread_mm, res.final_center_z,
+            res.commands, res.corrections, res.wall_time_s * 1000.0)
+
+def _run_chunk(items: List[CampaignItem], duration: float) -> List[tuple]:
+    # 每个进程任务执行一批场景，摊薄进程间传输开销
+    return [_result_row(it, duration) for it in items]
+
+def _chunks(items: List[CampaignItem], size: int) -> Iterable[List[CampaignItem]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def run_campaign(items: List[CampaignItem], duration: float = 120.0, workers: Optional[int] = None,
+                 chunk_size: Optional[int] = None) -> np.ndarray:
+    """
+    并行运行全部场景，返回 RESULT_DTYPE 结构化数组（顺序与 items 一致）。
+    workers=None 使用全部核心；workers=1 时在当前进程串行运行（便于调试/对比）。
+    """
+    if not items:
+        return np.zeros(0, dtype=RESULT_DTYPE)
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        # 每个 worker 约分到 4 批，兼顾负载均衡与调度开销
+        chunk_size = max(1, len(items) // (workers * 4))
+
+    rows: List[tuple] = []
+    if workers == 1:
+        rows = _run_chunk(items, duration)
+    else:
+        chunks = list(_chunks(items, chunk_size))
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            for part in ex.map(_run_chunk, chunks, [duration] * len(chunks)):
+                rows.extend(part)
+    return np.array(rows, dtype=RESULT_DTYPE)
+
+def summarize(results: np.ndarray) -> np.ndarray:
+    """按增益组汇总：完成率、完成时间均值/P95、最大角差均值/最大、四角高差均值、平均命令/修正数"""
+    dtype = np.dtype([("gain_set", np.int32), ("runs", np.int32), ("completion_rate", np.float64),
+                      ("ttc_mean_s", np.float64), ("ttc_p95_s", np.float64),
+                      ("max_corner_err_mean_mm", np.float64), ("max_corner_err_max_mm", np.float64),
+                      ("max_spread_mean_mm", np.float64), ("mean_spread_mean_mm", np.float64),
+                      ("commands_mean", np.float64), ("corrections_mean", np.float64)])
+    sets = np.unique(results["gain_set"])
+    out = np.zeros(len(sets), dtype=dtype)
+    for k, g in enumerate(sets):
+        r = results[results["gain_set"] == g]
+        ttc = r["time_to_completion_s"][r["completed"]]
+        out[k] = (g, len(r), r["completed"].mean(),
+                  ttc.mean() if len(ttc) else np.nan,
+                  np.percentile(ttc, 95) if len(ttc) else np.nan,
+                  r["max_corner_err_mm"].mean(), r["max_corner_err_mm"].max(),
+                  r["max_corner_spread_mm"].mean(), r["mean_corner_spread_mm"].mean(),
+                  r["commands"].mean(), r["corrections"].mean())
+    return out
+
+def save_csv(results: np.ndarray, path: str):
+    """结构化数组导出为 CSV（表头为字段名）"""
+    fmt = []
+    for name in results.dtype.names:
+        kind = results.dtype[name].kind
+        fmt.append("%d" if kind in "iub" else "%.6g")
+    np.savetxt(path, results, delimiter=",", header=",".join(results.dtype.names), comments="", fmt=fmt)
+
+def _floats(text: Optional[str], default: float) -> List[float]:
+    return [float(v) for v in text.split(",")] if text else [default]
+
+def main():
+    d = ControlGains()
+    ap = argparse.ArgumentParser(description="蒙特卡洛下降实验（多进程并行无头仿真）")
+    ap.add_argument("--runs", type=int, default=200, help="每组增益的随机场景数")
+    ap.add_argument("--workers", type=int, default=None, help="进程数，默认全部核心")
+    ap.add_argument("--duration", type=float, default=120.0, help="单次最长仿真时间（虚拟秒）")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--leveling-gain", default=None, help=f"逗号分隔的取值列表，默认 {d.leveling_gain}")
+    ap.add_argument("--center-gain-xy", default=None, help=f"默认 {d.center_gain_xy}")
+    ap.add_argument("--max-step-z", default=None, help=f"默认 {d.max_step_z}")
+    ap.add_argument("--pair-jitter", default=None, help=f"默认 {d.pair_jitter}")
+    ap.add_argument("--planner", choices=["python", "numpy"], default="python")
+    ap.add_argument("--out", default=None, help="结果 CSV 路径")
+    args = ap.parse_args()
+
+    # 各参数取值列表的笛卡尔积
+    gain_sets = [replace(d, leveling_gain=lg, center_gain_xy=cg, max_step_z=mz, pair_jitter=pj)
+                 for lg in _floats(args.leveling_gain, d.leveling_gain)
+                 for cg in _floats(args.center_gain_xy, d.center_gain_xy)
+                 for mz in _floats(args.max_step_z, d.max_step_z)
+                 for pj in _floats(args.pair_jitter, d.pair_jitter)]
+    items = make_scenarios(gain_sets, args.runs, base_seed=args.seed,
+                           base=Scenario(planner_backend=args.planner))
+
+    t0 = time.perf_counter()
+    results = run_campaign(items, args.duration, workers=args.workers)
+    wall = time.perf_counter() - t0
+    print(f"[Campaign] {len(results)} 次仿真，耗时 {wall:.2f}s（{len(results)/max(wall, 1e-9):.0f} 次/秒）")
+
+    for row, gains in zip(summarize(results), gain_sets):
+        print(f"[Campaign] 组{row['gain_set']} {gains}：完成率{row['completion_rate']*100:.1f}%，"
+              f"完成时间 均值{row['ttc_mean_s']:.1f}s/P95 {row['ttc_p95_s']:.1f}s，"
+              f"最大角差 均值{row['max_corner_err_mean_mm']:.2f}mm/最大{row['max_corner_err_max_mm']:.2f}mm，"
+              f"四角高差 最大均值{row['max_spread_mean_mm']:.2f}mm/过程均值{row['mean_spread_mean_mm']:.2f}mm，"
+              f"命令数{row['commands_mean']:.0f}（修正{row['corrections_mean']:.0f}）")
+    if args.out:
+        save_csv(results, args.out)
+        print(f"[Campaign] 结果已写入 {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,13 @@
 # core/center_estimator.py
 # 估计几何中心/四角相对高差/受力越限等状态；含EMA与离群剔除
+import threading
 from dataclasses import dataclass
 from typing import Tuple, List, Dict, Optional
 
 # 引入几何计算模块
+from core.clock import SYSTEM_CLOCK
 from core.geometry import compute_center_and_theory, SensorSnapshot
+from core.leg_unit import leg_arrays
 
 @dataclass
 class EstimationState:
@@ -15,6 +18,7 @@ class EstimationState:
     attitude_outliers: List[int]         # 超出阈值的角点 leg_id 列表
     force_abnormal: bool                 # 是否存在受力越限
     forces: List[float]                  # 回传12腿受力（如可得）
+    timestamp: float = 0.0               # 估计时刻（估计器 clock.monotonic()）
 
 class CenterEstimator:
     """
@@ -24,6 +28,12 @@ class CenterEstimator:
       - 离群剔除：abs(测点-均值) > outlier_mm 将被剔除后重算
       - 四角相对值：取 [1,2,11,12]（索引0,1,10,11）各自 z - center_z
       - 力判定：超出 force_threshold=(low, high) 认为受力异常
+      - 缓存：按 sensor_system.sample_seq 缓存结果，同一样本只计算一次EMA；
+        latest_state() 只读返回最近结果；current_state() 在样本序号未变且腿子未被手动修改时
+        直接返回该结果，否则按腿子当前数据给出不经EMA的即时值
+      - 手动修改腿子（GUI 单腿移动、重置）后须调用 mark_legs_changed() 使缓存失效
+      - 数据来源：优先读取 SensorSystem 发布的 FusedSample（几何中心/Z/受力已融合好），
+        无传感器样本时才从 legs 读取并自行计算几何中心
     """
     def __init__(self,
                  center_indices: Tuple[int, int, int, int] = (4, 5, 6, 7),
@@ -32,7 +42,7 @@ class CenterEstimator:
                  outlier_mm: float = 30.0,
                  force_threshold: Tuple[float, float] = (80.0, 120.0),
                  attitude_limit_mm: float = 20.0,
-                 logger=None):
+                 logger=None, clock=None):
         self.center_idxs = center_indices
         self.corner_idxs = corner_indices
         self.alpha = float(ema_alpha)
@@ -43,6 +53,33 @@ class CenterEstimator:
         self._ema_x: Optional[float] = None
         self._ema_y: Optional[float] = None
         self.logger = logger
+        self.clock = clock or SYSTEM_CLOCK
+        self._lock = threading.Lock()
+        self._cache: Optional[EstimationState] = None
+        self._cache_seq: Optional[int] = None
+        self._legs_version = 0                     # 手动修改腿子的次数
+        self._cache_version = 0                    # 提交缓存时的 _legs_version
+
+    def mark_legs_changed(self):
+        """腿子被手动修改（单腿移动、重置等）：此前的估计结果不再代表当前状态"""
+        with self._lock:
+            self._legs_version += 1
+
+    def latest_state(self) -> Optional[EstimationState]:
+        """最近一次提交的估计结果；只读，不触发计算也不推进EMA"""
+        return self._cache
+
+    def current_state(self, legs: List, sensor_system=None) -> EstimationState:
+        """
+        供 GUI/查询读取“当前”状态（不推进EMA）：样本序号与最近提交一致且其后未手动修改腿子时
+        即 latest_state()；否则（尚未估计、控制循环已停而样本继续、手动修改过腿子）
+        按腿子当前数据计算、不做EMA平滑，也不写缓存
+        """
+        seq = getattr(sensor_system, "sample_seq", None) if sensor_system is not None else None
+        with self._lock:
+            if self._cache is not None and self._cache_seq == seq and self._cache_version == self._legs_version:
+                return self._cache
+            return self._estimate(legs, sensor_system, None, commit=False, smooth=False)
 
     def _ema(self, prev: Optional[float], val: float) -> float:
         if prev is None: return val
@@ -50,34 +87,39 @@ class CenterEstimator:
 
     def _create_sensor_snapshot(self, legs: List, sensor_system=None) -> SensorSnapshot:
         """创建传感器快照，用于几何计算"""
-        y_meas = {}
-        z_meas = {}
-        x_meas = {}
-        force_meas = {}
-        healthy = {}
-        
-        for i, leg in enumerate(legs):
-            leg_id = getattr(leg, "id", i + 1)
-            y_meas[leg_id] = getattr(leg, "y", 0.0)
-            z_meas[leg_id] = getattr(leg, "z", 0.0)
-            x_meas[leg_id] = getattr(leg, "x", 0.0)
-            force_meas[leg_id] = getattr(leg, "force", 0.0)
-            healthy[leg_id] = True  # 简化处理，可扩展健康状态判断
-            
+        return self._snapshot_from_arrays(leg_arrays(legs))
+
+    @staticmethod
+    def _snapshot_from_arrays(arrays) -> SensorSnapshot:
+        ids, xs, ys, zs, fs = arrays
         return SensorSnapshot(
-            y_meas=y_meas,
-            z_meas=z_meas,
-            x_meas=x_meas,
-            force=force_meas,
-            healthy=healthy
+            y_meas=dict(zip(ids, ys)),
+            z_meas=dict(zip(ids, zs)),
+            x_meas=dict(zip(ids, xs)),
+            force=dict(zip(ids, fs)),
+            healthy=dict.fromkeys(ids, True)  # 简化处理，可扩展健康状态判断
         )
 
-    def estimate(self, legs: List, sensor_system=None) -> EstimationState:
-        # 1) 创建传感器快照
-        snap = self._create_sensor_snapshot(legs, sensor_system)
-        
-        # 2) 使用几何模块计算精确的几何中心
+    def estimate(self, legs: List, sensor_system=None, commit: bool = True) -> EstimationState:
+        """
+        传入带 sample_seq 的 sensor_system 时，同一样本的重复调用直接返回缓存结果。
+        commit=False：仅计算，不推进EMA、不写缓存。
+        """
+        seq = getattr(sensor_system, "sample_seq", None) if sensor_system is not None else None
+        with self._lock:
+            if seq is not None and self._cache is not None and self._cache_seq == seq:
+                return self._cache
+            state = self._estimate(legs, sensor_system, seq, commit)
+            if commit:
+                self._cache, self._cache_seq = state, seq
+                self._cache_version = self._legs_version
+            return state
+
+    def _raw_center(self, arrays) -> Tuple[float, float, float]:
+        """使用几何模块计算未平滑的几何中心 (cx, cy, cz)；失败时回退简化计算"""
+        z_vals = arrays[3]
         try:
+            snap = self._snapshot_from_arrays(arrays)
             geo_result = compute_center_and_theory(snap)
             cx_raw = geo_result.Xc  # 几何中心X
             cz_raw = geo_result.Zc  # 几何中心Z
@@ -96,7 +138,7 @@ class CenterEstimator:
                 cy_raw = cy_raw / max(1, valid_pairs)
             
             if self.logger:
-                self.logger.debug(f"几何计算结果: Xc={cx_raw:.2f}, Zc={cz_raw:.2f}, Yc={cy_raw:.2f}")
+                self.logger.debug("几何计算结果: Xc=%.2f, Zc=%.2f, Yc=%.2f", cx_raw, cz_raw, cy_raw)
                 
         except Exception as e:
             if self.logger:
@@ -104,40 +146,60 @@ class CenterEstimator:
             # 备用方案：使用原有的简化计算
             cx_raw = 0.0
             cy_raw = 0.0
-            z_vals = [getattr(l, "z", 0.0) for l in legs]
             cidx = self.center_idxs
             samples = [z_vals[i] for i in cidx]
             mean0 = sum(samples) / max(1, len(samples))
             inliers = [v for v in samples if abs(v - mean0) <= self.outlier_mm]
             cz_raw = (sum(inliers) / len(inliers)) if inliers else mean0
+        return cx_raw, cy_raw, cz_raw
+
+    def _estimate(self, legs: List, sensor_system, seq: Optional[int], commit: bool,
+                  smooth: bool = True) -> EstimationState:
+        # 1)+2) 数据与几何中心：优先使用同一样本的 FusedSample，否则整块读取腿子状态自行计算
+        sample = None
+        if seq is not None and hasattr(sensor_system, "latest_sample"):
+            sample = sensor_system.latest_sample()
+            if sample is not None and sample.seq != seq:
+                sample = None
+        if sample is not None:
+            ids, z_vals = sample.ids, sample.z.tolist()
+            forces = sample.forces.tolist()
+            cx_raw, cy_raw, cz_raw = sample.center
+        else:
+            arrays = leg_arrays(legs)
+            ids, z_vals = arrays[0], arrays[3]
+            forces = [float(f) for f in arrays[4]]
+            if sensor_system is not None:
+                try:
+                    forces = sensor_system.latest_forces()
+                except Exception:
+                    pass
+            cx_raw, cy_raw, cz_raw = self._raw_center(arrays)
+
+        # 3) EMA平滑处理（smooth=False 时直接用原始值）
+        if smooth:
+            cx = self._ema(self._ema_x, cx_raw)
+            cy = self._ema(self._ema_y, cy_raw)
+            cz = self._ema(self._ema_z, cz_raw)
+        else:
+            cx, cy, cz = cx_raw, cy_raw, cz_raw
 
-        # 3) EMA平滑处理
-        cx = self._ema(self._ema_x, cx_raw)
-        cy = self._ema(self._ema_y, cy_raw)
-        cz = self._ema(self._ema_z, cz_raw)
-        
-        self._ema_x = cx
-        self._ema_y = cy
-        self._ema_z = cz
+        if commit:
+            self._ema_x = cx
+            self._ema_y = cy
+            self._ema_z = cz
 
         # 4) 四角相对高度 & 越限检测
-        z_vals = [getattr(l, "z", 0.0) for l in legs]
         corner_dz: Dict[int, float] = {}
         attitude_outliers: List[int] = []
         for idx in self.corner_idxs:
-            leg_id = getattr(legs[idx], "id", idx + 1)
+            leg_id = ids[idx]
             dz = z_vals[idx] - cz
             corner_dz[leg_id] = dz
             if abs(dz) > self.att_limit:
                 attitude_outliers.append(leg_id)
 
         # 5) 受力异常检测
-        forces = [float(getattr(l, "force", 0.0)) for l in legs]
-        if sensor_system is not None:
-            try:
-                forces = sensor_system.latest_forces()
-            except Exception:
-                pass
         force_abnormal = any((f < self.force_lo or f > self.force_hi) for f in forces if f is not None)
 
         return EstimationState(
@@ -147,5 +209,6 @@ class CenterEstimator:
             corner_dz=corner_dz,
             attitude_outliers=attitude_outliers,
             force_abnormal=force_abnormal,
-            forces=forces
+            forces=forces,
+            timestamp=self.clock.monotonic()
         )
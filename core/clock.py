@@ -0,0 +1,53 @@
+# core/clock.py
+# 时钟抽象：实时运行用 SystemClock，无头仿真/回放用 VirtualClock（sleep 只推进虚拟时间，不真正等待）
+import threading
+import time
+
+class SystemClock:
+    """真实时钟：monotonic 用于周期/间隔，time 用于墙钟时间戳"""
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def time(self) -> float:
+        return time.time()
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def wait(self, event: threading.Event, timeout: float) -> bool:
+        """可被 event 打断的睡眠；返回 event 是否已置位"""
+        return event.wait(max(0.0, timeout))
+
+class VirtualClock:
+    """
+    虚拟时钟：时间只由 sleep/advance/set 推进。
+    单线程逐 tick 驱动时使用（ControlSystem.tick_once 等），不可与实时线程循环混用。
+    """
+    def __init__(self, start: float = 0.0, epoch: float = 0.0):
+        self._now = float(start)
+        self._epoch = float(epoch)
+
+    def monotonic(self) -> float:
+        return self._now
+
+    def time(self) -> float:
+        return self._epoch + self._now
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            self._now += seconds
+
+    def advance(self, seconds: float):
+        self.sleep(seconds)
+
+    def set(self, now: float):
+        """直接设置当前虚拟时间（回放按记录时间戳对齐时使用），不允许倒退"""
+        self._now = max(self._now, float(now))
+
+    def wait(self, event: threading.Event, timeout: float) -> bool:
+        if not event.is_set():
+            self.sleep(timeout)
+        return event.is_set()
+
+SYSTEM_CLOCK = SystemClock()
@@ -1,6 +1,11 @@
 # core/control_system.py
 import threading, time, random
-from typing import List, Dict, Tuple, Optional
+from dataclasses import asdict, dataclass
+from typing import Any, List, Dict, Tuple, Optional
+
+from core.clock import SYSTEM_CLOCK
+from core.leg_unit import leg_arrays, store_of
+from core.scheduler import DeadlineScheduler, LoopStats, OVERRUN_SKIP
 
 FORCE_THRESHOLD = (80.0, 120.0)
 ATTITUDE_OUTLIER_MM = 20.0
@@ -12,9 +17,21 @@ CENTER_GAIN_XY = 0.2
 PAIR_CONSTRAINT_WEIGHT = 1.0
 PAIR_X_JITTER_MM = 1.0
 
+@dataclass
+class ControlGains:
+    """规划增益与步长限幅；默认取上面的模块常量，参数扫描/仿真时按实例传入"""
+    max_step_z: float = MAX_STEP_Z_MM
+    max_step_xy: float = MAX_STEP_XY_MM
+    leveling_gain: float = LEVELING_GAIN
+    center_gain_xy: float = CENTER_GAIN_XY
+    pair_weight: float = PAIR_CONSTRAINT_WEIGHT
+    pair_jitter: float = PAIR_X_JITTER_MM
+
 class ControlSystem:
     def __init__(self, legs, logger, update_callback, estimator, sensor_system, driver,
-                 simulate_feedback: bool = False):
+                 simulate_feedback: bool = False, overrun_policy: str = OVERRUN_SKIP,
+                 planner_backend: str = "python", clock=None, rng: Optional[random.Random] = None,
+                 gains: Optional[ControlGains] = None):
         self.legs = legs
         self.logger = logger
         self.update_ui = update_callback
@@ -22,20 +39,42 @@ class ControlSystem:
         self.sensor = sensor_system
         self.driver = driver
         self.simulate_feedback = simulate_feedback
+        # 时间源与随机源：默认系统时钟/全局 random；无头仿真传入 VirtualClock 与带种子的 Random 以保证可复现
+        self.clock = clock or SYSTEM_CLOCK
+        self._rng = rng if rng is not None else random
+        # 成对X抖动使用独立随机源（从 rng 派生，不与传感器噪声等共用），记录时写入其状态，回放据此逐位复现 dx
+        self._jitter_rng = random.Random(self._rng.getrandbits(64))
+        self.gains = gains or ControlGains()
+        self.recorder = None
+        self.history = None  # 可选 TelemetryHistory：每次下发追加一条指令记录
+        self._initial_legs = leg_arrays(legs)[:4]  # (ids, x, y, z)：记录配置时写入，回放据此重建初始状态
 
         self.period_s = 0.1  # 默认100ms
         self._loop_thread = None
         self._loop_stop = threading.Event()
         self._last_ts = None
-
-        self.upper_leg_indices = [0,2,4,6,8,10]
-        self.lower_leg_indices = [1,3,5,7,9,11]
-        self._pair_initial_x_center = [(legs[i].x + legs[i+1].x)/2.0 for i in range(0,12,2)]
-        self._pair_initial_y_diff = [legs[i+1].y - legs[i].y for i in range(0,12,2)]
-        self._upper_band_avg_y0 = sum(legs[i].y for i in self.upper_leg_indices)/6.0
+        self._completed = False
+        self._scheduler = DeadlineScheduler(self.period_s, policy=overrun_policy, clock=self.clock.monotonic)
+        self._seen_overruns = 0                         # _after_tick 已告警过的调度器超时计数
+
+        # 腿对按 (0,1),(2,3),... 排列：偶数下标为上排，奇数下标为下排
+        n_pairs = len(legs) // 2
+        self.upper_leg_indices = [2*k for k in range(n_pairs)]
+        self.lower_leg_indices = [2*k+1 for k in range(n_pairs)]
+        self._pair_initial_x_center = [(legs[i].x + legs[i+1].x)/2.0 for i in self.upper_leg_indices]
+        self._pair_initial_y_diff = [legs[i+1].y - legs[i].y for i in self.upper_leg_indices]
+        self._upper_band_avg_y0 = sum(legs[i].y for i in self.upper_leg_indices)/max(1, n_pairs)
 
         self.center_indices = list(self.estimator.center_idxs)  # 通常 [4,5,6,7]
 
+        # 规划后端："python"（逐腿循环）或 "numpy"（VectorPlanner 向量化）
+        self.planner_backend = planner_backend
+        self._vector_planner = None
+        if planner_backend == "numpy":
+            self._vector_planner = self._build_vector_planner()
+        elif planner_backend != "python":
+            raise ValueError(f"Unknown planner backend: {planner_backend}")
+
         self._emergency = False
         
         # 控制参数（可通过GUI动态更新）
@@ -68,18 +107,31 @@ class ControlSystem:
         self._rate_mm_s = rate_mm_s
         self._max_single_step = max_single_step
         self.period_s = period_ms / 1000.0  # 同时更新内部周期
+        self._scheduler.period_s = self.period_s
         
         # 重置稳定计数（参数变化时重新开始检测）
         self._stable_count = 0
+        if self.recorder is not None:
+            self._record_config()
         self.logger.info(f"控制参数更新：周期{period_ms}ms，速率{rate_mm_s}mm/s，最大步长{max_single_step:.2f}mm")
 
     # ===== 外部接口 =====
-    def start_loop(self, period_ms: int = 100):
+    def begin_run(self):
+        """复位运行状态（急停/稳定计数/完成标志/周期计时）；start_loop 与无头仿真逐 tick 驱动前调用"""
         self._emergency = False                         # 关键：允许从急停/停止恢复
         self._stable_count = 0                          # 重置稳定计数
-        self.period_s = max(0.03, period_ms/1000.0)
+        self._completed = False
         self._loop_stop.clear()
-        self._last_ts = time.time()
+        self._last_ts = self.clock.monotonic()
+
+    def is_completed(self) -> bool:
+        """本次运行是否已满足完成条件（下降到位且调平稳定）"""
+        return self._completed
+
+    def start_loop(self, period_ms: int = 100):
+        self.period_s = max(0.03, period_ms/1000.0)
+        self._scheduler.period_s = self.period_s
+        self.begin_run()
         if self._loop_thread and self._loop_thread.is_alive():
             self.logger.warn("循环已在运行中"); return
         self._loop_thread = threading.Thread(target=self._loop, daemon=True, name="ctrl_loop")
@@ -93,6 +145,48 @@ class ControlSystem:
         self._loop_thread = None                        # 关键：清理句柄，便于再次启动
         self.logger.info("控制循环已停止")
 
+    def set_recorder(self, recorder):
+        """挂接 BinaryRecorder：立即写入一条配置记录，之后每个 tick 记录时间与下发指令"""
+        self.recorder = recorder
+        if recorder is not None:
+            self._record_config(with_jitter_state=True)
+
+    def _record_config(self, with_jitter_state: bool = False):
+        ids, xs, ys, zs = self._initial_legs
+        cfg = {
+            "period_ms": self._period_ms, "rate_mm_s": self._rate_mm_s,
+            "max_single_step": self._max_single_step,
+            "planner_backend": self.planner_backend, "simulate_feedback": self.simulate_feedback,
+            "gains": asdict(self.gains),
+            "initial_legs": {"ids": list(ids), "x": list(xs), "y": list(ys), "z": list(zs)},
+            "initial_geometric_center": list(self._initial_geometric_center),
+        }
+        if with_jitter_state:
+            cfg["jitter_state"] = self.jitter_state()   # 记录开始时的抖动随机源状态
+        self.recorder.config(cfg)
+
+    def jitter_state(self) -> Dict[str, Any]:
+        """成对X抖动随机源的当前状态（JSON 可序列化）"""
+        if self._vector_planner is not None:
+            return {"backend": "numpy", "state": self._vector_planner.rng_state()}
+        version, internal, gauss = self._jitter_rng.getstate()
+        return {"backend": "python", "state": [version, list(internal), gauss]}
+
+    def set_jitter_state(self, state: Dict[str, Any]) -> bool:
+        """恢复 jitter_state() 的结果；规划后端与记录时不同则无法复现，返回 False"""
+        if state.get("backend") != self.planner_backend:
+            return False
+        if self._vector_planner is not None:
+            self._vector_planner.set_rng_state(state["state"])
+        else:
+            version, internal, gauss = state["state"]
+            self._jitter_rng.setstate((version, tuple(internal), gauss))
+        return True
+
+    def get_loop_stats(self) -> LoopStats:
+        """控制循环调度统计（实际频率/抖动/超时次数），供 GUI 与日志读取"""
+        return self._scheduler.stats()
+
     def emergency_stop(self):
         self._emergency = True
         try:
@@ -109,23 +203,50 @@ class ControlSystem:
     # ===== 主循环 =====
     def _loop(self):
         self.logger.debug("ControlSystem._loop: thread started")
-        while not self._loop_stop.is_set():
-            try:
-                self.tick_once()
-            except Exception as e:
-                self.logger.exception(e, "tick 异常")
-            time.sleep(self.period_s)
+        self._seen_overruns = 0                         # 调度器每次 run 从0计数
+        self._scheduler.run(self._scheduled_tick, self._loop_stop, after_tick=self._after_tick)
+        st = self._scheduler.stats()
+        self.logger.info(f"控制循环统计：tick={st.ticks}，实际频率{st.achieved_hz:.2f}Hz，"
+                         f"平均抖动{st.mean_jitter_ms:.1f}ms，最大抖动{st.max_jitter_ms:.1f}ms，超时{st.overruns}次")
+        if st.callback_errors:
+            self.logger.warn(f"控制循环统计回调异常 {st.callback_errors} 次")
         self.logger.debug("ControlSystem._loop: thread stopped")
 
-    def tick_once(self):
+    def _scheduled_tick(self):
+        try:
+            self.tick_once()
+        except Exception as e:
+            self.logger.exception(e, "tick 异常")
+
+    def _after_tick(self, st: LoopStats):
+        """调度器记录完本次 tick 后回调：st 为刚结束的 tick 的统计"""
+        # 与调度器同一判据：tick 结束时已过下一截止时间（调度器累计 overruns）
+        if st.overruns > self._seen_overruns:
+            self._seen_overruns = st.overruns
+            self.logger.throttled_log("loop_overrun",
+                                      lambda: f"控制周期超时：tick结束时已过下一截止时间（耗时{st.last_exec_ms:.1f}ms，"
+                                              f"开始延迟{st.last_jitter_ms:.1f}ms，周期{st.period_ms:.0f}ms，"
+                                              f"策略={self._scheduler.policy}，累计超时{st.overruns}次）",
+                                      min_interval_s=5.0, level="WARN")
+        # 消息用 callable：仅在级别开启且未被节流时才格式化
+        self.logger.throttled_log("loop_stats",
+                                  lambda: f"控制循环：实际频率{st.achieved_hz:.2f}Hz（目标{1000.0/max(1e-3, st.period_ms):.2f}Hz），"
+                                          f"抖动 均值{st.mean_jitter_ms:.1f}ms/最大{st.max_jitter_ms:.1f}ms，超时{st.overruns}次",
+                                  min_interval_s=10.0, level="DEBUG")
+
+    def tick_once(self, dt: Optional[float] = None):
+        """执行一个控制周期；dt 为 None 时按时钟计算（回放时传入记录的 dt）"""
         self.logger.debug("tick_once: BEGIN")
         if self._emergency:
             self.logger.warn("tick_once: emergency, skip")
             return
 
-        now = time.time()
-        dt = self.period_s if self._last_ts is None else max(1e-3, now-self._last_ts)
+        now = self.clock.monotonic()
+        if dt is None:
+            dt = self.period_s if self._last_ts is None else max(1e-3, now-self._last_ts)
         self._last_ts = now
+        if self.recorder is not None:
+            self.recorder.tick(now, dt)
 
         # (1) 传感器融合
         if self.sensor:
@@ -134,7 +255,7 @@ class ControlSystem:
 
         # (1) 状态估计
         state = self.estimator.estimate(self.legs, self.sensor) 
-        self.logger.debug(f"几何中心: X={state.center_x:.2f}, Y={state.center_y:.2f}, Z={state.center_z:.2f}")
+        self.logger.debug("几何中心: X=%.2f, Y=%.2f, Z=%.2f", state.center_x, state.center_y, state.center_z)
 
         # (1.5) 检查任务完成条件
         if self._check_completion(state):
@@ -145,7 +266,7 @@ class ControlSystem:
         # (2) 计划中心下降量（使用GUI传递的参数）
         planned_center_delta = min(self._rate_mm_s * dt, self._max_single_step)
         self._target_center_z = max(0.0, state.center_z - planned_center_delta)
-        self.logger.debug(f"tick_once: target_center_z={self._target_center_z:.2f} (Δ={planned_center_delta:.2f})")
+        self.logger.debug("tick_once: target_center_z=%.2f (Δ=%.2f)", self._target_center_z, planned_center_delta)
 
         # (3) 规划 Δz（含中心约束 + 只加不减）
         dz_plan = self._plan_dz_per_leg(state, planned_center_delta)
@@ -164,11 +285,14 @@ class ControlSystem:
 
     # ===== Δz：中心约束 + 调平只“多降不回拉” =====
     def _plan_dz_per_leg(self, state, planned_center_delta: float) -> List[float]:
+        if self._vector_planner is not None:
+            return self._vector_planner.plan_dz(state.corner_dz, planned_center_delta, self._max_single_step).tolist()
+        g = self.gains
         n = len(self.legs)
         dz = [0.0]*n
 
         # 1) 基础：全腿同降 base，使用GUI传递的单次最大步长
-        base = self._clip(planned_center_delta, 0.0, min(MAX_STEP_Z_MM, self._max_single_step))
+        base = self._clip(planned_center_delta, 0.0, min(g.max_step_z, self._max_single_step))
         for i in range(n):
             dz[i] = base
 
@@ -180,7 +304,7 @@ class ControlSystem:
             idx = id2idx.get(lid, None)
             if idx is None: 
                 continue
-            add = self._clip(dz_rel * LEVELING_GAIN, 0.0, MAX_STEP_Z_MM - dz[idx])
+            add = self._clip(dz_rel * g.leveling_gain, 0.0, g.max_step_z - dz[idx])
             dz[idx] += add
 
         # 3) 中心约束：保证中心腿平均 Δz ≈ planned_center_delta（只做"加法校正"）
@@ -188,9 +312,9 @@ class ControlSystem:
         current_avg = sum(dz[i] for i in cidx) / len(cidx)
         need = planned_center_delta - current_avg
         if need > 0:
-            per = self._clip(need, 0.0, MAX_STEP_Z_MM)  # 均分校正，这里简单处理：每条加同额
+            per = self._clip(need, 0.0, g.max_step_z)  # 均分校正，这里简单处理：每条加同额
             for i in cidx:
-                room = MAX_STEP_Z_MM - dz[i]
+                room = g.max_step_z - dz[i]
                 dz[i] += min(per, room)
 
         # 4) 统一保证非负
@@ -199,6 +323,10 @@ class ControlSystem:
 
     # ===== Δx/Δy（与之前一致，略清理） =====
     def _plan_dxy_per_leg(self, state) -> Tuple[List[float], List[float]]:
+        if self._vector_planner is not None:
+            return self._plan_dxy_vector(state)
+        g = self.gains
+        mxy = g.max_step_xy
         n = len(self.legs)
         dx = [0.0]*n; dy = [0.0]*n
 
@@ -211,14 +339,15 @@ class ControlSystem:
         error_x = current_cx - target_cx
         error_y = current_cy - target_cy
         
-        shift_x = self._clip(-error_x * CENTER_GAIN_XY, -MAX_STEP_XY_MM, MAX_STEP_XY_MM)
-        shift_y = self._clip(-error_y * CENTER_GAIN_XY, -MAX_STEP_XY_MM, MAX_STEP_XY_MM)
+        shift_x = self._clip(-error_x * g.center_gain_xy, -mxy, mxy)
+        shift_y = self._clip(-error_y * g.center_gain_xy, -mxy, mxy)
         
-        self.logger.debug(f"几何中心校正: 当前({current_cx:.1f},{current_cy:.1f}) → 目标({target_cx:.1f},{target_cy:.1f}), 校正({shift_x:.2f},{shift_y:.2f})")
+        self.logger.debug("几何中心校正: 当前(%.1f,%.1f) → 目标(%.1f,%.1f), 校正(%.2f,%.2f)",
+                          current_cx, current_cy, target_cx, target_cy, shift_x, shift_y)
 
         # 上排腿子Y向一致性维护（保持不变）
         upper_avg_y = sum(self.legs[i].y for i in self.upper_leg_indices)/len(self.upper_leg_indices)
-        band_shift = self._clip((self._upper_band_avg_y0 - upper_avg_y)*0.05, -MAX_STEP_XY_MM, MAX_STEP_XY_MM)
+        band_shift = self._clip((self._upper_band_avg_y0 - upper_avg_y)*0.05, -mxy, mxy)
 
         # 应用全局校正
         for i in range(n):
@@ -228,32 +357,65 @@ class ControlSystem:
             dy[idx] += band_shift
 
         # 成对约束（保持不变）
-        for k in range(6):
+        for k in range(len(self.upper_leg_indices)):
             up = self.upper_leg_indices[k]; lo = self.lower_leg_indices[k]
             
             # Y差保持：只调整下排，避免破坏上排一致性
             desired_lo_y = (self.legs[up].y + dy[up]) - self._pair_initial_y_diff[k]
-            dy[lo] += self._clip(desired_lo_y - self.legs[lo].y, -MAX_STEP_XY_MM, MAX_STEP_XY_MM)
+            dy[lo] += self._clip(desired_lo_y - self.legs[lo].y, -mxy, mxy)
 
             # X对齐：锁定对中线，带极小抖动
             x_center = self._pair_initial_x_center[k]
-            jitter = random.uniform(-PAIR_X_JITTER_MM, PAIR_X_JITTER_MM)*PAIR_CONSTRAINT_WEIGHT
+            jitter = self._jitter_rng.uniform(-g.pair_jitter, g.pair_jitter)*g.pair_weight
             desired_pair_x = x_center + jitter
             
-            dx[up] += self._clip(desired_pair_x - self.legs[up].x, -MAX_STEP_XY_MM, MAX_STEP_XY_MM)
-            dx[lo] += self._clip(desired_pair_x - self.legs[lo].x, -MAX_STEP_XY_MM, MAX_STEP_XY_MM)
+            dx[up] += self._clip(desired_pair_x - self.legs[up].x, -mxy, mxy)
+            dx[lo] += self._clip(desired_pair_x - self.legs[lo].x, -mxy, mxy)
 
         return dx, dy
 
+    def _plan_dxy_vector(self, state) -> Tuple[List[float], List[float]]:
+        import numpy as np
+        st = store_of(self.legs)
+        if st is not None:
+            x, y = st.x, st.y
+        else:
+            n = len(self.legs)
+            x = np.fromiter((l.x for l in self.legs), dtype=float, count=n)
+            y = np.fromiter((l.y for l in self.legs), dtype=float, count=n)
+        dx, dy = self._vector_planner.plan_dxy(x, y, (state.center_x, state.center_y), self._initial_geometric_center)
+        return dx.tolist(), dy.tolist()
+
+    def _build_vector_planner(self):
+        import numpy as np
+        from core.planner_np import VectorPlanner
+        g = self.gains
+        return VectorPlanner(
+            leg_ids=[l.id for l in self.legs],
+            upper_idx=self.upper_leg_indices, lower_idx=self.lower_leg_indices,
+            center_idx=self.center_indices,
+            pair_initial_x_center=self._pair_initial_x_center,
+            pair_initial_y_diff=self._pair_initial_y_diff,
+            upper_band_avg_y0=self._upper_band_avg_y0,
+            max_step_z=g.max_step_z, max_step_xy=g.max_step_xy,
+            leveling_gain=g.leveling_gain, center_gain_xy=g.center_gain_xy,
+            pair_weight=g.pair_weight, pair_jitter=g.pair_jitter,
+            rng=np.random.default_rng(self._jitter_rng.getrandbits(64)),
+        )
+
     # ===== 下发 =====
     def _apply_cmds(self, cmds: List[Dict]):
-        self.logger.debug(f"_apply_cmds: count={len(cmds)} driver={type(self.driver).__name__}")
+        self.logger.debug("_apply_cmds: count=%d driver=%s", len(cmds), type(self.driver).__name__)
+        if self.recorder is not None:
+            self.recorder.commands(cmds)
+        if self.history is not None:
+            self.history.append_commands(self.clock.monotonic(), cmds)
 
         used = False
         if hasattr(self.driver, "apply_batch"):
             try:
                 ok = self.driver.apply_batch(cmds)
-                self.logger.debug(f"_apply_cmds: driver.apply_batch -> {ok}")
+                self.logger.debug("_apply_cmds: driver.apply_batch -> %s", ok)
                 used = True
             except Exception as e:
                 self.logger.exception(e, "驱动 apply_batch 失败")
@@ -266,12 +428,19 @@ class ControlSystem:
                     self.logger.exception(e, f"driver.move_leg_delta 失败 leg={c['id']}")
 
         # 仅 mock 演示时“本地回写”
-        if self.simulate_feedback:
+        st = store_of(self.legs) if self.simulate_feedback else None
+        if st is not None:
+            import numpy as np
+            idx = np.array([c["id"]-1 for c in cmds])
+            st.apply_delta(idx, [float(c["dx"]) for c in cmds], [float(c["dy"]) for c in cmds],
+                           [-float(c["dz"]) for c in cmds], z_floor=0.0)
+            st.force[idx] = [self._rng.uniform(FORCE_THRESHOLD[0]+5, FORCE_THRESHOLD[1]-5) for _ in cmds]
+        elif self.simulate_feedback:
             for c in cmds:
                 leg = self.legs[c["id"]-1]
                 leg.z = max(0.0, leg.z - float(c["dz"]))
                 leg.x += float(c["dx"]); leg.y += float(c["dy"])
-                leg.force = random.uniform(FORCE_THRESHOLD[0]+5, FORCE_THRESHOLD[1]-5)
+                leg.force = self._rng.uniform(FORCE_THRESHOLD[0]+5, FORCE_THRESHOLD[1]-5)
 
     # ===== 工具 =====
     @staticmethod
@@ -290,8 +459,8 @@ class ControlSystem:
         # 条件3：稳定性检查（连续几个周期都满足上述条件）
         if z_near_target and corners_leveled:
             self._stable_count += 1
-            self.logger.debug(f"完成条件满足：Z差={abs(state.center_z - self._target_depth):.1f}mm, "
-                            f"最大角差={max_corner_diff:.1f}mm, 稳定计数={self._stable_count}")
+            self.logger.debug("完成条件满足：Z差=%.1fmm, 最大角差=%.1fmm, 稳定计数=%d",
+                              abs(state.center_z - self._target_depth), max_corner_diff, self._stable_count)
         else:
             self._stable_count = 0
         
@@ -304,6 +473,7 @@ class ControlSystem:
             self.update_ui("任务完成：下降与调平完成", "已完成")
         
         # 停止循环（但不触发急停）
+        self._completed = True
         self._loop_stop.set()
         
         # 可选：发送最终停止命令确保所有腿子停止
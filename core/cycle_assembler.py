@@ -0,0 +1,128 @@
+# core/cycle_assembler.py
+# 遥测周期组装（双缓冲）：解析线程只写后台缓冲，12腿全部字段收齐后生成不可变 TelemetryCycle，
+# 以单次引用赋值替换前台周期；控制线程只读取已提交的完整周期，不会融合到两个周期混杂的数据
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+FIELD_F, FIELD_Z, FIELD_XY = 1, 2, 4
+FIELD_ALL = FIELD_F | FIELD_Z | FIELD_XY
+FIELD_NAMES = {FIELD_F: "F", FIELD_Z: "Z", FIELD_XY: "XY"}
+
+@dataclass(frozen=True)
+class TelemetryCycle:
+    """一个完整遥测周期（提交后不再修改）"""
+    seq: int                                 # 提交序号（从 1 递增）
+    att: Tuple[float, float, float]
+    forces: Tuple[float, ...]
+    z: Tuple[float, ...]
+    xy: Tuple[Tuple[float, float], ...]
+    device_seq: Optional[int] = None         # 二进制遥测帧自带的设备序号
+
+    def as_raw(self) -> Dict:
+        """转为 SensorSystem._snapshot_raw 格式"""
+        return {"att": self.att, "forces": list(self.forces), "z": list(self.z), "xy": list(self.xy)}
+
+def _per_field(n: int) -> Dict[str, List[int]]:
+    return {name: [0]*n for name in FIELD_NAMES.values()}
+
+@dataclass
+class CycleStats:
+    committed: int = 0      # 已提交的完整周期
+    partial: int = 0        # 未收齐即被下一周期开头（IMU 行/二进制帧）打断而丢弃的周期
+    dropped: int = 0        # 已提交但未被 consume() 取走就被新周期覆盖的周期
+    lost: int = 0           # 设备帧序号缺口（仅二进制遥测）
+    missing: Dict[str, List[int]] = field(default_factory=dict)  # 丢弃周期中各腿缺失字段次数 {"F"/"Z"/"XY": [每腿]}
+    late: Dict[str, List[int]] = field(default_factory=dict)     # 同一周期内字段重复到达（迟到/重发，以新值覆盖）
+
+class CycleAssembler:
+    """
+    文本协议：IMU 行为周期开头（begin），其后 FOR/Z/XY 逐腿写入（put）；每条腿 F/Z/XY 收齐计为一腿，
+    n 腿全部收齐立即提交。未收齐时又遇到周期开头，则丢弃后台缓冲并记为 partial。
+    二进制遥测：一帧即一个完整周期（commit_frame）。
+    写入方法只应在解析线程调用；latest()/consume() 可在任意线程调用。
+    """
+    def __init__(self, n: int = 12, on_commit: Optional[Callable[[TelemetryCycle], None]] = None):
+        self.n = n
+        self.on_commit = on_commit
+        self.stats = CycleStats(missing=_per_field(n), late=_per_field(n))
+        # 后台缓冲
+        self._att: Tuple[float, float, float] = (0.0, 0.0, 0.0)
+        self._bufs: Dict[int, list] = {FIELD_F: [0.0]*n, FIELD_Z: [0.0]*n, FIELD_XY: [(0.0, 0.0)]*n}
+        self._mask: List[int] = [0]*n
+        self._complete = 0
+        # 前台
+        self._seq = 0
+        self._latest: Optional[TelemetryCycle] = None
+        self._consumed = 0
+        self._device_seq: Optional[int] = None
+
+    # —— 解析线程 ——
+    def begin(self, att: Tuple[float, float, float]):
+        """周期开头（IMU 行）：后台缓冲若已有未收齐的数据，记为 partial 后清空"""
+        self._abandon()
+        self._att = att
+
+    def put(self, bit: int, idx: int, value):
+        self._bufs[bit][idx] = value
+        m = self._mask[idx]
+        if m & bit:
+            self.stats.late[FIELD_NAMES[bit]][idx] += 1
+            return
+        m |= bit
+        self._mask[idx] = m
+        if m == FIELD_ALL:
+            self._complete += 1
+            if self._complete == self.n:
+                self._commit(None)
+
+    def commit_frame(self, device_seq: int, att, forces, z, xy):
+        """二进制遥测整帧提交；按设备序号统计丢帧"""
+        self._abandon()
+        if self._device_seq is not None:
+            gap = (device_seq - self._device_seq - 1) & 0xFFFFFFFF
+            if 0 < gap < 0x80000000:
+                self.stats.lost += gap
+        self._device_seq = device_seq
+        self._att = att
+        self._bufs = {FIELD_F: list(forces), FIELD_Z: list(z), FIELD_XY: list(xy)}
+        self._commit(device_seq)
+
+    def _abandon(self):
+        if not any(self._mask):
+            return
+        self.stats.partial += 1
+        for bit, name in FIELD_NAMES.items():
+            counts = self.stats.missing[name]
+            for i, m in enumerate(self._mask):
+                if not m & bit:
+                    counts[i] += 1
+        self._reset()
+
+    def _reset(self):
+        self._mask = [0]*self.n
+        self._complete = 0
+
+    def _commit(self, device_seq: Optional[int]):
+        self._seq += 1
+        b = self._bufs
+        cycle = TelemetryCycle(seq=self._seq, att=self._att, forces=tuple(b[FIELD_F]), z=tuple(b[FIELD_Z]),
+                               xy=tuple(b[FIELD_XY]), device_seq=device_seq)
+        prev = self._latest
+        if prev is not None and prev.seq > self._consumed:
+            self.stats.dropped += 1
+        self._latest = cycle
+        self.stats.committed += 1
+        self._reset()
+        if self.on_commit is not None:
+            self.on_commit(cycle)
+
+    # —— 读取方 ——
+    def latest(self) -> Optional[TelemetryCycle]:
+        return self._latest
+
+    def consume(self) -> Optional[TelemetryCycle]:
+        """取最近提交的周期并标记为已消费（用于 dropped 统计）"""
+        cycle = self._latest
+        if cycle is not None:
+            self._consumed = cycle.seq
+        return cycle
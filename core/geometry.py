@@ -24,6 +24,11 @@ LEG_TAN_VALUES = {
 # 对称腿对配置（用于计算几何中心）
 CENTER_PAIRS = [(1, 2), (3, 4), (5, 6), (7, 8), (9, 10), (11, 12)]
 
+# 各腿对的置信权重（两腿都健康时）：特殊配置只让腿对(1,2)参与几何中心，其余为0
+PAIR_WEIGHTS = {
+    (1, 2): 1.0, (3, 4): 0.0, (5, 6): 0.0, (7, 8): 0.0, (9, 10): 0.0, (11, 12): 0.0
+}
+
 # 中心高程计算用的腿子编号
 Z_CENTER_LEGS = [5, 6, 7, 8]
 
@@ -43,15 +48,10 @@ class GeometryResult:
     # [( (i,j), Xc_ij, weight_ij ), ...] 便于日志/诊断
 
 def _pair_weight(i: LegId, j: LegId, snap: SensorSnapshot) -> float:
-    """对某一对腿的置信权重：特殊配置让腿对(1,2)权重最高，其他为0"""
+    """对某一对腿的置信权重：任一腿不健康为0，否则取 PAIR_WEIGHTS（未列出的腿对为0）"""
     if not (snap.healthy.get(i, False) and snap.healthy.get(j, False)):
         return 0.0
-    
-    # 特殊权重配置：只有腿对(1,2)有权重，其他腿对权重为0
-    if (i == 1 and j == 2) or (i == 2 and j == 1):
-        return 1.0  # 腿对(1,2)的权重最高
-    else:
-        return 0.0  # 其他腿对权重为0
+    return PAIR_WEIGHTS.get((min(i, j), max(i, j)), 0.0)
 
 def compute_geometric_center_Xc(snap: SensorSnapshot) -> Tuple[float, List[Tuple[Tuple[LegId,LegId], float, float]]]:
     """
@@ -0,0 +1,105 @@
+# core/geometry_np.py
+# geometry.py 的数组版本：预计算 tan/左右符号/腿对下标数组；
+# 输入既可以是单周期 (legs,) 向量，也可以是 (T × legs) 矩阵，一次算出全部 T 个周期的 Xc/Zc/e_y
+from dataclasses import dataclass
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+from core.geometry import (CENTER_PAIRS, LEG_TAN_VALUES, PAIR_WEIGHTS, SIDE_SIGN, Z_CENTER_LEGS,
+                           SensorSnapshot)
+
+N_LEGS = 12
+LEG_IDS = np.arange(1, N_LEGS + 1)
+
+# 下标均为 0 基（腿子 k 对应下标 k-1）
+TAN = np.array([LEG_TAN_VALUES.get(k, np.nan) for k in LEG_IDS], dtype=float)
+SIGN = np.array([SIDE_SIGN.get(k, 0) for k in LEG_IDS], dtype=float)
+PAIR_I = np.array([i - 1 for i, _ in CENTER_PAIRS], dtype=np.int64)
+PAIR_J = np.array([j - 1 for _, j in CENTER_PAIRS], dtype=np.int64)
+PAIR_TAN = (TAN[PAIR_I] + TAN[PAIR_J]) / 2.0
+Z_CENTER_IDX = np.array([k - 1 for k in Z_CENTER_LEGS], dtype=np.int64)
+
+# 与 geometry._pair_weight 同一张权重表（全部健康时的取值），健康掩码在计算时再乘上
+PAIR_WEIGHT = np.array([PAIR_WEIGHTS.get((i, j), 0.0) for i, j in CENTER_PAIRS], dtype=float)
+PAIR_VALID = np.isfinite(PAIR_TAN) & (np.abs(PAIR_TAN) >= 1e-9)
+
+@dataclass
+class GeometryArrays:
+    Xc: np.ndarray          # (...)        几何中心 X
+    Zc: np.ndarray          # (...)        中心高程
+    Yc: np.ndarray          # (...)        几何中心 Y（腿对(1,2)中点，与 CenterEstimator 一致）
+    y_theo: np.ndarray      # (..., legs)  每腿理论 Y
+    e_y: np.ndarray         # (..., legs)  每腿平面偏差，缺测为 NaN
+    Xc_pairs: np.ndarray    # (..., pairs) 各腿对 Xc_ij
+    pair_weights: np.ndarray  # (..., pairs) 各腿对实际权重（含健康掩码）
+
+def compute_geometric_center_Xc_np(y: np.ndarray, healthy: Optional[np.ndarray] = None
+                                   ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """对应 compute_geometric_center_Xc：返回 (Xc, Xc_pairs, weights)"""
+    y = np.asarray(y, dtype=float)
+    dy = y[..., PAIR_J] - y[..., PAIR_I]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        xc_pairs = np.where(PAIR_VALID, (dy / 2.0) / PAIR_TAN, np.nan)
+    ok = PAIR_VALID & np.isfinite(dy)
+    w = np.where(ok, PAIR_WEIGHT, 0.0)
+    if healthy is not None:
+        h = np.asarray(healthy, dtype=bool)
+        w = w * (h[..., PAIR_I] & h[..., PAIR_J])
+    num = np.sum(np.where(w > 0, xc_pairs, 0.0) * w, axis=-1)
+    den = np.sum(w, axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        xc = np.where(den > 0, num / np.where(den > 0, den, 1.0), 0.0)
+    return xc, xc_pairs, w
+
+def compute_center_Zc_np(z: np.ndarray) -> np.ndarray:
+    """对应 compute_center_Zc：中心腿（5~8号）可用值的平均，全缺时为 0"""
+    zc = np.asarray(z, dtype=float)[..., Z_CENTER_IDX]
+    cnt = np.sum(np.isfinite(zc), axis=-1)
+    total = np.sum(np.where(np.isfinite(zc), zc, 0.0), axis=-1)
+    return np.where(cnt > 0, total / np.maximum(cnt, 1), 0.0)
+
+def compute_center_Yc_np(y: np.ndarray) -> np.ndarray:
+    """几何中心 Y：腿对(1,2)中点；任一缺测时回退到所有完整腿对中点的平均"""
+    y = np.asarray(y, dtype=float)
+    mids = (y[..., PAIR_I] + y[..., PAIR_J]) / 2.0
+    ok = np.isfinite(mids)
+    fallback = np.sum(np.where(ok, mids, 0.0), axis=-1) / np.maximum(np.sum(ok, axis=-1), 1)
+    return np.where(ok[..., 0], mids[..., 0], fallback)
+
+def compute_theoretical_Y_np(Xc: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """对应 compute_theoretical_Y：y_i_theo = s_i * tan_i * (x_i - Xc)"""
+    x = np.asarray(x, dtype=float)
+    return SIGN * TAN * (x - np.asarray(Xc, dtype=float)[..., None])
+
+def compute_center_and_theory_np(x: np.ndarray, y: np.ndarray, z: np.ndarray,
+                                 healthy: Optional[np.ndarray] = None) -> GeometryArrays:
+    """
+    x/y/z 形如 (legs,) 或 (T, legs)，缺测用 NaN 表示；healthy 同形状布尔数组（可选）。
+    T 个周期一次算完，结果各字段带同样的前导维度。
+    """
+    xc, xc_pairs, w = compute_geometric_center_Xc_np(y, healthy)
+    y_theo = compute_theoretical_Y_np(xc, x)
+    return GeometryArrays(Xc=xc, Zc=compute_center_Zc_np(z), Yc=compute_center_Yc_np(y),
+                          y_theo=y_theo, e_y=np.asarray(y, dtype=float) - y_theo,
+                          Xc_pairs=xc_pairs, pair_weights=w)
+
+# 批量接口别名：输入 (T × legs) 矩阵
+compute_center_and_theory_batch = compute_center_and_theory_np
+
+def snapshot_to_arrays(snap: SensorSnapshot) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """SensorSnapshot（按 leg_id 的 dict）-> (x, y, z, healthy) 四个长度 12 的数组，缺测为 NaN/False"""
+    def _vec(d):
+        return np.array([d.get(int(k), np.nan) for k in LEG_IDS], dtype=float)
+    healthy = np.array([bool(snap.healthy.get(int(k), False)) for k in LEG_IDS])
+    return _vec(snap.x_meas), _vec(snap.y_meas), _vec(snap.z_meas), healthy
+
+def snapshots_to_matrix(snaps: Iterable[SensorSnapshot]
+                        ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """多个快照 -> (x, y, z, healthy) 四个 (T × 12) 矩阵，供批量计算/离线回放"""
+    cols = [snapshot_to_arrays(s) for s in snaps]
+    if not cols:
+        empty = np.empty((0, N_LEGS))
+        return empty, empty.copy(), empty.copy(), np.empty((0, N_LEGS), dtype=bool)
+    x, y, z, h = zip(*cols)
+    return np.vstack(x), np.vstack(y), np.vstack(z), np.vstack(h)
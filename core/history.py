@@ -0,0 +1,130 @@
+# core/history.py
+# 进程内遥测历史：固定容量环形缓冲（预分配 NumPy 数组），O(1) 追加，运行多久内存都不增长
+#
+# 存储采用“镜像双倍”布局：每个字段分配 2×capacity 行，第 i 条同时写入 i 与 i+capacity，
+# 因此任意最近 n 条（n ≤ capacity）在数组中总是连续的一段，window() 直接返回切片视图（零拷贝），
+# 图表/完成判定/导出无需拼接首尾两段。
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_CAPACITY = 72000   # 1 小时 @ 20Hz
+
+class RingSeries:
+    """
+    一组同步追加的定长序列。fields: {名称: (每条的形状, dtype)}，形状 () 为标量。
+    单写多读：写入方逐字段写完后才推进计数，读取方拿到的视图内数据完整；
+    但视图引用的是缓冲区本身，写入方绕回一圈后会被覆盖——需要长期保留时用 copy=True。
+    """
+    def __init__(self, capacity: int, fields: Dict[str, Tuple[Tuple[int, ...], type]]):
+        if capacity <= 0:
+            raise ValueError("capacity 必须为正数")
+        self.capacity = int(capacity)
+        self._data: Dict[str, np.ndarray] = {
+            name: np.zeros((2 * self.capacity,) + tuple(shape), dtype=dtype)
+            for name, (shape, dtype) in fields.items()
+        }
+        self._count = 0   # 累计追加条数（只增不减）
+        self._lock = threading.Lock()  # 仅用于多个写入方；读取不加锁
+
+    @property
+    def fields(self) -> List[str]:
+        return list(self._data)
+
+    @property
+    def total(self) -> int:
+        """累计追加条数（含已被覆盖的）"""
+        return self._count
+
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    def append(self, **values):
+        with self._lock:
+            i = self._count % self.capacity
+            j = i + self.capacity
+            for name, v in values.items():
+                arr = self._data[name]
+                arr[i] = v
+                arr[j] = v
+            self._count += 1
+
+    def window(self, n: Optional[int] = None, copy: bool = False) -> Dict[str, np.ndarray]:
+        """最近 n 条（默认全部保留的数据），按时间先后排列；默认返回视图"""
+        count = self._count
+        size = min(count, self.capacity)
+        n = size if n is None else max(0, min(int(n), size))
+        end = count % self.capacity + (self.capacity if count >= self.capacity else 0)
+        out = {name: arr[end - n:end] for name, arr in self._data.items()}
+        if copy:
+            out = {name: a.copy() for name, a in out.items()}
+        return out
+
+    def since(self, ts: float, field: str = "ts", copy: bool = False) -> Dict[str, np.ndarray]:
+        """时间戳 >= ts 的全部数据（ts 字段单调递增，二分查找）"""
+        win = self.window()
+        k = int(np.searchsorted(win[field], ts, side="left"))
+        out = {name: a[k:] for name, a in win.items()}
+        if copy:
+            out = {name: a.copy() for name, a in out.items()}
+        return out
+
+    def latest(self) -> Optional[Dict[str, np.ndarray]]:
+        if self._count == 0:
+            return None
+        return {name: a[-1] for name, a in self.window(1).items()}
+
+    def clear(self):
+        with self._lock:
+            self._count = 0
+
+class TelemetryHistory:
+    """
+    融合遥测与下发指令的历史：
+      samples  : ts, seq, center(3), attitude(3), x/y/z/force(各 n 腿)   —— SensorSystem 每个新样本追加一条
+      commands : ts, dz/dx/dy(各 n 腿，未下发的腿为 0)                   —— ControlSystem 每次下发追加一条
+    数值字段为 float32（mm/N 精度足够，内存减半），时间戳为 float64。
+    默认容量 1 小时 @20Hz，12 腿时两组合计约 50MB。
+    """
+    def __init__(self, ids: Sequence[int] = tuple(range(1, 13)), capacity: int = DEFAULT_CAPACITY,
+                 command_capacity: Optional[int] = None):
+        self.ids: Tuple[int, ...] = tuple(int(i) for i in ids)
+        n = len(self.ids)
+        self._index = {lid: k for k, lid in enumerate(self.ids)}
+        f32 = np.float32
+        self.samples = RingSeries(capacity, {
+            "ts": ((), np.float64), "seq": ((), np.int64),
+            "center": ((3,), f32), "attitude": ((3,), f32),
+            "x": ((n,), f32), "y": ((n,), f32), "z": ((n,), f32), "force": ((n,), f32),
+        })
+        self.commands = RingSeries(command_capacity or capacity, {
+            "ts": ((), np.float64), "dz": ((n,), f32), "dx": ((n,), f32), "dy": ((n,), f32),
+        })
+        self._cmd_row = np.zeros((3, n), dtype=f32)
+
+    def append_sample(self, sample):
+        """追加一个 FusedSample（腿子顺序与 ids 一致）"""
+        self.samples.append(ts=sample.ts, seq=sample.seq, center=sample.center, attitude=sample.attitude,
+                            x=sample.x, y=sample.y, z=sample.z, force=sample.forces)
+
+    def append_commands(self, ts: float, cmds: Iterable[Dict]):
+        """追加一次批量下发；cmds 为 [{"id","dz","dx","dy"}]"""
+        row = self._cmd_row
+        row[:] = 0.0
+        idx = self._index
+        for c in cmds:
+            k = idx.get(int(c["id"]))
+            if k is not None:
+                row[0, k], row[1, k], row[2, k] = c["dz"], c["dx"], c["dy"]
+        self.commands.append(ts=ts, dz=row[0], dx=row[1], dy=row[2])
+
+    def clear(self):
+        self.samples.clear()
+        self.commands.clear()
+
+    def export_npz(self, path: str):
+        """保存当前保留的全部历史（np.load 读取，键名如 samples_z / commands_dz）"""
+        data = {f"samples_{k}": v for k, v in self.samples.window().items()}
+        data.update({f"commands_{k}": v for k, v in self.commands.window().items()})
+        np.savez_compressed(path, ids=np.array(self.ids), **data)
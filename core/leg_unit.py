@@ -1,67 +1,170 @@
+# core/leg_unit.py
+# 腿子状态：LegStateStore 以连续数组保存全部腿子的 x/y/z/force/status，
+# LegUnit 为其上的单腿视图（__slots__），保持原有 leg.x / leg.z = ... 的用法不变
 import random
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 固定的道岔腿子坐标配置
+FIXED_POSITIONS = [
+    (0.0, 0.0),         # 腿子1
+    (0.0, 171.7),       # 腿子2
+    (489.9, 0.0),       # 腿子3
+    (490.0, 182.3),     # 腿子4
+    (969.9, 0.0),       # 腿子5
+    (970.0, 197.1),     # 腿子6
+    (1449.9, 0.0),      # 腿子7
+    (1449.7, 223.1),    # 腿子8
+    (1929.9, 0.0),      # 腿子9
+    (1930.0, 262.6),    # 腿子10
+    (2409.9, 0.0),      # 腿子11
+    (2410.0, 311.6)     # 腿子12
+]
+
+# 状态码表：数组中只存整数码，新状态名首次出现时追加
+STATUS_NAMES = ["未初始化", "初始化", "MOVING", "STOPPED"]
+
+class LegStateStore:
+    """
+    结构化数组（struct-of-arrays）形式的腿子状态：
+      - ids/x/y/z/force 为 float64 连续数组，status 为 int16 状态码
+      - legs 为对应的 LegUnit 视图列表（下标一一对应）
+    热路径（快照构建、融合写回、批量下发、GUI刷新）直接读写数组，
+    其余代码仍可按对象属性访问。
+    """
+    def __init__(self, n: int, ids: Optional[Sequence[int]] = None):
+        self.n = int(n)
+        self.ids = np.asarray(ids if ids is not None else range(1, self.n + 1), dtype=np.int64)
+        self.id_list: List[int] = self.ids.tolist()
+        self.x = np.zeros(self.n)
+        self.y = np.zeros(self.n)
+        self.z = np.full(self.n, 600.0)
+        self.force = np.zeros(self.n)
+        self.status = np.zeros(self.n, dtype=np.int16)
+        self._status_names = list(STATUS_NAMES)
+        self._status_codes = {name: i for i, name in enumerate(self._status_names)}
+        self.legs: List["LegUnit"] = [LegUnit(lid, store=self, index=i) for i, lid in enumerate(self.id_list)]
+
+    # 状态码
+    def status_code(self, name: str) -> int:
+        code = self._status_codes.get(name)
+        if code is None:
+            code = len(self._status_names)
+            self._status_names.append(name)
+            self._status_codes[name] = code
+        return code
+
+    def status_name(self, code: int) -> str:
+        return self._status_names[int(code)]
+
+    def set_status_all(self, name: str, idx=slice(None)):
+        self.status[idx] = self.status_code(name)
+
+    # 批量读写
+    def set_positions(self, x=None, y=None, z=None):
+        n = self.n
+        if x is not None: self.x[:] = np.asarray(x, dtype=float)[:n]
+        if y is not None: self.y[:] = np.asarray(y, dtype=float)[:n]
+        if z is not None: self.z[:] = np.asarray(z, dtype=float)[:n]
+
+    def apply_delta(self, idx, dx, dy, dz, z_floor: Optional[float] = 0.0):
+        """按下标（不含重复）批量叠加位移；z_floor 非 None 时 z 不低于该值"""
+        self.x[idx] += dx
+        self.y[idx] += dy
+        z = self.z[idx] + dz
+        self.z[idx] = z if z_floor is None else np.maximum(z_floor, z)
+
+def store_of(legs) -> Optional[LegStateStore]:
+    """legs 恰为某个 LegStateStore 的完整视图列表时返回该 store；否则 None（调用方回退逐腿访问）"""
+    if not legs:
+        return None
+    st = getattr(legs[0], "store", None)
+    if st is not None and st.legs is legs:
+        return st
+    return None
+
+def leg_arrays(legs) -> Tuple[List[int], List[float], List[float], List[float], List[float]]:
+    """返回 (ids, x, y, z, force) 五个列表；有 store 时整块读取，否则逐腿 getattr"""
+    st = store_of(legs)
+    if st is not None:
+        return st.id_list, st.x.tolist(), st.y.tolist(), st.z.tolist(), st.force.tolist()
+    ids = [getattr(l, "id", i + 1) for i, l in enumerate(legs)]
+    return (ids,
+            [getattr(l, "x", 0.0) for l in legs],
+            [getattr(l, "y", 0.0) for l in legs],
+            [getattr(l, "z", 0.0) for l in legs],
+            [getattr(l, "force", 0.0) for l in legs])
 
 class LegUnit:
-    def __init__(self, id):
+    __slots__ = ("_store", "_i", "id", "name")
+
+    def __init__(self, id, store: Optional[LegStateStore] = None, index: int = 0):
         self.id = id
         self.name = f"{str(id).zfill(2)}"
-        self.x = 0.0
-        self.y = 0.0
-        self.z = 600.0
-        self.force = 0.0
-        self.status = "未初始化"
+        if store is None:
+            # 独立构造时自带一个单腿 store，行为与旧版普通对象一致
+            store = LegStateStore(1, ids=[id])
+            store.legs = [self]
+            index = 0
+        self._store = store
+        self._i = index
+
+    @property
+    def store(self) -> LegStateStore:
+        return self._store
+
+    @property
+    def x(self) -> float: return float(self._store.x[self._i])
+    @x.setter
+    def x(self, v): self._store.x[self._i] = v
+
+    @property
+    def y(self) -> float: return float(self._store.y[self._i])
+    @y.setter
+    def y(self, v): self._store.y[self._i] = v
+
+    @property
+    def z(self) -> float: return float(self._store.z[self._i])
+    @z.setter
+    def z(self, v): self._store.z[self._i] = v
+
+    @property
+    def force(self) -> float: return float(self._store.force[self._i])
+    @force.setter
+    def force(self, v): self._store.force[self._i] = v
+
+    @property
+    def status(self) -> str: return self._store.status_name(self._store.status[self._i])
+    @status.setter
+    def status(self, name): self._store.status[self._i] = self._store.status_code(str(name))
 
     def reset(self):
         # 使用固定的道岔腿子坐标配置
         self.status = "初始化"
-        fixed_positions = [
-            (0.0, 0.0),         # 腿子1
-            (0.0, 171.7),       # 腿子2
-            (489.9, 0.0),       # 腿子3
-            (490.0, 182.3),     # 腿子4
-            (969.9, 0.0),       # 腿子5
-            (970.0, 197.1),     # 腿子6
-            (1449.9, 0.0),      # 腿子7
-            (1449.7, 223.1),    # 腿子8
-            (1929.9, 0.0),      # 腿子9
-            (1930.0, 262.6),    # 腿子10
-            (2409.9, 0.0),      # 腿子11
-            (2410.0, 311.6)     # 腿子12
-        ]
-        
         i = self.id - 1
-        if 0 <= i < len(fixed_positions):
-            self.x, self.y = fixed_positions[i]
+        if 0 <= i < len(FIXED_POSITIONS):
+            self.x, self.y = FIXED_POSITIONS[i]
         else:
             self.x, self.y = 0.0, 0.0
 
         self.z = 600 + random.uniform(-20, 20)
         self.force = 0.0
 
-def create_legs(n=12):
-    return [LegUnit(i + 1) for i in range(n)]
+    def reset_random(self):
+        self.status = "初始化"
+        self.z = 600.0 + random.uniform(-20.0, 20.0)
+        self.force = 0.0
 
-def generate_leg_positions(legs):
-    # 使用固定的道岔腿子坐标配置
-    fixed_positions = [
-        (0.0, 0.0),         # 腿子1
-        (0.0, 171.7),       # 腿子2
-        (489.9, 0.0),       # 腿子3
-        (490.0, 182.3),     # 腿子4
-        (969.9, 0.0),       # 腿子5
-        (970.0, 197.1),     # 腿子6
-        (1449.9, 0.0),      # 腿子7
-        (1449.7, 223.1),    # 腿子8
-        (1929.9, 0.0),      # 腿子9
-        (1930.0, 262.6),    # 腿子10
-        (2409.9, 0.0),      # 腿子11
-        (2410.0, 311.6)     # 腿子12
-    ]
+def create_legs(n=12) -> List[LegUnit]:
+    return LegStateStore(n).legs
 
+def generate_leg_positions(legs):
     # 直接使用固定坐标设置每个腿的位置
     for idx, leg in enumerate(legs):
-        if idx < len(fixed_positions):
-            leg.x, leg.y = fixed_positions[idx]
+        if idx < len(FIXED_POSITIONS):
+            leg.x, leg.y = FIXED_POSITIONS[idx]
         else:
             leg.x, leg.y = 0.0, 0.0
         leg.z = 600 + random.uniform(-20, 20)
-        leg.status = "初始化"
\ No newline at end of file
+        leg.status = "初始化"
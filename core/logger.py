@@ -1,25 +1,115 @@
 # core/logger.py
-import datetime, threading, time, queue, threading
-from typing import Callable, Optional, Dict
+import atexit, collections, sys, threading, time, weakref
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Optional, Dict, List
+
+from core.ring_queue import RingQueue, RingQueueStats
 
 _LEVELS = {"DEBUG": 10, "INFO": 20, "WARN": 30, "ERROR": 40}
+# 通道：main 按级别过滤；serial/telemetry/command 不受级别影响，只能整体开关
+CHANNELS = ("main", "serial", "telemetry", "command")
+
+@dataclass
+class LogRecord:
+    """交给结构化 sink 的记录（写线程中构造）"""
+    ts: float                  # time.time()
+    level: str                 # DEBUG/INFO/WARN/ERROR/SERIAL:RX/TEL/CMD
+    channel: str
+    thread: str
+    message: str
+    fields: Dict[str, Any]
+
+@dataclass
+class LogStats:
+    enqueued: int = 0          # 已入队记录数
+    dropped: int = 0           # 待写队列已满被丢弃的记录数
+    written: int = 0           # 写线程已输出的记录数
+    batches: int = 0           # 写线程批次数
+    pending_high_water: int = 0
+    enqueue_ns_total: int = 0  # 调用方线程入队耗时累计（不含被级别过滤掉的调用）
+    enqueue_ns_max: int = 0
+
+    @property
+    def enqueue_us_mean(self) -> float:
+        return self.enqueue_ns_total / max(1, self.enqueued) / 1000.0
+
+class _LogWriter:
+    """
+    进程内唯一的日志写线程：按 interval_s 轮询各 Logger 的待写队列，
+    批量格式化时间戳并写控制台/文件/GUI 队列（控制台每批只 flush 一次）。
+    惰性启动（首条日志入队时），守护线程；进程退出时 atexit 把剩余记录写完。
+    """
+    def __init__(self, interval_s: float = 0.02):
+        self.interval_s = interval_s
+        self._loggers: "weakref.WeakSet[Logger]" = weakref.WeakSet()
+        self._reg_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, logger: "Logger"):
+        with self._reg_lock:
+            self._loggers.add(logger)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True, name="log_writer")
+                self._thread.start()
+                atexit.register(self.drain_all)
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval_s)
+            self._wake.clear()
+            self.drain_all()
+
+    def drain_all(self):
+        with self._reg_lock:
+            loggers = list(self._loggers)
+        for lg in loggers:
+            try:
+                lg._drain()
+            except Exception:
+                pass
+
+_WRITER = _LogWriter()
 
 class Logger:
     """
     - 线程安全；所有GUI输出走队列，由GUI端定时drain（避免跨线程直接写Tk）
-    - 支持两路队列：主日志队列 / 串口监视队列
+    - 支持两路队列：主日志队列 / 串口监视队列（RingQueue：满时丢弃最旧，GUI 用 drain(max_n) 批量取）
     - throttled_log(key, msg, min_interval_s)
+    - console=False 时不打印到控制台（无头仿真/批量回归使用）
+    - 延迟格式化：debug("x=%.2f", x) 只保存模板和参数，在写线程中拼接；msg 也可以是无参 callable，
+      仅在级别/通道开启时调用；其余关键字参数作为结构化字段保存（add_sink 注册的 sink 可读取）。
+      热路径可先用 is_enabled(level, channel) 判断，整段跳过摘要/十六进制串的构造
+    - 异步输出：调用方只把 (时间, 标签, 线程名, 消息, 通道) 放入有界待写队列；
+      时间戳格式化、控制台/文件写入、GUI 队列投递都由后台写线程批量完成。
+      队列满时丢弃并计数，stats() 返回入队耗时/丢弃等统计；flush() 等待已入队记录写完。
     """
     def __init__(self, gui_log_callback: Optional[Callable[[str], None]] = None,
-                 level: str = "INFO"):
+                 level: str = "INFO", console: bool = True, log_file: Optional[str] = None,
+                 max_pending: int = 10000):
         self._level = _LEVELS.get(level.upper(), 20)
+        self._echo = bool(console)
         self._throttle: Dict[str, float] = {}
         self._gui_sink: Optional[Callable[[str], None]] = gui_log_callback
         self._serial_sink: Optional[Callable[[str], None]] = None
-        self.gui_queue: "queue.Queue[str]" = queue.Queue(maxsize=2000)
-        self.serial_queue: "queue.Queue[str]" = queue.Queue(maxsize=4000)
+        self.gui_queue = RingQueue(2000)
+        self.serial_queue = RingQueue(4000)
         self._lock = threading.Lock()
 
+        self._pending: "collections.deque[tuple]" = collections.deque()
+        self._max_pending = int(max_pending)
+        self._registered = False
+        self._drain_lock = threading.Lock()
+        self._stats = LogStats()
+        self._file = open(log_file, "a", encoding="utf-8", buffering=64 * 1024) if log_file else None
+        self._ts_sec = -1
+        self._ts_str = ""
+        self._channel_on: Dict[str, bool] = dict.fromkeys(CHANNELS, True)
+        self._sinks: List[Callable[[LogRecord], None]] = []
+
     # GUI 绑定（GUI里会开启after定时从队列取消息写入）
     def bind_gui_log(self, drain_callback: Callable[[str], None]):
         with self._lock:
@@ -30,65 +120,174 @@ class Logger:
             self._serial_sink = drain_callback
 
     # 工具
-    def _ts(self) -> str:
-        return datetime.datetime.now().strftime("[%H:%M:%S]")
-
-    def _tid(self) -> str:
-        return threading.current_thread().name
+    def _ts(self, t: float) -> str:
+        sec = int(t)
+        if sec != self._ts_sec:
+            self._ts_sec = sec
+            self._ts_str = time.strftime("[%H:%M:%S]", time.localtime(sec))
+        return self._ts_str
 
     def _put_gui(self, s: str):
-        try: self.gui_queue.put_nowait(s)
-        except queue.Full: pass
+        self.gui_queue.put_nowait(s)
 
     def _put_ser(self, s: str):
-        try: self.serial_queue.put_nowait(s)
-        except queue.Full: pass
-
-    def _console(self, s: str):
-        print(s, flush=True)
+        self.serial_queue.put_nowait(s)
 
     def _should(self, level: str) -> bool:
         return _LEVELS.get(level.upper(), 999) >= self._level
 
-    # 主日志
-    def debug(self, msg: str):
-        if self._should("DEBUG"):
-            line = f"{self._ts()} [DEBUG]({self._tid()}) {msg}"
-            self._console(line); self._put_gui(line)
+    def is_enabled(self, level: str = "INFO", channel: str = "main") -> bool:
+        """该级别/通道的日志是否会输出；用于在构造昂贵的日志内容前提前跳过"""
+        if not self._channel_on.get(channel, True):
+            return False
+        return channel != "main" or _LEVELS.get(level.upper(), 999) >= self._level
+
+    def set_level(self, level: str):
+        self._level = _LEVELS.get(level.upper(), 20)
+
+    def set_channel(self, channel: str, enabled: bool):
+        """开关整个通道（如高频时关闭 serial/telemetry）"""
+        self._channel_on[channel] = bool(enabled)
+
+    def add_sink(self, sink: Callable[[LogRecord], None]):
+        """注册结构化 sink：写线程对每条记录调用 sink(LogRecord)，异常被忽略"""
+        with self._lock:
+            self._sinks = self._sinks + [sink]
+
+    def _emit(self, tag: str, msg: Any, args: tuple = (), fields: Optional[Dict[str, Any]] = None,
+              channel: str = "main"):
+        """
+        入队一条记录（调用方线程只做这一步）。
+        msg：str 模板（args 非空时在写线程做 % 格式化）、无参 callable（此处调用），
+             或 None（消息由 fields 拼成 k=v 列表）。
+        """
+        t0 = time.perf_counter_ns()
+        if callable(msg):
+            msg = msg()
+        st = self._stats
+        q = self._pending
+        n = len(q)
+        if n >= self._max_pending:
+            st.dropped += 1
+            return
+        q.append((time.time(), tag, threading.current_thread().name, msg, args, fields, channel))
+        if not self._registered:
+            self._registered = True
+            _WRITER.register(self)
+        dt = time.perf_counter_ns() - t0
+        st.enqueued += 1
+        st.enqueue_ns_total += dt
+        if dt > st.enqueue_ns_max:
+            st.enqueue_ns_max = dt
+        if n >= st.pending_high_water:
+            st.pending_high_water = n + 1
+
+    def _drain(self):
+        """写线程：取出全部待写记录，格式化后批量输出"""
+        with self._drain_lock:
+            q = self._pending
+            n = len(q)
+            if n == 0:
+                return
+            lines = []
+            sinks = self._sinks
+            for _ in range(n):
+                t, tag, tid, msg, args, fields, channel = q.popleft()
+                if msg is None:
+                    msg = ", ".join(f"{k}={v}" for k, v in (fields or {}).items())
+                elif args:
+                    try:
+                        msg = msg % args
+                    except Exception:
+                        msg = f"{msg} {args!r}"
+                line = f"{self._ts(t)} [{tag}]({tid}) {msg}"
+                lines.append(line)
+                if channel == "serial":
+                    self._put_ser(line)
+                else:
+                    self._put_gui(line)
+                for sink in sinks:
+                    try:
+                        sink(LogRecord(t, tag, channel, tid, msg, fields or {}))
+                    except Exception:
+                        pass
+            text = "\n".join(lines) + "\n"
+            if self._echo:
+                try:
+                    sys.stdout.write(text)
+                    sys.stdout.flush()
+                except Exception:
+                    pass
+            if self._file is not None:
+                self._file.write(text)
+                self._file.flush()
+            self._stats.written += n
+            self._stats.batches += 1
+
+    def flush(self, timeout: float = 1.0) -> bool:
+        """等待已入队的记录全部写出；超时返回 False"""
+        deadline = time.monotonic() + timeout
+        while self._pending:
+            _WRITER.wake()
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.001)
+        with self._drain_lock:  # 等待正在进行的一批写完
+            pass
+        return True
+
+    def close(self):
+        """写完剩余记录并关闭日志文件"""
+        self._drain()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def stats(self) -> LogStats:
+        """日志统计快照（入队次数/耗时、丢弃、写出批次等）"""
+        return replace(self._stats)
+
+    def channel_stats(self) -> Dict[str, RingQueueStats]:
+        """GUI/串口两路显示队列的长度、丢弃（最旧）与高水位"""
+        return {"gui": self.gui_queue.stats(), "serial": self.serial_queue.stats()}
+
+    # 主日志：msg 可为 str、"%" 模板 + args、或无参 callable；关键字参数为结构化字段
+    def debug(self, msg, *args, **fields):
+        if self._level <= 10 and self._channel_on["main"]:
+            self._emit("DEBUG", msg, args, fields)
+
+    def info(self, msg, *args, **fields):
+        if self._level <= 20 and self._channel_on["main"]:
+            self._emit("INFO", msg, args, fields)
 
-    def info(self, msg: str):
-        if self._should("INFO"):
-            line = f"{self._ts()} [INFO]({self._tid()}) {msg}"
-            self._console(line); self._put_gui(line)
+    def warn(self, msg, *args, **fields):
+        if self._level <= 30 and self._channel_on["main"]:
+            self._emit("WARN", msg, args, fields)
 
-    def warn(self, msg: str):
-        if self._should("WARN"):
-            line = f"{self._ts()} [WARN]({self._tid()}) {msg}"
-            self._console(line); self._put_gui(line)
+    def error(self, msg, *args, **fields):
+        if self._level <= 40 and self._channel_on["main"]:
+            self._emit("ERROR", msg, args, fields)
 
-    def error(self, msg: str):
-        if self._should("ERROR"):
-            line = f"{self._ts()} [ERROR]({self._tid()}) {msg}"
-            self._console(line); self._put_gui(line)
+    warning = warn
 
     def exception(self, exc: BaseException, msg: str = ""):
         self.error(f"{msg} | {exc.__class__.__name__}: {exc}")
 
     # 串口监视
-    def serial(self, message: str, direction: str = "RX"):
-        line = f"{self._ts()} [SERIAL:{direction}]({self._tid()}) {message}"
-        self._console(line); self._put_ser(line)
+    def serial(self, message, *args, direction: str = "RX", **fields):
+        if self._channel_on["serial"]:
+            self._emit(f"SERIAL:{direction}", message, args, fields, channel="serial")
 
-    # 遥测
+    # 遥测（键值对即结构化字段，文本在写线程中拼接）
     def telemetry(self, **kv):
-        pairs = ", ".join(f"{k}={v}" for k, v in kv.items())
-        line = f"{self._ts()} [TEL]({self._tid()}) {pairs}"
-        self._console(line); self._put_gui(line)
+        if self._channel_on["telemetry"]:
+            self._emit("TEL", None, (), kv, channel="telemetry")
 
     # 腿子指令
     def command(self, leg_id: int, dx: float, dy: float, dz: float, reason: str = ""):
-        line = f"{self._ts()} [CMD]({self._tid()}) LEG#{leg_id:02d} Δx={dx:.2f} Δy={dy:.2f} Δz={dz:.2f} {reason}"
-        self._console(line); self._put_gui(line)
+        if self._channel_on["command"]:
+            self._emit("CMD", "LEG#%02d Δx=%.2f Δy=%.2f Δz=%.2f %s", (leg_id, dx, dy, dz, reason),
+                       {"leg_id": leg_id, "dx": dx, "dy": dy, "dz": dz}, channel="command")
 
     # 阶段提示
     def enter_stage(self, name: str, target_center_z_mm: float = None):
@@ -103,8 +302,10 @@ class Logger:
         else:
             self.info(f"完成 {name}，当前中心 {current_center_z_mm:.0f}mm")
 
-    # 限流日志
-    def throttled_log(self, key: str, msg: str, min_interval_s: float = 1.0, level: str = "DEBUG"):
+    # 限流日志：msg 同样可为无参 callable，被节流或级别关闭时不会调用
+    def throttled_log(self, key: str, msg, min_interval_s: float = 1.0, level: str = "DEBUG"):
+        if not self.is_enabled(level):
+            return
         now = time.time()
         last = self._throttle.get(key, 0.0)
         if now - last >= min_interval_s:
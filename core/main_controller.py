@@ -1,35 +1,26 @@
 # core/main_controller.py
 from typing import List, Optional, Callable
-import random
 
 from core.center_estimator import CenterEstimator
 from core.control_system import ControlSystem
+from core.history import TelemetryHistory
+from core.leg_unit import LegUnit, LegStateStore, FIXED_POSITIONS
+from core.recorder import BinaryRecorder
 from core.sensor_system import SensorSystem
 from hardware.actuator_driver import build_driver
 
-class LegUnit:
-    def __init__(self, leg_id: int):
-        self.id = leg_id
-        self.name = f"{leg_id:02d}"
-        self.x: float = 0.0
-        self.y: float = 0.0
-        self.z: float = 0.0
-        self.force: float = 0.0
-        self.status: str = "初始化"
-    def reset_random(self):
-        self.status = "初始化"
-        self.z = 600.0 + random.uniform(-20.0, 20.0)
-        self.force = 0.0
-
 class MainController:
     def __init__(self, logger, gui_update_cb: Optional[Callable] = None,
                  driver_mode: str = "mock", serial_port: Optional[str] = None,
                  baudrate: int = 115200, sensor_mode: str = "mock",
-                 sensor_port: Optional[str] = None, sensor_baud: int = 115200):
+                 sensor_port: Optional[str] = None, sensor_baud: int = 115200,
+                 sensor_format: str = "text", planner_backend: str = "python", record_path: Optional[str] = None,
+                 history_path: Optional[str] = None):
         self.logger = logger
         self.update_ui = gui_update_cb
 
-        self.legs: List[LegUnit] = [LegUnit(i+1) for i in range(12)]
+        self.leg_store = LegStateStore(12)
+        self.legs: List[LegUnit] = self.leg_store.legs
         self._generate_leg_positions()
         self.logger.info("MainController 初始化：腿子坐标已随机生成。")
 
@@ -40,7 +31,7 @@ class MainController:
         self.sensor = SensorSystem(
             logger=self.logger, mode=sensor_mode,
             port=sensor_port, baud=sensor_baud, fusion_rate_hz=20.0,
-            legs=self.legs
+            legs=self.legs, telem_format=sensor_format
         )
 
         if driver_mode == "serial" and serial_port:
@@ -55,12 +46,32 @@ class MainController:
         self.control = ControlSystem(
             legs=self.legs, logger=self.logger, update_callback=self._ui_draw_proxy,
             estimator=self.estimator, sensor_system=self.sensor, driver=self.driver,
-            simulate_feedback=simulate_feedback
+            simulate_feedback=simulate_feedback, planner_backend=planner_backend
         )
 
+        # 可选：遥测/指令历史（环形缓冲，固定容量），退出时导出为 .npz；未指定导出路径时不分配
+        self.history: Optional[TelemetryHistory] = None
+        self.history_path = history_path
+        if history_path:
+            self.history = TelemetryHistory(ids=[leg.id for leg in self.legs])
+            self.sensor.history = self.history
+            self.control.history = self.history
+            self.logger.info(f"遥测历史已开启，退出时导出：{history_path}")
+
+        # 可选：二进制记录（串口原始分片/融合样本/tick/下发指令），用于离线回放
+        self.recorder: Optional[BinaryRecorder] = None
+        if record_path:
+            try:
+                self.recorder = BinaryRecorder(record_path, logger=self.logger)
+                self.sensor.recorder = self.recorder
+                self.control.set_recorder(self.recorder)
+                self.logger.info(f"记录已开启：{record_path}")
+            except Exception as e:
+                self.logger.exception(e, "记录文件打开失败，记录未开启")
+
         self.period_ms: int = 500  # 改为500，与GUI一致
         self.center_rate_mm_s: float = 10.0  # 改为10.0，与GUI一致
-        self.logger.info(f"控制器就绪（driver={driver_mode}, sensor={sensor_mode}, simulate={simulate_feedback}）。"
+        self.logger.info(f"控制器就绪（driver={driver_mode}, sensor={sensor_mode}, simulate={simulate_feedback}, planner={planner_backend}）。"
                          f"周期={self.period_ms}ms，中心速率={self.center_rate_mm_s}mm/s")
 
     # GUI 接口
@@ -119,6 +130,7 @@ class MainController:
         # 重置腿数据 + 重新随机 XY/Z；并通知 UI
         for l in self.legs: l.reset_random()
         self._generate_leg_positions(xy_only=True)
+        self.estimator.mark_legs_changed()
         self.logger.info("系统已重置：腿子位置/高度已随机初始化。")
         if self.update_ui: self.update_ui("已重置", "重置")
 
@@ -127,6 +139,16 @@ class MainController:
         except Exception: pass
         try: self.sensor.shutdown()
         except Exception: pass
+        if self.recorder is not None:
+            try: self.recorder.close()
+            except Exception: pass
+        if self.history is not None:
+            try:
+                self.history.export_npz(self.history_path)
+                self.logger.info(f"遥测历史已导出：{self.history_path}（样本{len(self.history.samples)}条，"
+                                 f"指令{len(self.history.commands)}条）")
+            except Exception as e:
+                self.logger.exception(e, "遥测历史导出失败")
 
     def _ui_draw_proxy(self, full_stage: str, short_stage: str):
         if self.update_ui:
@@ -135,20 +157,7 @@ class MainController:
 
     def _generate_leg_positions(self, xy_only: bool = False):
         # 固定的腿子坐标配置
-        fixed_positions = [
-            (0.0, 0.0),         # 腿子1
-            (0.0, 171.7),       # 腿子2
-            (489.9, 0.0),       # 腿子3
-            (490.0, 182.3),     # 腿子4
-            (969.9, 0.0),       # 腿子5
-            (970.0, 197.1),     # 腿子6
-            (1449.9, 0.0),      # 腿子7
-            (1449.7, 223.1),    # 腿子8
-            (1929.9, 0.0),      # 腿子9
-            (1930.0, 262.6),    # 腿子10
-            (2409.9, 0.0),      # 腿子11
-            (2410.0, 311.6)     # 腿子12
-        ]
+        fixed_positions = FIXED_POSITIONS
 
         # 理论中心位置 (理论上应该是 1144.3, 85.0)
         self.theoretical_center_x = 1144.3
@@ -172,7 +181,7 @@ class MainController:
 
     def get_current_center_z(self) -> float:
         try:
-            st = self.estimator.estimate(self.legs, self.sensor)
+            st = self.estimator.current_state(self.legs, self.sensor)
             return st.center_z
         except Exception:
             return sum(l.z for l in self.legs)/max(1, len(self.legs))
@@ -0,0 +1,111 @@
+# core/planner_np.py
+# 向量化规划后端：用预计算的索引数组与限幅参数，一次性计算全部腿子的 Δz/Δx/Δy
+# 语义与 ControlSystem._plan_dz_per_leg/_plan_dxy_per_leg（python 后端）逐项一致
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+def _clip(v, lo, hi):
+    # 与 ControlSystem._clip 一致：max(lo, min(hi, v))，hi<lo 时取 lo
+    return np.maximum(lo, np.minimum(hi, v))
+
+class VectorPlanner:
+    """
+    初始化时固化：
+      - leg_ids -> 数组下标映射（corner_dz 以 leg_id 为键）
+      - 上/下排腿子下标、中心腿下标
+      - 各腿对初始 X 中线、初始 Y 差、上排初始平均 Y
+      - 步长限幅与增益
+    之后每个 tick 只做少量数组运算，耗时与腿数基本无关。
+    """
+    def __init__(self, leg_ids: Sequence[int], upper_idx: Sequence[int], lower_idx: Sequence[int],
+                 center_idx: Sequence[int], pair_initial_x_center: Sequence[float],
+                 pair_initial_y_diff: Sequence[float], upper_band_avg_y0: float,
+                 max_step_z: float, max_step_xy: float, leveling_gain: float, center_gain_xy: float,
+                 pair_weight: float, pair_jitter: float, rng: Optional[np.random.Generator] = None):
+        ids = np.asarray(leg_ids, dtype=np.int64)
+        self.n = len(ids)
+        self._id2idx = np.full(int(ids.max()) + 1 if self.n else 1, -1, dtype=np.int64)
+        self._id2idx[ids] = np.arange(self.n)
+
+        self.upper = np.asarray(upper_idx, dtype=np.int64)
+        self.lower = np.asarray(lower_idx, dtype=np.int64)
+        self.center = np.asarray(center_idx, dtype=np.int64)
+        self.pair_x_center = np.asarray(pair_initial_x_center, dtype=float)
+        self.pair_y_diff = np.asarray(pair_initial_y_diff, dtype=float)
+        self.upper_band_avg_y0 = float(upper_band_avg_y0)
+
+        self.max_step_z = float(max_step_z)
+        self.max_step_xy = float(max_step_xy)
+        self.leveling_gain = float(leveling_gain)
+        self.center_gain_xy = float(center_gain_xy)
+        self.pair_weight = float(pair_weight)
+        self.pair_jitter = float(pair_jitter)
+        self._rng = rng if rng is not None else np.random.default_rng()
+
+    def rng_state(self) -> Dict:
+        """抖动随机源状态（bit_generator.state，可 JSON 序列化），供记录/回放逐位复现 dx"""
+        return self._rng.bit_generator.state
+
+    def set_rng_state(self, state: Dict):
+        self._rng.bit_generator.state = state
+
+    def corner_arrays(self, corner_dz: Dict[int, float]) -> Tuple[np.ndarray, np.ndarray]:
+        """corner_dz {leg_id: dz} -> (下标数组, dz 数组)，未知 leg_id 被丢弃"""
+        if not corner_dz:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        ids = np.fromiter(corner_dz.keys(), dtype=np.int64, count=len(corner_dz))
+        rel = np.fromiter(corner_dz.values(), dtype=float, count=len(corner_dz))
+        ok = (ids >= 0) & (ids < len(self._id2idx))
+        idx = np.full(len(ids), -1, dtype=np.int64)
+        idx[ok] = self._id2idx[ids[ok]]
+        keep = idx >= 0
+        return idx[keep], rel[keep]
+
+    def plan_dz(self, corner_dz: Dict[int, float], planned_center_delta: float,
+                max_single_step: float) -> np.ndarray:
+        mz = self.max_step_z
+        # 1) 全腿同降
+        base = _clip(planned_center_delta, 0.0, min(mz, max_single_step))
+        dz = np.full(self.n, float(base))
+
+        # 2) 调平：仅偏高角点多降
+        idx, rel = self.corner_arrays(corner_dz)
+        up = rel > 0
+        if up.any():
+            idx, rel = idx[up], rel[up]
+            dz[idx] += _clip(rel * self.leveling_gain, 0.0, mz - dz[idx])
+
+        # 3) 中心约束：中心腿平均 Δz 不足时统一加法校正
+        if len(self.center):
+            need = planned_center_delta - dz[self.center].mean()
+            if need > 0:
+                per = _clip(need, 0.0, mz)
+                dz[self.center] += np.minimum(per, mz - dz[self.center])
+
+        # 4) 非负
+        return np.maximum(0.0, dz)
+
+    def plan_dxy(self, x: np.ndarray, y: np.ndarray, center_xy: Tuple[float, float],
+                 target_xy: Tuple[float, float]) -> Tuple[np.ndarray, np.ndarray]:
+        mxy = self.max_step_xy
+        shift_x = _clip(-(center_xy[0] - target_xy[0]) * self.center_gain_xy, -mxy, mxy)
+        shift_y = _clip(-(center_xy[1] - target_xy[1]) * self.center_gain_xy, -mxy, mxy)
+        dx = np.full(self.n, float(shift_x))
+        dy = np.full(self.n, float(shift_y))
+
+        up, lo = self.upper, self.lower
+        # 上排 Y 向一致性
+        if len(up):
+            band_shift = _clip((self.upper_band_avg_y0 - y[up].mean()) * 0.05, -mxy, mxy)
+            dy[up] += band_shift
+
+        # 成对约束：下排跟随上排保持 Y 差；每对锁定 X 中线（带小抖动）
+        desired_lo_y = (y[up] + dy[up]) - self.pair_y_diff
+        dy[lo] += _clip(desired_lo_y - y[lo], -mxy, mxy)
+
+        jitter = self._rng.uniform(-self.pair_jitter, self.pair_jitter, len(up)) * self.pair_weight
+        desired_x = self.pair_x_center + jitter
+        dx[up] += _clip(desired_x - x[up], -mxy, mxy)
+        dx[lo] += _clip(desired_x - x[lo], -mxy, mxy)
+        return dx, dy
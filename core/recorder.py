@@ -0,0 +1,160 @@
+# core/recorder.py
+# 二进制遥测/指令记录：追加写入，记录串口原始分片、每次融合的腿子样本、控制 tick 与下发指令，供离线回放复现现场
+#
+# 文件格式（小端）：
+#   文件头  MAGIC(4) + VERSION(u16) + RESERVED(u16)
+#   记录    TYPE(u8) + TS(f64, 记录器时钟 monotonic 秒) + LEN(u32) + PAYLOAD(LEN)
+# 记录类型：
+#   REC_CONFIG   UTF-8 JSON：控制参数/增益/规划后端/初始腿子坐标
+#   REC_RX_CHUNK 串口原始字节
+#   REC_SAMPLE   SAMPLE_HEAD(seq u32, fresh u8, n u16) + att(3d) + forces/z/x/y(各 n×d)
+#   REC_TICK     now(d) + dt(d)：一次 tick_once 开始
+#   REC_COMMANDS n(u16) + n × (id u16, dz d, dx d, dy d)
+import json
+import struct
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+from core.clock import SYSTEM_CLOCK
+
+MAGIC = b"RCLG"
+VERSION = 1
+FILE_HEAD = struct.Struct("<4sHH")
+REC_HEAD = struct.Struct("<BdI")
+SAMPLE_HEAD = struct.Struct("<IBH")
+TICK = struct.Struct("<dd")
+CMD_COUNT = struct.Struct("<H")
+CMD_ITEM = struct.Struct("<Hddd")
+
+REC_CONFIG = 0
+REC_RX_CHUNK = 1
+REC_SAMPLE = 2
+REC_TICK = 3
+REC_COMMANDS = 4
+
+REC_NAMES = {REC_CONFIG: "CONFIG", REC_RX_CHUNK: "RX_CHUNK", REC_SAMPLE: "SAMPLE",
+             REC_TICK: "TICK", REC_COMMANDS: "COMMANDS"}
+
+@dataclass
+class Record:
+    type: int
+    ts: float
+    payload: bytes
+
+class BinaryRecorder:
+    """
+    线程安全的追加写记录器（串口读线程与控制线程可同时写）。
+    每个记录器对应一次会话、一个新文件（已存在则覆盖）；运行中只在末尾追加记录。
+    写入走带缓冲的文件对象，flush_interval_s 控制最长落盘间隔；close() 时全部落盘。
+    """
+    def __init__(self, path: str, clock=None, flush_interval_s: float = 1.0, logger=None):
+        self.path = path
+        self.clock = clock or SYSTEM_CLOCK
+        self.logger = logger
+        self._flush_interval = float(flush_interval_s)
+        self._lock = threading.Lock()
+        self._f = open(path, "wb", buffering=64 * 1024)
+        self._f.write(FILE_HEAD.pack(MAGIC, VERSION, 0))
+        self._last_flush = self.clock.monotonic()
+        self.records = 0
+        self.bytes = 0
+
+    def write(self, rtype: int, payload: bytes, ts: Optional[float] = None):
+        ts = self.clock.monotonic() if ts is None else ts
+        with self._lock:
+            if self._f is None:
+                return
+            self._f.write(REC_HEAD.pack(rtype, ts, len(payload)))
+            self._f.write(payload)
+            self.records += 1
+            self.bytes += REC_HEAD.size + len(payload)
+            if ts - self._last_flush >= self._flush_interval:
+                self._f.flush()
+                self._last_flush = ts
+
+    # —— 各类记录 ——
+    def config(self, cfg: Dict[str, Any]):
+        self.write(REC_CONFIG, json.dumps(cfg, ensure_ascii=False).encode("utf-8"))
+
+    def rx_chunk(self, chunk: bytes):
+        self.write(REC_RX_CHUNK, bytes(chunk))
+
+    def sample(self, seq: int, fresh: bool, raw: Dict[str, Any]):
+        self.write(REC_SAMPLE, encode_sample(seq, fresh, raw))
+
+    def tick(self, now: float, dt: float):
+        self.write(REC_TICK, TICK.pack(now, dt))
+
+    def commands(self, cmds: List[Dict]):
+        self.write(REC_COMMANDS, encode_commands(cmds))
+
+    def close(self):
+        with self._lock:
+            if self._f is not None:
+                self._f.close()
+                self._f = None
+        if self.logger:
+            self.logger.info(f"记录文件已关闭：{self.path}（{self.records} 条，{self.bytes/1024:.1f} KB）")
+
+# —— 编解码 ——
+def encode_sample(seq: int, fresh: bool, raw: Dict[str, Any]) -> bytes:
+    z = list(raw.get("z", []))
+    n = len(z)
+    xy = list(raw.get("xy", []))[:n]
+    forces = list(raw.get("forces", []))[:n]
+    forces += [0.0] * (n - len(forces))
+    att = tuple(raw.get("att", (0.0, 0.0, 0.0)))[:3]
+    vals = list(att) + forces + z + [p[0] for p in xy] + [p[1] for p in xy]
+    return SAMPLE_HEAD.pack(seq & 0xFFFFFFFF, 1 if fresh else 0, n) + struct.pack(f"<{len(vals)}d", *vals)
+
+def decode_sample(payload: bytes):
+    """返回 (seq, fresh, raw)，raw 格式同 SensorSystem._snapshot_raw"""
+    seq, fresh, n = SAMPLE_HEAD.unpack_from(payload, 0)
+    vals = struct.unpack_from(f"<{3 + 4 * n}d", payload, SAMPLE_HEAD.size)
+    att = vals[0:3]
+    forces = list(vals[3:3 + n])
+    z = list(vals[3 + n:3 + 2 * n])
+    xs = vals[3 + 2 * n:3 + 3 * n]
+    ys = vals[3 + 3 * n:3 + 4 * n]
+    return seq, bool(fresh), {"att": tuple(att), "forces": forces, "z": z, "xy": list(zip(xs, ys))}
+
+def encode_commands(cmds: List[Dict]) -> bytes:
+    parts = [CMD_COUNT.pack(len(cmds))]
+    for c in cmds:
+        parts.append(CMD_ITEM.pack(int(c["id"]), float(c["dz"]), float(c["dx"]), float(c["dy"])))
+    return b"".join(parts)
+
+def decode_commands(payload: bytes) -> List[Dict]:
+    (n,) = CMD_COUNT.unpack_from(payload, 0)
+    out = []
+    for k in range(n):
+        lid, dz, dx, dy = CMD_ITEM.unpack_from(payload, CMD_COUNT.size + k * CMD_ITEM.size)
+        out.append({"id": lid, "dz": dz, "dx": dx, "dy": dy})
+    return out
+
+def decode_tick(payload: bytes):
+    """返回 (now, dt)"""
+    return TICK.unpack(payload)
+
+def read_records(path: str) -> Iterator[Record]:
+    """顺序读取全部记录；末尾不完整的记录（如进程被杀时写了一半）被忽略"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < FILE_HEAD.size:
+        return
+    magic, version, _ = FILE_HEAD.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError(f"不是记录文件：{path}")
+    if version != VERSION:
+        raise ValueError(f"不支持的记录版本：{version}")
+    pos = FILE_HEAD.size
+    end = len(data)
+    mv = memoryview(data)
+    while pos + REC_HEAD.size <= end:
+        rtype, ts, length = REC_HEAD.unpack_from(data, pos)
+        pos += REC_HEAD.size
+        if pos + length > end:
+            break
+        yield Record(rtype, ts, bytes(mv[pos:pos + length]))
+        pos += length
@@ -0,0 +1,250 @@
+# core/replay.py
+# 离线回放：读取 BinaryRecorder 记录文件，在 VirtualClock 上按记录时间逐 tick 重放（无 sleep，按 CPU 速度运行）：
+#   - 串口原始分片重新走 SensorSystem 解析（文本/二进制遥测帧），并与记录样本比对（解析一致性）
+#   - 记录样本经 SensorSystem 融合 → CenterEstimator.estimate → ControlSystem 规划
+#   - 重规划指令与记录指令逐腿比对，输出偏差报告
+#   - 回放结束后用 geometry_np 批量重算全部样本的几何中心，与逐样本（geometry.py）融合结果交叉核对
+import argparse
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from core.center_estimator import CenterEstimator
+from core.clock import VirtualClock
+from core.control_system import ControlGains, ControlSystem
+from core.geometry_np import GeometryArrays, compute_center_and_theory_batch
+from core.leg_unit import LegStateStore
+from core.logger import Logger
+from core.recorder import (REC_COMMANDS, REC_CONFIG, REC_RX_CHUNK, REC_SAMPLE, REC_TICK,
+                           decode_commands, decode_sample, decode_tick, read_records)
+from core.sensor_system import SensorSystem
+
+@dataclass
+class Divergence:
+    tick: int
+    ts: float
+    leg_id: int
+    field: str           # "dz"/"dx"/"dy"，或 "missing"（记录有、重放无）/"extra"（记录无、重放有）
+    recorded: float
+    replayed: float
+
+@dataclass
+class ReplayReport:
+    path: str
+    ticks: int = 0
+    samples: int = 0
+    rx_chunks: int = 0
+    rx_bytes: int = 0
+    parse_checked: int = 0
+    parse_mismatches: int = 0           # 重新解析的串口数据与记录样本不一致的次数
+    commands_compared: int = 0
+    divergent_ticks: int = 0
+    divergences: List[Divergence] = field(default_factory=list)  # 最多 max_divergences 条明细
+    max_abs_diff: Dict[str, float] = field(default_factory=lambda: {"dz": 0.0, "dx": 0.0, "dy": 0.0})
+    jitter_exact: bool = False          # 是否按记录的随机源状态逐位复现了成对X抖动
+    geometry_checked: int = 0           # 批量几何核对的样本数
+    geometry_mismatches: int = 0        # 批量重算的中心 (Xc, Yc, Zc) 与逐样本融合结果不一致的样本数
+    geometry_max_diff: float = 0.0
+    geometry: Optional[GeometryArrays] = None   # 全部融合样本的批量几何结果（T × 腿）
+    wall_time_s: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.divergent_ticks == 0 and self.parse_mismatches == 0 and self.geometry_mismatches == 0
+
+    def summary(self) -> str:
+        d = self.max_abs_diff
+        return (f"回放 {self.ticks} 个tick（样本{self.samples}，串口分片{self.rx_chunks}/{self.rx_bytes}B），"
+                f"耗时{self.wall_time_s*1000:.1f}ms；比对指令{self.commands_compared}条，"
+                f"偏差tick {self.divergent_ticks} 个，解析不一致 {self.parse_mismatches}/{self.parse_checked}；"
+                f"最大偏差 dz={d['dz']:.4f} dx={d['dx']:.4f} dy={d['dy']:.4f} mm；"
+                f"几何核对 {self.geometry_checked} 个样本，不一致 {self.geometry_mismatches} 个"
+                f"（最大差 {self.geometry_max_diff:.2e} mm）")
+
+class _CaptureDriver:
+    """回放用驱动：只收集 ControlSystem 下发的指令，不作用于任何对象"""
+    def __init__(self):
+        self.last: Optional[List[Dict]] = None
+
+    def apply_batch(self, cmds: List[Dict]) -> bool:
+        self.last = [dict(c) for c in cmds]
+        return True
+
+    def stop_all(self) -> None:
+        pass
+
+def _apply_config(control: ControlSystem, cfg: Dict):
+    control.update_control_params(float(cfg["period_ms"]), float(cfg["rate_mm_s"]), float(cfg["max_single_step"]))
+
+def _same_raw(parser: SensorSystem, raw: Dict, eps: float = 1e-9) -> bool:
+    st = parser.legs_state()
+    pairs = [(st["z"], raw["z"]), (parser.latest_forces(), raw["forces"]),
+             ([p[0] for p in st["xy"]], [p[0] for p in raw["xy"]]),
+             ([p[1] for p in st["xy"]], [p[1] for p in raw["xy"]]),
+             (parser.estimate_attitude(), raw["att"])]
+    for a, b in pairs:
+        if len(a) != len(b) or any(abs(float(u) - float(v)) > eps for u, v in zip(a, b)):
+            return False
+    return True
+
+def _compare(report: ReplayReport, tick: int, ts: float, recorded: Optional[List[Dict]],
+             replayed: Optional[List[Dict]], tol: Dict[str, float], max_divergences: int):
+    rec = {c["id"]: c for c in (recorded or [])}
+    rep = {c["id"]: c for c in (replayed or [])}
+    found = []
+    for lid in sorted(set(rec) | set(rep)):
+        a, b = rec.get(lid), rep.get(lid)
+        if a is None or b is None:
+            found.append(Divergence(tick, ts, lid, "extra" if a is None else "missing", 0.0, 0.0))
+            continue
+        report.commands_compared += 1
+        for f in ("dz", "dx", "dy"):
+            diff = abs(a[f] - b[f])
+            if diff > report.max_abs_diff[f]:
+                report.max_abs_diff[f] = diff
+            if diff > tol[f]:
+                found.append(Divergence(tick, ts, lid, f, a[f], b[f]))
+    if found:
+        report.divergent_ticks += 1
+        room = max_divergences - len(report.divergences)
+        report.divergences.extend(found[:max(0, room)])
+
+def _check_geometry(report: ReplayReport, samples: List, tol_mm: float):
+    """全部融合样本一次批量计算几何，与融合时逐样本算出的中心比对"""
+    if not samples:
+        return
+    xs = np.vstack([s.x for s in samples])
+    ys = np.vstack([s.y for s in samples])
+    zs = np.vstack([s.z for s in samples])
+    geo = compute_center_and_theory_batch(xs, ys, zs)
+    online = np.array([s.center for s in samples], dtype=float)
+    diff = np.abs(np.column_stack([geo.Xc, geo.Yc, geo.Zc]) - online).max(axis=1)
+    report.geometry = geo
+    report.geometry_checked = len(samples)
+    report.geometry_mismatches = int(np.count_nonzero(diff > tol_mm))
+    report.geometry_max_diff = float(diff.max())
+
+def replay(path: str, tolerance_mm: float = 1e-6, dx_tolerance_mm: Optional[float] = None,
+           planner_backend: Optional[str] = None, max_divergences: int = 1000,
+           logger: Optional[Logger] = None, geometry_tolerance_mm: float = 1e-6) -> ReplayReport:
+    """
+    tolerance_mm: dz/dx/dy 允许偏差。成对X抖动按记录中的随机源状态逐位复现；记录无该状态（旧文件）
+        或改用了不同的规划后端时无法复现，dx 默认另加 2×pair_jitter×pair_weight。
+    planner_backend: 覆盖记录中的规划后端（如用 numpy 后端回放 python 后端的记录做交叉验证）。
+    geometry_tolerance_mm: 批量几何（geometry_np）与逐样本几何（geometry.py）中心的允许偏差。
+    """
+    records = list(read_records(path))
+    cfg = next((r for r in records if r.type == REC_CONFIG), None)
+    if cfg is None:
+        raise ValueError(f"记录中没有配置（CONFIG）记录：{path}")
+    cfg0 = json.loads(cfg.payload.decode("utf-8"))
+
+    logger = logger or Logger(level="ERROR", console=False)
+    clock = VirtualClock(start=records[0].ts)
+    init = cfg0["initial_legs"]
+    store = LegStateStore(len(init["ids"]), ids=init["ids"])
+    store.set_positions(init["x"], init["y"], init["z"])
+
+    pending: Dict[str, Optional[Dict]] = {"raw": None}
+    def source():
+        raw, pending["raw"] = pending["raw"], None
+        return raw if raw is not None else {"fresh": False}
+
+    sensor = SensorSystem(logger, mode="sim", legs=store.legs, source=source, clock=clock)
+    # 仅用于重放串口解析；binary 解析器同时识别文本行与二进制遥测帧
+    parser = SensorSystem(logger, mode="mock", telem_format="binary")
+    estimator = CenterEstimator(clock=clock)
+    driver = _CaptureDriver()
+    gains = ControlGains(**cfg0.get("gains", {}))
+    control = ControlSystem(store.legs, logger, None, estimator, sensor, driver,
+                            simulate_feedback=bool(cfg0.get("simulate_feedback", False)),
+                            planner_backend=planner_backend or cfg0.get("planner_backend", "python"),
+                            clock=clock, gains=gains)
+    control.begin_run()
+
+    report = ReplayReport(path=path)
+    report.jitter_exact = "jitter_state" in cfg0 and control.set_jitter_state(cfg0["jitter_state"])
+    jitter = 0.0 if report.jitter_exact else 2.0 * gains.pair_jitter * gains.pair_weight
+    tol = {"dz": tolerance_mm, "dy": tolerance_mm,
+           "dx": dx_tolerance_mm if dx_tolerance_mm is not None else tolerance_mm + jitter}
+
+    # 当前 tick 状态
+    tick_no = -1
+    tick_now = tick_dt = 0.0
+    tick_ran = True
+    recorded_cmds: Optional[List[Dict]] = None
+    seen_cmds = False
+    fused = []   # 回放中融合出的全部 FusedSample（按 seq 去重）
+
+    def run_tick():
+        nonlocal tick_ran
+        clock.set(tick_now)
+        driver.last = None
+        control.tick_once(dt=tick_dt)
+        report.ticks += 1
+        tick_ran = True
+        s = sensor.latest_sample()
+        if s is not None and (not fused or fused[-1].seq != s.seq):
+            fused.append(s)
+
+    def close_tick():
+        if tick_no < 0:
+            return
+        if not tick_ran:
+            run_tick()
+        _compare(report, tick_no, tick_now, recorded_cmds, driver.last, tol, max_divergences)
+
+    wall0 = time.perf_counter()
+    for r in records:
+        t = r.type
+        if t == REC_RX_CHUNK:
+            report.rx_chunks += 1
+            report.rx_bytes += len(r.payload)
+            parser.feed(r.payload)
+        elif t == REC_CONFIG:
+            _apply_config(control, json.loads(r.payload.decode("utf-8")))
+        elif t == REC_TICK:
+            close_tick()
+            tick_no += 1
+            tick_now, tick_dt = decode_tick(r.payload)
+            tick_ran = False
+            recorded_cmds, seen_cmds = None, False
+        elif t == REC_SAMPLE:
+            report.samples += 1
+            seq, fresh, raw = decode_sample(r.payload)
+            if report.rx_chunks and fresh:
+                report.parse_checked += 1
+                if not _same_raw(parser, raw):
+                    report.parse_mismatches += 1
+            if not tick_ran:
+                raw["fresh"] = fresh
+                pending["raw"] = raw
+                run_tick()
+        elif t == REC_COMMANDS:
+            if not seen_cmds:
+                recorded_cmds, seen_cmds = decode_commands(r.payload), True
+    close_tick()
+    _check_geometry(report, fused, geometry_tolerance_mm)
+    report.wall_time_s = time.perf_counter() - wall0
+    return report
+
+def main():
+    ap = argparse.ArgumentParser(description="离线回放记录文件，比对重规划指令与记录指令")
+    ap.add_argument("path", help="BinaryRecorder 记录文件")
+    ap.add_argument("--tolerance", type=float, default=1e-6, help="dz/dy 允许偏差（mm）")
+    ap.add_argument("--dx-tolerance", type=float, default=None, help="dx 允许偏差（mm），默认同 --tolerance（无法复现抖动时另加抖动幅度）")
+    ap.add_argument("--planner", choices=["python", "numpy"], default=None, help="覆盖记录中的规划后端")
+    ap.add_argument("--show", type=int, default=20, help="打印的偏差明细条数")
+    args = ap.parse_args()
+
+    rep = replay(args.path, args.tolerance, args.dx_tolerance, args.planner)
+    print(f"[Replay] {rep.summary()}")
+    for d in rep.divergences[:args.show]:
+        print(f"[Replay]   tick{d.tick} t={d.ts:.3f} LEG#{d.leg_id:02d} {d.field}: 记录{d.recorded:.4f} 重放{d.replayed:.4f}")
+    print("[Replay] 结果一致" if rep.ok else "[Replay] 存在偏差")
+
+if __name__ == "__main__":
+    main()
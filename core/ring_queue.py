@@ -0,0 +1,65 @@
+# core/ring_queue.py
+# 有界环形队列：满时丢弃最旧条目（保留最新诊断信息），带丢弃/高水位计数，支持 drain(max_n) 批量取出
+import collections
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+@dataclass
+class RingQueueStats:
+    capacity: int
+    size: int
+    put: int          # 累计放入条数
+    dropped: int      # 因满被挤掉的最旧条目数
+    high_water: int   # 出现过的最大长度
+
+class RingQueue:
+    """
+    基于 deque(maxlen) 的单生产者/单消费者队列：append/popleft 在 GIL 下原子，不需要额外加锁。
+    接口保留 queue.Queue 常用的 put_nowait/get_nowait/empty/qsize，便于替换。
+    """
+    def __init__(self, capacity: int):
+        self.capacity = int(capacity)
+        self._q: "collections.deque[Any]" = collections.deque(maxlen=self.capacity)
+        self.put_count = 0
+        self.dropped = 0
+        self.high_water = 0
+
+    def put_nowait(self, item: Any):
+        q = self._q
+        n = len(q)
+        if n >= self.capacity:
+            self.dropped += 1      # deque(maxlen) 追加时自动挤掉最旧条目
+        elif n + 1 > self.high_water:
+            self.high_water = n + 1
+        q.append(item)
+        self.put_count += 1
+
+    put = put_nowait
+
+    def get_nowait(self) -> Any:
+        """取最旧一条；空时抛 IndexError"""
+        return self._q.popleft()
+
+    def drain(self, max_n: Optional[int] = None) -> List[Any]:
+        """按先后顺序一次取出至多 max_n 条（None 为全部）"""
+        q = self._q
+        n = len(q) if max_n is None else min(len(q), int(max_n))
+        pop = q.popleft
+        out = []
+        try:
+            for _ in range(n):
+                out.append(pop())
+        except IndexError:
+            pass
+        return out
+
+    def empty(self) -> bool:
+        return not self._q
+
+    def qsize(self) -> int:
+        return len(self._q)
+
+    __len__ = qsize
+
+    def stats(self) -> RingQueueStats:
+        return RingQueueStats(self.capacity, len(self._q), self.put_count, self.dropped, self.high_water)
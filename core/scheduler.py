@@ -0,0 +1,118 @@
+# core/scheduler.py
+# 基于单调时钟的绝对截止时间调度：补偿漂移、按策略处理超时、统计抖动/实际频率
+import math
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Callable, Optional
+
+OVERRUN_SKIP = "skip"        # 超时后丢弃错过的周期，对齐到下一个网格点
+OVERRUN_CATCHUP = "catchup"  # 超时后立即补跑错过的周期（最多 max_catchup 个），超出则重新对齐
+
+@dataclass
+class LoopStats:
+    period_ms: float = 0.0       # 配置周期
+    ticks: int = 0               # 已执行 tick 数
+    overruns: int = 0            # tick 结束时已超过下一截止时间的次数
+    skipped: int = 0             # skip 策略下丢弃的周期数 / catchup 超限后放弃的周期数
+    last_jitter_ms: float = 0.0  # 本次 tick 实际开始时间 - 截止时间
+    mean_jitter_ms: float = 0.0
+    max_jitter_ms: float = 0.0
+    last_exec_ms: float = 0.0    # 本次 tick 执行耗时
+    max_exec_ms: float = 0.0
+    achieved_hz: float = 0.0     # 实际 tick 频率（相邻 tick 开始时间间隔的 EMA）
+    callback_errors: int = 0     # after_tick 回调抛出异常的次数（异常被吞掉，循环继续）
+
+class DeadlineScheduler:
+    """
+    周期调度器：
+      - 截止时间按 t0 + k*period 绝对推进，tick 耗时不会累积成漂移
+      - 超时策略：skip（默认）/ catchup，见模块常量
+      - stats() 返回统计快照，可供 GUI/日志读取（线程安全）
+      - run(after_tick=...) 在每个 tick 统计记录完毕后回调本次快照（含本次耗时/超时）
+    """
+    def __init__(self, period_s: float, policy: str = OVERRUN_SKIP, max_catchup: int = 3,
+                 clock: Callable[[], float] = time.monotonic):
+        if policy not in (OVERRUN_SKIP, OVERRUN_CATCHUP):
+            raise ValueError(f"Unknown overrun policy: {policy}")
+        self.period_s = float(period_s)
+        self.policy = policy
+        self.max_catchup = max(0, int(max_catchup))
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._stats = LoopStats(period_ms=self.period_s * 1000.0)
+        self._jitter_sum_ms = 0.0
+        self._last_start: Optional[float] = None
+
+    def reset(self):
+        with self._lock:
+            self._stats = LoopStats(period_ms=self.period_s * 1000.0)
+            self._jitter_sum_ms = 0.0
+            self._last_start = None
+
+    def stats(self) -> LoopStats:
+        with self._lock:
+            return replace(self._stats)
+
+    def run(self, tick: Callable[[], None], stop: threading.Event,
+            after_tick: Optional[Callable[[LoopStats], None]] = None):
+        """
+        在当前线程循环执行 tick，直到 stop 被置位；stop.wait 用作可中断的睡眠。
+        after_tick(stats) 在本次 tick 的耗时/抖动/超时记录之后调用，快照描述的就是刚结束的 tick；
+        回调异常不会终止循环（只计入 callback_errors），tick 自身的异常由调用方捕获。
+        """
+        self.reset()
+        deadline = self._clock()
+        while not stop.is_set():
+            start = self._clock()
+            tick()
+            end = self._clock()
+            self._record(start, start - deadline, end - start)
+
+            period = max(1e-3, self.period_s)
+            deadline += period
+            if end > deadline:
+                deadline = self._on_overrun(deadline, end, period)
+            if after_tick is not None:
+                try:
+                    after_tick(self.stats())
+                except Exception:
+                    with self._lock:
+                        self._stats.callback_errors += 1
+
+            delay = deadline - self._clock()
+            if delay > 0:
+                stop.wait(delay)
+
+    def _on_overrun(self, deadline: float, now: float, period: float) -> float:
+        missed = int(math.floor((now - deadline) / period)) + 1  # 已错过的截止点个数
+        with self._lock:
+            self._stats.overruns += 1
+            if self.policy == OVERRUN_SKIP:
+                self._stats.skipped += missed
+                return deadline + missed * period
+            # catchup：落后不超过 max_catchup 个周期时保持截止时间不变（立即补跑）
+            if missed <= self.max_catchup:
+                return deadline
+            self._stats.skipped += missed
+            return deadline + missed * period
+
+    def _record(self, start: float, lateness_s: float, exec_s: float):
+        with self._lock:
+            st = self._stats
+            st.period_ms = self.period_s * 1000.0
+            st.ticks += 1
+            jitter_ms = max(0.0, lateness_s) * 1000.0
+            exec_ms = exec_s * 1000.0
+            st.last_jitter_ms = jitter_ms
+            st.max_jitter_ms = max(st.max_jitter_ms, jitter_ms)
+            self._jitter_sum_ms += jitter_ms
+            st.mean_jitter_ms = self._jitter_sum_ms / st.ticks
+            st.last_exec_ms = exec_ms
+            st.max_exec_ms = max(st.max_exec_ms, exec_ms)
+            if self._last_start is not None:
+                interval = start - self._last_start
+                if interval > 0:
+                    hz = 1.0 / interval
+                    st.achieved_hz = hz if st.achieved_hz <= 0 else 0.8 * st.achieved_hz + 0.2 * hz
+            self._last_start = start
@@ -1,30 +1,82 @@
 # core/sensor_system.py
 import threading
-import time
 import random
+from dataclasses import dataclass
 
-# 引入几何计算模块
-from core.geometry import compute_center_and_theory, SensorSnapshot
+import numpy as np
 
-from typing import Dict, Any, Optional, Tuple, List
+# 引入几何计算模块（单样本用 dict 版本：12 腿规模下比 geometry_np 的数组版开销更小）
+from core.geometry import GeometryResult, SensorSnapshot, compute_center_and_theory
+
+from typing import Dict, Any, Callable, Optional, Tuple, List
+from core.clock import SYSTEM_CLOCK
+from core.cycle_assembler import FIELD_F, FIELD_XY, FIELD_Z, CycleAssembler, CycleStats, TelemetryCycle
+from core.leg_unit import leg_arrays, store_of
 from core.logger import Logger
+from hardware.frame_codec import (CMD_SET_TELEM_FORMAT, CMD_TELEMETRY, STX as FRAME_STX, TELEM_BINARY,
+                                  FrameDecoder, TelemetryFrame, decode_telemetry, pack_frame)
 
 try:
     from hardware.serial_interface import SerialInterface
 except Exception:
     SerialInterface = None
 
+# 文本遥测命令字（bytes 直接分派）
+_RX_IMU, _RX_FOR, _RX_Z, _RX_XY = range(4)
+_RX_KINDS = {b"IMU": _RX_IMU, b"FOR": _RX_FOR, b"Z": _RX_Z, b"XY": _RX_XY}
+
+# 二进制遥测模式下连续收到这么多字节仍没有一帧有效遥测，认为设备已回到文本协议（如重启），回退文本解析
+BINARY_FALLBACK_BYTES = 2048
+
+@dataclass(frozen=True)
+class FusedSample:
+    """
+    一次融合的不可变结果。SensorSystem 以单次引用赋值发布，读取方直接持有该对象，
+    无需加锁，也不必再从腿子对象重建快照或重算几何中心。
+    数组字段均为只读 numpy 数组，下标与 ids 一一对应。
+    """
+    seq: int                                # 样本序号（即 sample_seq）
+    ts: float                               # 融合时刻（SensorSystem.clock.monotonic()）
+    center: Tuple[float, float, float]      # 几何中心 (cx, cy, cz)，未平滑
+    attitude: Tuple[float, float, float]    # (roll, pitch, yaw)
+    ids: Tuple[int, ...]
+    x: np.ndarray
+    y: np.ndarray
+    z: np.ndarray
+    forces: np.ndarray
+    geometry: Optional[GeometryResult] = None  # 几何计算失败时为 None
+
+def _readonly(a: np.ndarray) -> np.ndarray:
+    a.flags.writeable = False
+    return a
+
 class SensorSystem:
     def __init__(self, logger: Logger, mode: str = "mock",
                  port: Optional[str] = None, baud: int = 115200,
-                 fusion_rate_hz: float = 20.0, legs: Optional[list] = None):
+                 fusion_rate_hz: float = 20.0, legs: Optional[list] = None,
+                 clock=None, rng: Optional[random.Random] = None,
+                 source: Optional[Callable[[], Dict[str, Any]]] = None,
+                 telem_format: str = "text"):
+        """
+        mode: "serial"（串口遥测）/ "mock"（本地噪声）/ "sim"（由 source() 提供原始读数，
+              格式同 _snapshot_raw，供无头仿真/回放接入；可带 "fresh": False 表示沿用上一样本）
+        clock/rng: 时间源与随机源，默认系统时钟与全局 random
+        telem_format: "text"（37 行文本协议）/ "binary"（请求设备改发二进制遥测帧；
+              设备切换前或不支持时仍按文本解析，收到帧头后自动切到帧解码）
+        构造后可挂接的属性：recorder（BinaryRecorder，记录串口原始分片与每次融合的样本）、
+        history（TelemetryHistory，保存每个新融合样本，环形缓冲、内存有界）
+        """
         self.logger = logger
         self.mode = mode
         self.port = port
         self.baud = baud
         self.dt = 1.0 / max(1.0, fusion_rate_hz)
+        self.clock = clock or SYSTEM_CLOCK
+        self._rng = rng if rng is not None else random
+        self._source = source
+        self.recorder = None  # 可选 BinaryRecorder
+        self.history = None   # 可选 TelemetryHistory：每个新样本追加一条
 
-        self._center: Tuple[float, float, float] = (0.0, 0.0, 0.0)
         self._att: Tuple[float, float, float] = (0.0, 0.0, 0.0)
         self._forces: List[float] = [0.0]*12
         self._legs_z: List[float] = [600.0]*12
@@ -33,17 +85,33 @@ class SensorSystem:
         self._ser: Optional[SerialInterface] = None
         self._buf = bytearray()
 
+        # 二进制遥测：协商请求与解帧器
+        self.telem_format = telem_format
+        self._frames: Optional[FrameDecoder] = FrameDecoder() if telem_format == "binary" else None
+        self._binary_active = False
+        self._last_format_request = float("-inf")
+        self._stx_tail = b""            # 协商中分片末尾的 55（可能是跨分片帧头的前半）
+        self._bytes_since_frame = 0     # 二进制模式下自上一帧有效遥测以来收到的字节数
+
         # 可选：传入 LegUnit 列表引用，解析到的 z/xy 会写回到这些对象
         self._legs = legs
-        self._lock = threading.Lock()
+        self._ids: Tuple[int, ...] = tuple(leg_arrays(legs)[0]) if legs else tuple(range(1, 13))
 
-        # 批量日志控制
-        self._batch_data = {"imu": None, "legs": [None]*12}
-        self._legs_received_count = 0
+        # 遥测周期组装：解析写后台缓冲，12腿收齐后整体提交；_att/_forces/_legs_z/_legs_xy 只整体替换
+        self._assembler = CycleAssembler(12, on_commit=self._on_cycle)
+
+        # 完整遥测周期通知：串口线程每提交一个完整周期 seq 更新为周期号并唤醒等待者
+        self._cycle_cond = threading.Condition()
+        self._cycle_seq = 0
+        self._consumed_cycle_seq = 0
         
-        # 几何中心计算缓存
-        self._geometric_center_cache = (0.0, 0.0, 0.0)
+        # 融合结果：每个新样本融合一次，生成不可变 FusedSample 并整体替换发布
+        self._sample_seq = 0
+        self._sample: Optional[FusedSample] = None
 
+        if self.mode == "sim" and self._source is None:
+            self.logger.warn("sim 模式未提供 source，切回 mock")
+            self.mode = "mock"
         if self.mode == "serial":
             if SerialInterface is None:
                 self.logger.warn("未找到 hardware.serial_interface，切回 mock")
@@ -54,92 +122,102 @@ class SensorSystem:
                     self._ser.open()
                     self.logger.info(f"传感器串口打开：{self.port}@{self.baud}")
                     self._ser.start_reader(self._on_rx_bytes)
+                    if self._frames is not None:
+                        self._request_binary_telemetry()
                 except Exception as e:
                     self.logger.exception(e, "传感器串口打开失败，切回 mock")
                     self.mode = "mock"
 
     # 查询
+    def latest_sample(self) -> Optional[FusedSample]:
+        """最近发布的融合样本；尚未融合过时为 None"""
+        return self._sample
+
     def estimate_center(self) -> Tuple[float, float, float]: 
-        """返回估计的几何中心（融合几何计算结果）"""
-        self._update_geometric_center()  # 确保每次调用都更新几何中心
-        return self._geometric_center_cache
+        """返回最近一个样本的几何中心（融合时已算好，读取无副作用）"""
+        s = self._sample
+        return s.center if s is not None else (0.0, 0.0, 0.0)
+
+    @property
+    def sample_seq(self) -> int:
+        """融合样本序号：每融合到一份新数据 +1，供估计缓存判断是否需要重算"""
+        return self._sample_seq
+
+    @property
+    def sample_ts(self) -> float:
+        """最近一个新样本的融合时刻（self.clock.monotonic()）"""
+        s = self._sample
+        return s.ts if s is not None else 0.0
+
+    @property
+    def cycle_seq(self) -> int:
+        """已收齐的完整遥测周期数（仅 serial 模式递增）"""
+        return self._cycle_seq
+
+    def wait_for_cycle(self, after_seq: int, timeout: Optional[float] = None) -> bool:
+        """阻塞等待 seq > after_seq 的完整遥测周期；超时返回 False"""
+        with self._cycle_cond:
+            return self._cycle_cond.wait_for(lambda: self._cycle_seq > after_seq, timeout=timeout)
+
+    def latest_cycle(self) -> Optional[TelemetryCycle]:
+        """最近提交的完整遥测周期（serial 模式）；不标记为已消费"""
+        return self._assembler.latest()
+
+    def cycle_stats(self) -> CycleStats:
+        """周期组装统计：完整/丢弃(partial)/未消费被覆盖(dropped)/设备丢帧(lost)，及各腿缺失、迟到字段次数"""
+        return self._assembler.stats
 
     def estimate_attitude(self) -> Tuple[float, float, float]: return self._att
     def latest_forces(self) -> List[float]: return self._forces[:]
     def legs_state(self) -> Dict[str, Any]: return {"z": self._legs_z[:], "xy": self._legs_xy[:]}
 
-    def _update_geometric_center(self):
-        """更新几何中心计算"""
-        if not self._legs:
-            return
-            
-        try:
-            # 创建传感器快照
-            snap = self._create_sensor_snapshot()
-            
-            # 计算几何中心
-            geo_result = compute_center_and_theory(snap)
-            
-            # 更新缓存
-            cx = geo_result.Xc
-            cz = geo_result.Zc
-            
-            # 计算Y中心（只使用腿对(1,2)）
-            cy = 0.0
-            if 1 in snap.y_meas and 2 in snap.y_meas:
-                cy = (snap.y_meas[1] + snap.y_meas[2]) / 2.0
+    def refresh_once(self, timeout: Optional[float] = None):
+        """
+        融合一次传感器数据。
+        serial 模式下若自上次 refresh 起尚无新的完整周期，则最多等待 timeout 秒（默认 self.dt），
+        新周期一到立即返回；超时则沿用上一个融合样本，不重复融合。
+        serial 模式只融合已提交的完整周期（CycleAssembler），不会读到正在解析中的半个周期。
+        """
+        if self.mode == "serial":
+            last = self._consumed_cycle_seq
+            self._wait_fresh_cycle(last, self.dt if timeout is None else timeout)
+            cycle = self._assembler.consume()
+            fresh = cycle is not None and cycle.seq > last
+            if cycle is not None:
+                self._consumed_cycle_seq = cycle.seq
+                raw = cycle.as_raw()
             else:
-                # 如果腿对(1,2)数据不可用，回退到所有腿对平均
-                valid_pairs = 0
-                for i in range(1, 13, 2):
-                    if i in snap.y_meas and (i+1) in snap.y_meas:
-                        cy += (snap.y_meas[i] + snap.y_meas[i+1]) / 2.0
-                        valid_pairs += 1
-                cy = cy / max(1, valid_pairs)
-            
-            self._geometric_center_cache = (cx, cy, cz)
-            
-        except Exception as e:
-            if self.logger:
-                self.logger.warning(f"几何中心计算失败: {e}")
-
-    def _create_sensor_snapshot(self) -> SensorSnapshot:
-        """创建当前状态的传感器快照"""
-        y_meas = {}
-        z_meas = {}
-        x_meas = {}
-        force_meas = {}
-        healthy = {}
-        
-        for i, leg in enumerate(self._legs):
-            leg_id = getattr(leg, "id", i + 1)
-            y_meas[leg_id] = getattr(leg, "y", 0.0)
-            z_meas[leg_id] = getattr(leg, "z", 0.0)
-            x_meas[leg_id] = getattr(leg, "x", 0.0)
-            force_meas[leg_id] = getattr(leg, "force", 0.0)
-            healthy[leg_id] = True
-            
-        return SensorSnapshot(
-            y_meas=y_meas,
-            z_meas=z_meas,
-            x_meas=x_meas,
-            force=force_meas,
-            healthy=healthy
-        )
-
-    def refresh_once(self):
-        raw = self._snapshot_raw() if self.mode == "serial" else self._mock_pull()
-        self._fuse(raw)
-        
-        # 更新几何中心计算
-        self._update_geometric_center()
-        
-        cx, cy, cz = self._geometric_center_cache
-        r, p, y = self._att
+                raw = self._snapshot_raw()
+        elif self.mode == "sim":
+            raw = self._source()
+            fresh = bool(raw.get("fresh", True))
+        else:
+            fresh = True
+            raw = self._mock_pull()
+
+        # 新样本：融合一次并整体发布（同一样本只算一次）
+        if fresh or self._sample is None:
+            self._sample = self._fuse(raw)
+            if self.recorder is not None:
+                self.recorder.sample(self._sample.seq, True, raw)
+            if self.history is not None:
+                self.history.append_sample(self._sample)
+
+        if not self.logger.is_enabled(channel="telemetry"):
+            return
+        sample = self._sample
+        cx, cy, cz = sample.center
+        r, p, y = sample.attitude
         self.logger.telemetry(center_x=round(cx,2), center_y=round(cy,2), center_z=round(cz,1), 
                               roll=round(r,4), pitch=round(p,4),
-                              forces=[round(f,1) for f in self._forces])
-        time.sleep(self.dt)
+                              forces=[round(f,1) for f in sample.forces.tolist()])
+
+    def _wait_fresh_cycle(self, last: int, timeout: float) -> bool:
+        fresh = self.wait_for_cycle(last, timeout=max(0.0, timeout))
+        if not fresh:
+            self.logger.throttled_log("sensor_stale", f"等待新遥测周期超时（{timeout*1000:.0f}ms），沿用上一周期数据",
+                                      min_interval_s=5.0, level="DEBUG")
+        return fresh
 
     def shutdown(self):
         if self._ser:
@@ -149,86 +227,147 @@ class SensorSystem:
             except Exception:
                 pass
 
-    # 串口回调解析（文本协议）
+    def feed(self, chunk: bytes):
+        """注入一段串口原始字节（回放/测试用），与串口读线程回调走同一解析路径"""
+        self._on_rx_bytes(chunk)
+
+    # 串口回调解析
     def _on_rx_bytes(self, chunk: bytes):
         if not chunk: return
-        self._buf.extend(chunk)
-        while True:
-            pos = self._buf.find(b'\n')
-            if pos == -1: break
-            line = self._buf[:pos].decode(errors="ignore").strip()
-            del self._buf[:pos+1]
-            if line:
-                # 不再输出原始行，只输出解析后的合并信息
-                self._parse_line(line)
-
-    def _parse_line(self, line: str):
-        parts = [p.strip() for p in line.split(",")]
-        if len(parts) < 3: return
-
-        cmd = parts[0].upper()
+        if self.recorder is not None:
+            self.recorder.rx_chunk(chunk)
+        if self._frames is None:
+            self._rx_text(chunk)
+            return
+        if not self._binary_active:
+            # 协商中：设备切换前仍发文本；出现帧头即认为设备已切到二进制。
+            # 帧头可能跨分片（55 | AA）：末尾的 55 先留住，与下一分片拼起来再找
+            data = self._stx_tail + chunk if self._stx_tail else chunk
+            self._stx_tail = b""
+            pos = data.find(FRAME_STX)
+            if pos < 0:
+                if data[-1:] == FRAME_STX[:1]:
+                    data, self._stx_tail = data[:-1], data[-1:]
+                self._rx_text(data)
+                self._request_binary_telemetry(min_interval_s=1.0)
+                return
+            self._rx_text(data[:pos])
+            chunk = data[pos:]
+            self._buf.clear()
+            self._binary_active = True
+            self._bytes_since_frame = 0
+            self.logger.info("传感器遥测已切换为二进制帧")
+        self._bytes_since_frame += len(chunk)
+        for frame in self._frames.feed(chunk):
+            if frame.cmd == CMD_TELEMETRY:
+                try:
+                    self._on_telemetry_frame(decode_telemetry(frame.payload))
+                    self._bytes_since_frame = 0
+                except ValueError as e:
+                    self.logger.throttled_log("sensor_frame", f"遥测帧解析失败: {e}", min_interval_s=5.0, level="WARN")
+        if self._bytes_since_frame > BINARY_FALLBACK_BYTES:
+            self._fallback_to_text()
+
+    def _fallback_to_text(self):
+        """二进制模式下长时间没有有效帧（设备回到文本/帧全部损坏）：回到协商状态，按文本解析并限频重新请求二进制"""
+        self.logger.warn(f"连续 {self._bytes_since_frame} 字节无有效遥测帧，回退文本解析")
+        self._binary_active = False
+        self._bytes_since_frame = 0
+        self._frames = FrameDecoder()
+        self._buf.clear()
+
+    def _request_binary_telemetry(self, min_interval_s: float = 0.0):
+        """在遥测口发送格式协商帧（仅 serial 模式；设备未响应时按 min_interval_s 限频重发）"""
+        if self._ser is None:
+            return
+        now = self.clock.monotonic()
+        if now - self._last_format_request < min_interval_s:
+            return
+        self._last_format_request = now
         try:
-            if cmd == "IMU":
-                roll, pitch, yaw = float(parts[1]), float(parts[2]), float(parts[3])
-                self._att = (roll, pitch, yaw)
-                # 立即输出IMU信息
-                if self.logger:
-                    self.logger.serial(f"RX IMU: roll={roll:.4f}, pitch={pitch:.4f}, yaw={yaw:.4f}", direction="RX")
-
-            elif cmd in ("FOR", "Z", "XY"):
+            self._ser.write(pack_frame(CMD_SET_TELEM_FORMAT, bytes([TELEM_BINARY])))
+        except Exception as e:
+            self.logger.throttled_log("sensor_format", f"遥测格式协商帧发送失败: {e}", min_interval_s=5.0, level="WARN")
+
+    def _on_telemetry_frame(self, t: TelemetryFrame):
+        """一帧即一个完整周期，直接整帧提交"""
+        self._assembler.commit_frame(t.seq, t.attitude, t.forces.tolist(), t.z.tolist(),
+                                     zip(t.x.tolist(), t.y.tolist()))
+
+    def _rx_text(self, chunk: bytes):
+        """
+        文本协议按分片整体解析：一次 split 切出分片内全部完整行，缓冲区头部每个分片只删除一次，
+        末尾不完整的行留在 _buf 中等待后续分片（原逐行 find + del 在大分片时为平方复杂度）。
+        """
+        if not chunk: return
+        buf = self._buf
+        start = len(buf)  # 缓冲区内已有内容不含换行，只需从新数据处查找
+        buf += chunk
+        end = buf.rfind(b'\n', start)
+        if end < 0: return
+        lines = bytes(buf[:end]).split(b'\n')
+        del buf[:end + 1]
+        self._parse_lines(lines)
+
+    def _parse_lines(self, lines: List[bytes]):
+        """
+        批量解析完整行（bytes，不解码）：float()/int() 直接接受带空白的 bytes，省去逐字段 strip；
+        命令字按 bytes 字典分派，非规范写法（小写/带空格）才回退 strip().upper()。
+        数值写入 CycleAssembler 后台缓冲，IMU 行开启新周期，12腿收齐时由组装器提交。
+        """
+        asm = self._assembler
+        for line in lines:
+            parts = line.split(b",")
+            if len(parts) < 3:
+                continue
+            kind = _RX_KINDS.get(parts[0])
+            if kind is None:
+                kind = _RX_KINDS.get(parts[0].strip().upper())
+                if kind is None:
+                    continue
+            try:
+                if kind == _RX_IMU:
+                    roll, pitch, yaw = float(parts[1]), float(parts[2]), float(parts[3])
+                    asm.begin((roll, pitch, yaw))
+                    # 立即输出IMU信息
+                    if self.logger:
+                        self.logger.serial("RX IMU: roll=%.4f, pitch=%.4f, yaw=%.4f", roll, pitch, yaw, direction="RX")
+                    continue
+
                 idx = int(parts[1]) - 1
-                if 0 <= idx < 12:
-                    if cmd == "FOR":
-                        force = float(parts[2])
-                        self._forces[idx] = force
-                        # 更新批量数据
-                        if self._batch_data["legs"][idx] is None:
-                            self._batch_data["legs"][idx] = {}
-                        self._batch_data["legs"][idx]["F"] = force
-                        
-                    elif cmd == "Z":
-                        z_mm = float(parts[2])
-                        self._legs_z[idx] = z_mm
-                        # 更新批量数据
-                        if self._batch_data["legs"][idx] is None:
-                            self._batch_data["legs"][idx] = {}
-                        self._batch_data["legs"][idx]["Z"] = z_mm
-                        
-                    elif cmd == "XY":
-                        x_mm, y_mm = float(parts[2]), float(parts[3])
-                        self._legs_xy[idx] = (x_mm, y_mm)
-                        # 更新批量数据
-                        if self._batch_data["legs"][idx] is None:
-                            self._batch_data["legs"][idx] = {}
-                        self._batch_data["legs"][idx]["X"] = x_mm
-                        self._batch_data["legs"][idx]["Y"] = y_mm
-                        
-                        # 当收到XY时，检查该腿是否收齐了XYZF数据，如果是则累计
-                        leg_data = self._batch_data["legs"][idx]
-                        if all(k in leg_data for k in ["X", "Y", "Z", "F"]):
-                            self._legs_received_count += 1
-                            
-                        # 如果所有12个腿子都收齐了，输出批量信息
-                        if self._legs_received_count >= 12:
-                            self._output_batch_legs()
-                            self._reset_batch_data()
-                            
-        except (ValueError, IndexError):
-            pass
-
-    def _output_batch_legs(self):
+                if not 0 <= idx < 12:
+                    continue
+                if kind == _RX_FOR:
+                    asm.put(FIELD_F, idx, float(parts[2]))
+                elif kind == _RX_Z:
+                    asm.put(FIELD_Z, idx, float(parts[2]))
+                else:
+                    asm.put(FIELD_XY, idx, (float(parts[2]), float(parts[3])))
+            except (ValueError, IndexError):
+                pass
+
+    def _on_cycle(self, cycle: TelemetryCycle):
+        """组装器提交完整周期（解析线程）：整体替换查询用的数组引用，输出批量日志并唤醒控制线程"""
+        self._att = cycle.att
+        self._forces = list(cycle.forces)
+        self._legs_z = list(cycle.z)
+        self._legs_xy = list(cycle.xy)
+        self._output_batch_legs(cycle)
+        stats = self._assembler.stats
+        if stats.partial and self.logger:
+            self.logger.throttled_log("sensor_partial",
+                                      lambda: f"遥测周期不完整已丢弃 {stats.partial} 个（丢帧 {stats.lost}）",
+                                      min_interval_s=10.0, level="WARN")
+        self._publish_cycle(cycle.seq)
+
+    def _output_batch_legs(self, cycle: TelemetryCycle):
         """输出所有腿子的批量信息到一行"""
-        if not self.logger:
+        if not self.logger or not self.logger.is_enabled(channel="serial"):
             return
             
         leg_parts = []
-        for i in range(12):
-            leg_data = self._batch_data["legs"][i]
-            if leg_data and all(k in leg_data for k in ["X", "Y", "Z", "F"]):
-                x, y, z, f = leg_data["X"], leg_data["Y"], leg_data["Z"], leg_data["F"]
-                leg_parts.append(f"L{i+1:02d}({x:.0f},{y:.0f},{z:.0f},{f:.0f})")
-            else:
-                leg_parts.append(f"L{i+1:02d}(---)")
+        for i, ((x, y), z, f) in enumerate(zip(cycle.xy, cycle.z, cycle.forces)):
+            leg_parts.append(f"L{i+1:02d}({x:.0f},{y:.0f},{z:.0f},{f:.0f})")
         
         # 分成两行，每行6个腿子，避免过长
         line1 = " ".join(leg_parts[:6])
@@ -236,10 +375,11 @@ class SensorSystem:
         self.logger.serial(f"RX LEGS1-6:  {line1}", direction="RX")
         self.logger.serial(f"RX LEGS7-12: {line2}", direction="RX")
 
-    def _reset_batch_data(self):
-        """重置批量数据"""
-        self._batch_data = {"imu": None, "legs": [None]*12}
-        self._legs_received_count = 0
+    def _publish_cycle(self, seq: int):
+        """一轮12腿数据收齐：更新周期号并唤醒等待中的控制线程"""
+        with self._cycle_cond:
+            self._cycle_seq = seq
+            self._cycle_cond.notify_all()
 
     def _snapshot_raw(self) -> Dict[str, Any]:
         return {"att": self._att, "forces": self._forces[:],
@@ -247,49 +387,70 @@ class SensorSystem:
 
     # —— mock 不再“自动下降”，只加微小噪声 ——
     def _mock_pull(self) -> Dict[str, Any]:
-        import random
-        self._att = (self._att[0]*0.9 + random.uniform(-0.002,0.002),
-                     self._att[1]*0.9 + random.uniform(-0.002,0.002), 0.0)
+        rnd = self._rng
+        self._att = (self._att[0]*0.9 + rnd.uniform(-0.002,0.002),
+                     self._att[1]*0.9 + rnd.uniform(-0.002,0.002), 0.0)
         # 轻微噪声，不改变趋势
-        self._forces = [max(0.0, f + random.uniform(-1.0, 1.0)) for f in self._forces]
-        self._legs_z = [z + random.uniform(-0.3, 0.3) for z in self._legs_z]
-        self._legs_xy = [(xy[0]+random.uniform(-0.1,0.1), xy[1]+random.uniform(-0.1,0.1)) for xy in self._legs_xy]
+        self._forces = [max(0.0, f + rnd.uniform(-1.0, 1.0)) for f in self._forces]
+        self._legs_z = [z + rnd.uniform(-0.3, 0.3) for z in self._legs_z]
+        self._legs_xy = [(xy[0]+rnd.uniform(-0.1,0.1), xy[1]+rnd.uniform(-0.1,0.1)) for xy in self._legs_xy]
         return self._snapshot_raw()
 
-    # 融合（中心Z取 5..8 平均）
-    def _fuse(self, raw: Dict[str, Any]):
-        z = raw.get("z", self._legs_z)
-        cz = (z[4] + z[5] + z[6] + z[7]) / 4.0 if len(z) >= 8 else 0.0
-        
-        # 计算几何中心XY（使用与_update_geometric_center相同的逻辑）
-        cx, cy = 0.0, 0.0
-        if hasattr(self, '_legs') and self._legs and len(self._legs) >= 2:
-            # 使用腿对(1,2)计算Yc
-            try:
-                cy = (self._legs[0].y + self._legs[1].y) / 2.0  # 腿子1,2对应索引0,1
-            except:
-                cy = 0.0
-        
-        self._center = (cx, cy, cz)
-        self._att = raw.get("att", self._att)
+    # 融合：原始读数 -> FusedSample（几何中心一次算好）并写回腿子对象
+    def _fuse(self, raw: Dict[str, Any]) -> FusedSample:
+        self._att = tuple(raw.get("att", self._att))
         self._forces = raw.get("forces", self._forces)
         self._legs_z = raw.get("z", self._legs_z)
         self._legs_xy = raw.get("xy", self._legs_xy)
 
-        # 将解析到的传感器值写回 LegUnit（如果传入了 legs 引用）
-        if self._legs:
-            try:
-                with self._lock:
-                    n = min(len(self._legs), len(self._legs_z), len(self._legs_xy))
-                    for i in range(n):
-                        try:
-                            leg = self._legs[i]
-                            # 将 Z/XY 直接写回 leg（单位：mm），保持防护性赋值
-                            setattr(leg, "z", float(self._legs_z[i]))
-                            x, y = self._legs_xy[i]
-                            setattr(leg, "x", float(x))
-                            setattr(leg, "y", float(y))
-                        except Exception:
-                            pass
-            except Exception:
-                pass
+        n = min(len(self._legs_z), len(self._legs_xy), len(self._ids))
+        ids = self._ids[:n]
+        zs = [float(v) for v in self._legs_z[:n]]
+        xs = [float(p[0]) for p in self._legs_xy[:n]]
+        ys = [float(p[1]) for p in self._legs_xy[:n]]
+
+        geo = None
+        y_meas = dict(zip(ids, ys))
+        try:
+            geo = compute_center_and_theory(SensorSnapshot(
+                y_meas=y_meas, z_meas=dict(zip(ids, zs)), x_meas=dict(zip(ids, xs)),
+                force=dict(zip(ids, self._forces)), healthy=dict.fromkeys(ids, True)))
+            cx, cz = geo.Xc, geo.Zc
+        except Exception as e:
+            self.logger.throttled_log("sensor_geometry", f"几何中心计算失败: {e}", min_interval_s=5.0, level="WARN")
+            cx = 0.0
+            cz = sum(zs[4:8]) / 4.0 if n >= 8 else 0.0
+
+        # Y中心：只使用腿对(1,2)；不可用时回退到所有腿对平均
+        if 1 in y_meas and 2 in y_meas:
+            cy = (y_meas[1] + y_meas[2]) / 2.0
+        else:
+            mids = [(y_meas[i] + y_meas[i+1]) / 2.0 for i in range(1, 13, 2) if i in y_meas and (i+1) in y_meas]
+            cy = sum(mids) / max(1, len(mids))
+
+        self._sample_seq += 1
+        sample = FusedSample(seq=self._sample_seq, ts=self.clock.monotonic(), center=(cx, cy, cz),
+                             attitude=self._att, ids=ids,
+                             x=_readonly(np.array(xs)), y=_readonly(np.array(ys)), z=_readonly(np.array(zs)),
+                             forces=_readonly(np.array(self._forces, dtype=float)), geometry=geo)
+        self._write_back(sample)
+        return sample
+
+    def _write_back(self, sample: FusedSample):
+        """将样本的 Z/XY 写回 LegUnit（如果传入了 legs 引用）"""
+        st = store_of(self._legs)
+        if st is not None:
+            n = min(st.n, len(sample.z))
+            st.z[:n] = sample.z[:n]
+            st.x[:n] = sample.x[:n]
+            st.y[:n] = sample.y[:n]
+        elif self._legs:
+            for i in range(min(len(self._legs), len(sample.z))):
+                try:
+                    leg = self._legs[i]
+                    # 将 Z/XY 直接写回 leg（单位：mm），保持防护性赋值
+                    setattr(leg, "z", float(sample.z[i]))
+                    setattr(leg, "x", float(sample.x[i]))
+                    setattr(leg, "y", float(sample.y[i]))
+                except Exception:
+                    pass
@@ -0,0 +1,222 @@
+# core/simulation.py
+# 无头仿真：VirtualClock 驱动 ControlSystem.tick_once 背靠背执行（无线程、无 sleep、无 GUI），
+# 被控对象 SimulatedRig 持有真值状态并产生带噪声的传感器读数；用于回归测试与参数整定
+import argparse
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from core.center_estimator import CenterEstimator
+from core.clock import VirtualClock
+from core.control_system import ControlGains, ControlSystem
+from core.leg_unit import FIXED_POSITIONS, LegStateStore
+from core.logger import Logger
+from core.recorder import BinaryRecorder
+from core.sensor_system import SensorSystem
+from hardware.driver_mock import DriverMock
+
+@dataclass
+class Scenario:
+    seed: int = 0
+    z0_mm: float = 600.0                 # 初始平均高度
+    z_spread_mm: float = 20.0            # 初始高度随机散布 ±
+    period_ms: float = 500.0             # 控制周期（虚拟时间）
+    rate_mm_s: float = 10.0              # 中心下降速率
+    max_single_step_mm: Optional[float] = None  # None 时取 rate*period（与 MainController 一致）
+    noise_z_mm: float = 0.3              # 传感器噪声（均匀分布 ±）
+    noise_xy_mm: float = 0.1
+    force_n: float = 100.0
+    noise_force_n: float = 1.0
+    disturbance_amplitude_mm: float = 0.0   # XY 扰动幅度，0 为关闭
+    disturbance_frequency_hz: float = 0.5
+    command_deadband_mm: float = 1.0     # 单腿命令任一轴 |Δ| 超过此值才计入 commands（滤掉成对X抖动与噪声级修正）
+    planner_backend: str = "python"
+    gains: ControlGains = field(default_factory=ControlGains)
+
+@dataclass
+class SimulationResult:
+    scenario: Scenario
+    completed: bool                      # 是否满足完成条件（下降到位且调平稳定）
+    ticks: int
+    sim_time_s: float                    # 虚拟时间
+    wall_time_s: float                   # 实际耗时
+    completion_time_s: Optional[float]
+    final_center_z: float                # 估计中心Z（EMA）
+    final_truth_center_z: float          # 真值中心腿平均Z
+    max_corner_err_mm: float             # 全程最大 |角点相对高差|（真值，每个 tick 指令执行后测量）
+    final_corner_err_mm: float
+    max_corner_spread_mm: float          # 全程最大四角高差（最高角 - 最低角，真值，指令执行后测量）
+    mean_corner_spread_mm: float         # 下降过程中四角高差的均值（不含完成时收敛归位的最后一个 tick）
+    commands: int                        # 下发的单腿命令数（任一轴 |Δ| > command_deadband_mm）
+    corrections: int                     # 其中的修正命令：dz 超出本批共同下降量或 |dx|/|dy| 超过死区
+    batches: int                         # 批量下发次数
+    trace: Dict[str, np.ndarray] = field(default_factory=dict)  # 逐 tick 的 t/center_z/corner_err/corner_spread
+
+def _xy_disturbance(t: float, amplitude: float, frequency: float, n: int):
+    """与 MockSerialDevice._calculate_xy_disturbance 同式，按腿向量化"""
+    k = np.arange(n)
+    phase = k * 0.1
+    amp = amplitude * (1.0 + (k % 3 - 1) * 0.1)
+    w = 2 * math.pi * frequency
+    dx = amp * np.sin(w * t + phase) + 0.3 * amplitude * np.sin(w * 3 * t + phase)
+    dy = amp * 0.8 * np.cos(w * 0.7 * t + math.pi / 3 + phase) + 0.2 * amplitude * np.cos(w * 2.5 * t + phase)
+    return dx, dy
+
+class SimulatedRig(DriverMock):
+    """
+    仿真被控对象：
+      - 真值状态保存在自有的 LegStateStore（truth），与控制侧 legs 分离
+      - 命令语义与实机/MockSerialDevice 一致：正 dz 为下降（z 减小），dx/dy 为增量
+      - read_raw() 返回带噪声（及可选XY扰动）的读数，格式同 SensorSystem._snapshot_raw
+    """
+    Z_SIGN = -1.0
+
+    def __init__(self, scenario: Scenario, clock: VirtualClock, rng: random.Random, logger=None):
+        self.truth = LegStateStore(12)
+        sc = scenario
+        self.truth.set_positions(x=[p[0] for p in FIXED_POSITIONS], y=[p[1] for p in FIXED_POSITIONS],
+                                 z=[sc.z0_mm + rng.uniform(-sc.z_spread_mm, sc.z_spread_mm) for _ in range(12)])
+        self.truth.force[:] = sc.force_n
+        super().__init__(legs=self.truth.legs, logger=logger, clock=clock)
+        self._sc = sc
+        self._np_rng = np.random.default_rng(rng.getrandbits(64))
+        self._t0 = clock.monotonic()
+        self.batches = 0
+        self.commands = 0
+        self.corrections = 0
+
+    def apply_batch(self, cmds) -> bool:
+        self.batches += 1
+        db = self._sc.command_deadband_mm
+        base = min((c.get("dz", 0.0) for c in cmds), default=0.0)   # 全腿共同下降量
+        for c in cmds:
+            dz, dx, dy = abs(c.get("dz", 0.0)), abs(c.get("dx", 0.0)), abs(c.get("dy", 0.0))
+            if max(dz, dx, dy) > db:
+                self.commands += 1
+            if c.get("dz", 0.0) - base > db or max(dx, dy) > db:
+                self.corrections += 1
+        return super().apply_batch(cmds)
+
+    def read_raw(self) -> Dict[str, Any]:
+        st, sc, g = self.truth, self._sc, self._np_rng
+        n = st.n
+        x, y = st.x, st.y
+        if sc.disturbance_amplitude_mm > 0:
+            dx, dy = _xy_disturbance(self._clock.monotonic() - self._t0,
+                                     sc.disturbance_amplitude_mm, sc.disturbance_frequency_hz, n)
+            x, y = x + dx, y + dy
+        x = x + g.uniform(-sc.noise_xy_mm, sc.noise_xy_mm, n)
+        y = y + g.uniform(-sc.noise_xy_mm, sc.noise_xy_mm, n)
+        z = st.z + g.uniform(-sc.noise_z_mm, sc.noise_z_mm, n)
+        f = np.maximum(0.0, st.force + g.uniform(-sc.noise_force_n, sc.noise_force_n, n))
+        att = g.uniform(-0.002, 0.002, 2)
+        return {"att": (float(att[0]), float(att[1]), 0.0), "forces": f.tolist(),
+                "z": z.tolist(), "xy": list(zip(x.tolist(), y.tolist()))}
+
+    def truth_center_z(self, center_idx=(4, 5, 6, 7)) -> float:
+        return float(self.truth.z[list(center_idx)].mean())
+
+    def truth_corner_error(self, corner_idx=(0, 1, 10, 11), center_idx=(4, 5, 6, 7)):
+        """真值角点误差：(max |角点z - 中心z|, 最高角 - 最低角)"""
+        corners = self.truth.z[list(corner_idx)]
+        rel = corners - self.truth_center_z(center_idx)
+        return float(np.abs(rel).max()), float(corners.max() - corners.min())
+
+def simulate(scenario: Optional[Scenario] = None, duration: float = 120.0,
+             logger: Optional[Logger] = None, record_trace: bool = True,
+             record_path: Optional[str] = None) -> SimulationResult:
+    """
+    以虚拟时间运行 duration 秒（或直到完成条件满足），返回结果与逐 tick 轨迹。
+    同一 scenario（含 seed）结果可复现。record_path 非空时同时写二进制记录（可用 core.replay 回放）。
+    """
+    sc = scenario or Scenario()
+    clock = VirtualClock()
+    rng = random.Random(sc.seed)
+    logger = logger or Logger(level="ERROR", console=False)
+
+    rig = SimulatedRig(sc, clock, rng, logger=logger)
+    legs = LegStateStore(12).legs
+    sensor = SensorSystem(logger, mode="sim", legs=legs, source=rig.read_raw, clock=clock, rng=rng)
+    sensor.refresh_once()  # 首次采样：用测量值初始化控制侧腿子状态（理论几何中心据此固定）
+    estimator = CenterEstimator(clock=clock)
+    control = ControlSystem(legs, logger, None, estimator, sensor, rig,
+                            planner_backend=sc.planner_backend, clock=clock, rng=rng, gains=sc.gains)
+
+    period_s = sc.period_ms / 1000.0
+    step = sc.max_single_step_mm if sc.max_single_step_mm is not None else sc.rate_mm_s * period_s
+    recorder = None
+    if record_path:
+        recorder = BinaryRecorder(record_path, clock=clock)
+        sensor.recorder = recorder
+        control.set_recorder(recorder)
+    control.update_control_params(sc.period_ms, sc.rate_mm_s, step)
+    control.period_s = period_s
+    control.begin_run()
+
+    n_max = max(1, int(math.ceil(duration / period_s)))
+    t_hist = np.zeros(n_max)
+    cz_hist = np.zeros(n_max)
+    err_hist = np.zeros(n_max)
+    spread_hist = np.zeros(n_max)
+    ticks = 0
+    completion_time = None
+
+    wall0 = time.perf_counter()
+    for k in range(n_max):
+        control.tick_once()
+        ticks += 1
+        state = estimator.latest_state()
+        t_hist[k] = clock.monotonic()
+        cz_hist[k] = state.center_z
+        # 角差取本 tick 指令执行后的真值（估计器状态是指令下发前的测量，且含EMA滞后）
+        err_hist[k], spread_hist[k] = rig.truth_corner_error()
+        if control.is_completed():
+            completion_time = clock.monotonic()
+            break
+        clock.advance(period_s)
+    wall = time.perf_counter() - wall0
+    if recorder is not None:
+        recorder.close()
+
+    # 完成当拍各腿被归位到目标高度，四角高差恒为0，不计入均值
+    n_descent = ticks - 1 if completion_time is not None and ticks > 1 else ticks
+    trace = {}
+    if record_trace:
+        trace = {"t": t_hist[:ticks], "center_z": cz_hist[:ticks], "corner_err": err_hist[:ticks],
+                 "corner_spread": spread_hist[:ticks]}
+    return SimulationResult(
+        scenario=sc, completed=control.is_completed(), ticks=ticks,
+        sim_time_s=clock.monotonic(), wall_time_s=wall, completion_time_s=completion_time,
+        final_center_z=float(cz_hist[ticks - 1]), final_truth_center_z=rig.truth_center_z(),
+        max_corner_err_mm=float(err_hist[:ticks].max()), final_corner_err_mm=float(err_hist[ticks - 1]),
+        max_corner_spread_mm=float(spread_hist[:ticks].max()), mean_corner_spread_mm=float(spread_hist[:n_descent].mean()),
+        commands=rig.commands, corrections=rig.corrections, batches=rig.batches,
+        trace=trace,
+    )
+
+def main():
+    ap = argparse.ArgumentParser(description="无头仿真：虚拟时钟下快速运行一次完整下降")
+    ap.add_argument("--duration", type=float, default=120.0, help="最长仿真时间（虚拟秒）")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--period-ms", type=float, default=500.0)
+    ap.add_argument("--rate", type=float, default=10.0, help="中心下降速率 mm/s")
+    ap.add_argument("--planner", choices=["python", "numpy"], default="python")
+    ap.add_argument("--disturbance-amplitude", type=float, default=0.0, help="XY扰动幅度（mm），0为关闭")
+    ap.add_argument("--record", default=None, help="同时写入二进制记录文件（可用 python -m core.replay 回放）")
+    args = ap.parse_args()
+
+    sc = Scenario(seed=args.seed, period_ms=args.period_ms, rate_mm_s=args.rate,
+                  planner_backend=args.planner, disturbance_amplitude_mm=args.disturbance_amplitude)
+    res = simulate(sc, args.duration, record_path=args.record)
+    status = f"完成于 {res.completion_time_s:.1f}s" if res.completed else "未完成"
+    print(f"[Simulation] {status}：tick={res.ticks}，虚拟时间{res.sim_time_s:.1f}s，实际耗时{res.wall_time_s*1000:.1f}ms")
+    print(f"[Simulation] 中心Z 估计{res.final_center_z:.2f}mm / 真值{res.final_truth_center_z:.2f}mm，"
+          f"最大角差{res.max_corner_err_mm:.2f}mm，最终角差{res.final_corner_err_mm:.2f}mm，"
+          f"四角高差 最大{res.max_corner_spread_mm:.2f}mm/均值{res.mean_corner_spread_mm:.2f}mm，命令数{res.commands}（修正{res.corrections}）")
+
+if __name__ == "__main__":
+    main()
@@ -11,14 +11,22 @@ import sys
 import os
 from PIL import Image, ImageTk
 
+from core.leg_unit import store_of
+from gui.refresh_scheduler import RefreshScheduler
+
 matplotlib.rcParams['font.sans-serif'] = ['SimHei']
 matplotlib.rcParams['axes.unicode_minus'] = False
 
 DRAIN_INTERVAL_MS = 50  # 日志队列刷新周期
+LOG_MAX_LINES = 2000    # 每个日志窗口保留的最大行数（超出删除最早的行）
+REFRESH_MAX_FPS = 20    # 图表/输入框最大刷新帧率（控制循环更快时多次更新合并为一帧）
+DRAIN_MAX_MESSAGES = 500  # 每次刷新最多取出的日志条数（其余留待下次，避免突发时长时间占用主线程）
 
 class GUIController:
-    def __init__(self, parent, controller):
+    def __init__(self, parent, controller, max_fps: float = REFRESH_MAX_FPS,
+                 log_max_lines: int = LOG_MAX_LINES):
         self.parent = parent  # 可滚动的Frame
+        self.log_max_lines = int(log_max_lines)
         self.root = parent.winfo_toplevel()  # 获取顶层窗口
         self.controller = controller
         self.logger = controller.logger
@@ -59,6 +67,10 @@ class GUIController:
         self.status_label = tk.Label(top, text="运行状态：初始化完成", font=("黑体", 14))
         self.status_label.pack(side=tk.LEFT, padx=10)
         
+        # 控制循环调度统计（实际频率/抖动/超时）
+        self.loop_stats_label = tk.Label(top, text="实际频率：-", font=("宋体", 12), fg="gray")
+        self.loop_stats_label.pack(side=tk.LEFT, padx=10)
+        
         # 中心信息显示（合并所有中心信息）
         self.center_info_label = tk.Label(top, text="目标中心Z：-  实际中心：-  几何中心：-", font=("宋体", 20))
         self.center_info_label.pack(side=tk.RIGHT, padx=10)
@@ -152,6 +164,7 @@ class GUIController:
         
         self.canvas = FigureCanvasTkAgg(fig, master=self.parent)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self._build_charts()
 
         # 底部三个板块横向排列
         bottom_frame = tk.Frame(self.parent)
@@ -213,6 +226,9 @@ class GUIController:
         self.status_log_window.configure(xscrollcommand=None)
         self.status_log_window.pack(fill=tk.BOTH, expand=True)
 
+        # 刷新调度（脏标记 + 帧率上限），所有刷新请求都经由它合并
+        self.refresh_scheduler = RefreshScheduler(self.root, self._refresh, max_fps=max_fps)
+
         # 将 GUI 更新函数给控制器
         self.controller.update_ui = self._threadsafe_update
 
@@ -525,8 +541,9 @@ class GUIController:
         else:
             return
         
-        # 记录移动后的坐标
+        # 记录移动后的坐标；估计器缓存随之失效
         new_x, new_y, new_z = leg.x, leg.y, leg.z
+        self.controller.estimator.mark_legs_changed()
         
         # 输出日志
         if direction in ['left', 'right', 'up', 'down']:
@@ -603,9 +620,8 @@ class GUIController:
 
     def _update_main_display(self):
         """更新主界面显示"""
-        # 触发主界面的刷新，以显示腿子颜色变化
-        if hasattr(self, '_refresh'):
-            self._refresh()
+        # 请求主界面刷新，以显示腿子颜色变化（与控制循环的更新合并到下一帧）
+        self.refresh_scheduler.request()
 
     def _load_gif_frames(self, leg_index):
         """加载指定腿子的GIF帧"""
@@ -910,57 +926,62 @@ class GUIController:
 
     # ——— 线程安全 UI 更新入口 ———
     def _threadsafe_update(self, full_text, short_text):
-        if self.root and self.root.winfo_exists():
-            self.root.after(0, lambda: self._refresh(status_text=full_text))
+        # 控制线程每个周期调用：只置脏标记，重绘由调度器按帧率上限在主线程执行
+        self.refresh_scheduler.request(status_text=full_text)
 
     # ——— 定时从队列取日志并写入 Text（核心修复点） ———
     def _schedule_drain_logs(self):
-        # 处理主日志队列（按级别分流）
-        while not self.logger.gui_queue.empty():
-            s = self.logger.gui_queue.get_nowait()
-            
-            # 判断日志级别，INFO级别显示到右侧"系统运行状态"，其他显示到左侧"控制循环"
-            if "[INFO]" in s:
-                # INFO级别日志显示到系统运行状态窗口
-                self.status_log_window.insert(tk.END, s+"\n")
-                self.status_log_window.see(tk.END)
-            else:
-                # DEBUG、WARN、ERROR等其他级别显示到控制循环窗口
-                self.log_window.insert(tk.END, s+"\n")
-                self.log_window.see(tk.END)
-        
+        # 先按目标窗口分组，每个窗口每轮只 insert 一次、滚动一次，并裁剪到 log_max_lines 行
+        status_lines, loop_lines, tx_lines, rx_lines = [], [], [], []
+
+        # 处理主日志队列（按级别分流）；每次批量取出，单次最多 DRAIN_MAX_MESSAGES 条
+        # INFO级别显示到右侧"系统运行状态"，DEBUG、WARN、ERROR等其他级别显示到左侧"控制循环"
+        for s in self.logger.gui_queue.drain(DRAIN_MAX_MESSAGES):
+            (status_lines if "[INFO]" in s else loop_lines).append(s)
+
         # 串口日志队列处理（分流TX/RX和其他内容）
-        while not self.logger.serial_queue.empty():
-            s = self.logger.serial_queue.get_nowait()
-            
-            # 判断是否为TX/RX内容
-            if "[SERIAL:TX]" in s or "[SERIAL:RX]" in s:
-                # 如果串口监视器窗口存在，则显示到对应窗口
-                if self.serial_monitor_window and self.serial_monitor_window.winfo_exists():
-                    if "[SERIAL:TX]" in s:
-                        self.serial_monitor_window.tx_window.insert(tk.END, s+"\n")
-                        self.serial_monitor_window.tx_window.see(tk.END)
-                    elif "[SERIAL:RX]" in s:
-                        self.serial_monitor_window.rx_window.insert(tk.END, s+"\n")
-                        self.serial_monitor_window.rx_window.see(tk.END)
+        for s in self.logger.serial_queue.drain(DRAIN_MAX_MESSAGES):
+            if "[SERIAL:TX]" in s:
+                tx_lines.append(s)
+            elif "[SERIAL:RX]" in s:
+                rx_lines.append(s)
             else:
                 # 非TX/RX的串口内容按级别分流
-                if "[INFO]" in s:
-                    self.status_log_window.insert(tk.END, s+"\n")
-                    self.status_log_window.see(tk.END)
-                else:
-                    self.log_window.insert(tk.END, s+"\n")
-                    self.log_window.see(tk.END)
-        
+                (status_lines if "[INFO]" in s else loop_lines).append(s)
+
+        self._append_log_lines(self.status_log_window, status_lines)
+        self._append_log_lines(self.log_window, loop_lines)
+        # TX/RX 仅在串口监视器窗口存在时显示（未打开时丢弃）
+        if (tx_lines or rx_lines) and self.serial_monitor_window and self.serial_monitor_window.winfo_exists():
+            self._append_log_lines(self.serial_monitor_window.tx_window, tx_lines)
+            self._append_log_lines(self.serial_monitor_window.rx_window, rx_lines)
+
         self.root.after(DRAIN_INTERVAL_MS, self._schedule_drain_logs)
 
+    def _append_log_lines(self, widget, lines):
+        """一次性追加多行并滚动到底；超过 log_max_lines 时删除最早的行，保持控件大小恒定"""
+        if not lines:
+            return
+        widget.insert(tk.END, "\n".join(lines) + "\n")
+        # 末尾总有一个空行，总行数 = 最后索引的行号 - 1
+        excess = int(widget.index("end-1c").split(".")[0]) - 1 - self.log_max_lines
+        if excess > 0:
+            widget.delete("1.0", f"{excess + 1}.0")
+        widget.see(tk.END)
+
     # ——— 绘图与输入框刷新（仍在主线程） ———
     def _refresh(self, status_text=""):
         self.status_label.config(text=f"运行状态：{status_text}")
+        self._update_loop_stats()
         
-        # 直接使用LegUnit数据，确保显示的是控制器实际使用的数据
-        display_z = [l.z for l in self.legs]
-        display_xy = [(l.x, l.y) for l in self.legs]
+        # 直接使用LegUnit数据，确保显示的是控制器实际使用的数据（有 LegStateStore 时整块读取）
+        st = store_of(self.legs)
+        if st is not None:
+            display_z = st.z.tolist()
+            display_xy = list(zip(st.x.tolist(), st.y.tolist()))
+        else:
+            display_z = [l.z for l in self.legs]
+            display_xy = [(l.x, l.y) for l in self.legs]
         
         # 获取各种中心点信息
         cz = sum(display_z[i] for i in [4,5,6,7]) / 4.0  # 实际中心Z
@@ -976,9 +997,10 @@ class GUIController:
         except Exception:
             theory_cx, theory_cy, theory_cz = 0.0, 0.0, cz
         
-        # 获取当前实际几何中心
+        # 获取当前实际几何中心（样本与腿子未变时复用控制循环的估计结果，不推进EMA）
         try:
-            state = self.controller.estimator.estimate(self.legs, self.controller.sensor)
+            estimator = self.controller.estimator
+            state = estimator.current_state(self.legs, self.controller.sensor)
             current_cx, current_cy, current_cz = state.center_x, state.center_y, state.center_z
         except Exception:
             current_cx, current_cy, current_cz = 0.0, 0.0, cz
@@ -990,109 +1012,7 @@ class GUIController:
                  f"理论几何中心：X={theory_cx:.1f}, Y={theory_cy:.1f}, Z={theory_cz:.1f}cm"
         )
 
-        # Z 柱状图 - 调整为小图显示
-        self.ax_z.clear(); self.ax_z.set_title("Z轴高度", fontsize=20); self.ax_z.set_ylim(0,700)
-        names = [l.name for l in self.legs]
-        zvals = display_z
-        bars = self.ax_z.bar(names, zvals, color='skyblue')
-        # 调整字体大小和标签旋转
-        self.ax_z.tick_params(axis='x', labelsize=9, rotation=45)
-        self.ax_z.tick_params(axis='y', labelsize=9)
-        for i,b in enumerate(bars):
-            self.ax_z.text(b.get_x()+b.get_width()/2, b.get_height()+8, f"{zvals[i]:.0f}",
-                           ha='center', va='bottom', fontsize=8)
-
-        # XY坐标图（放大显示，占据上半部分）
-        self.ax_xy.clear(); self.ax_xy.set_title("腿子XY坐标分布", fontsize=20)
-        self.ax_xy.set_xlabel("X (cm)", fontsize=12); self.ax_xy.set_ylabel("Y (cm)", fontsize=12)
-        self.ax_xy.grid(True); self.ax_xy.set_aspect('equal')
-        self.ax_xy.tick_params(axis='both', labelsize=12)
-        
-        # 设置固定的坐标轴范围（紧凑显示，减少边界）
-        self.ax_xy.set_xlim(-100, 2500)
-        self.ax_xy.set_ylim(-20, 350)
-        
-        # 画腿子位置 - 支持不同颜色显示
-        xs = [xy[0] for xy in display_xy]; ys = [xy[1] for xy in display_xy]
-        
-        # 根据腿子颜色状态分别绘制
-        for i in range(12):
-            color = self.leg_colors[i] if hasattr(self, 'leg_colors') else 'red'
-            self.ax_xy.scatter([xs[i]], [ys[i]], c=color, s=120, marker='o', 
-                             edgecolors='black', linewidth=1)
-        
-        # 标注腿子编号 - 放大字体
-        for i in range(12):
-            self.ax_xy.text(xs[i], ys[i]+50, str(i+1), fontsize=14, ha='center', fontweight='bold')
-        
-        # 画对称腿对连线
-        for i in range(0,12,2):
-            self.ax_xy.plot([xs[i], xs[i+1]], [ys[i], ys[i+1]], color='gray', linestyle='--', alpha=0.6, linewidth=2)
-
-        # 画当前几何中心点（蓝色边框正方形，透明填充） - 小尺寸
-        self.ax_xy.scatter([current_cx], [current_cy], c='none', s=10, marker='s', 
-                          label=f'当前几何中心 ({current_cx:.1f}, {current_cy:.1f})', edgecolors='blue', linewidth=1)
-
-        # 画理论几何中心点（绿色边框圆形，透明填充） - 更大尺寸
-        self.ax_xy.scatter([theory_cx], [theory_cy], c='none', s=80, marker='o', 
-                          label=f'理论几何中心 ({theory_cx:.1f}, {theory_cy:.1f})', edgecolors='green', linewidth=1)
-
-        # 画中心偏差连线（很细的红色实线）
-        if abs(current_cx - theory_cx) > 1 or abs(current_cy - theory_cy) > 1:
-            self.ax_xy.plot([current_cx, theory_cx], [current_cy, theory_cy], 
-                           color='red', linestyle='-', linewidth=0.8, alpha=0.8, label='中心偏差')
-
-        # 添加图例 - 使用实际形状和颜色
-        import matplotlib.patches as mpatches
-        import matplotlib.lines as mlines
-        
-        # 创建自定义图例元素
-        # 普通腿子 - 红色圆形
-        red_leg = mlines.Line2D([], [], color='red', marker='o', linestyle='None',
-                               markersize=10, markeredgecolor='black', markeredgewidth=1,
-                               label='普通腿子')
-        
-        # 选中腿子 - 绿色圆形
-        green_leg = mlines.Line2D([], [], color='green', marker='o', linestyle='None',
-                                 markersize=10, markeredgecolor='black', markeredgewidth=1,
-                                 label='选中腿子')
-        
-        # 当前几何中心 - 蓝色边框方形，透明填充
-        current_center = mlines.Line2D([], [], color='none', marker='s', linestyle='None',
-                                     markersize=8, markeredgecolor='blue', markeredgewidth=2,
-                                     label=f'当前几何中心 ({current_cx:.1f}, {current_cy:.1f})')
-        
-        # 理论几何中心 - 绿色边框圆形，透明填充
-        theory_center = mlines.Line2D([], [], color='none', marker='o', linestyle='None',
-                                    markersize=12, markeredgecolor='green', markeredgewidth=2,
-                                    label=f'理论几何中心 ({theory_cx:.1f}, {theory_cy:.1f})')
-        
-        # 构建图例元素列表
-        legend_elements = [red_leg, green_leg, current_center, theory_center]
-        
-        # 如果有中心偏差，添加偏差线图例
-        if abs(current_cx - theory_cx) > 1 or abs(current_cy - theory_cy) > 1:
-            deviation_line = mlines.Line2D([], [], color='red', linestyle='-', 
-                                         linewidth=2, alpha=0.8, label='中心偏差')
-            legend_elements.append(deviation_line)
-        
-        self.ax_xy.legend(handles=legend_elements, loc='upper right', fontsize=12)
-
-        # 四角翘曲图 - 调整为小图显示
-        self.ax_att.clear(); self.ax_att.set_title("四角翘曲", fontsize=20)
-        dzs = [display_z[i] - cz for i in [0,1,10,11]]
-        bars = self.ax_att.bar(["左前", "左后", "右后", "右前"], dzs, color='orange')
-        self.ax_att.set_ylim(-100, 100)
-        self.ax_att.tick_params(axis='x', labelsize=9, rotation=30)
-        self.ax_att.tick_params(axis='y', labelsize=9)
-        # 添加数值标签
-        for i, bar in enumerate(bars):
-            height = bar.get_height()
-            self.ax_att.text(bar.get_x() + bar.get_width()/2., height + (5 if height >= 0 else -10),
-                           f'{dzs[i]:.0f}', ha='center', va='bottom' if height >= 0 else 'top', fontsize=8)
-
-        # 受力监测图 - 调整为小图显示
-        self.ax_force.clear(); self.ax_force.set_title("受力监测", fontsize=20)
+        # 四张图只更新数据（图元在 _build_charts 中创建一次）
         try:
             # 优先使用GUI模拟的受力值
             if hasattr(self, 'force_current_values') and self.force_current_values:
@@ -1103,12 +1023,8 @@ class GUIController:
                 force_vals = forces if len(forces) >= 12 else [getattr(l,"force",0.0) for l in self.legs]
         except Exception:
             force_vals = [getattr(l,"force",0.0) for l in self.legs]
-        self.ax_force.bar(names, force_vals, color='green')
-        self.ax_force.set_ylim(0, 150)
-        self.ax_force.tick_params(axis='x', labelsize=9, rotation=45)
-        self.ax_force.tick_params(axis='y', labelsize=9)
-
-        self.canvas.draw()
+        self._update_charts(display_z, display_xy, cz, force_vals,
+                            (current_cx, current_cy), (theory_cx, theory_cy))
         
         # 更新输入框内容
         for i,(xe,ye,ze) in enumerate(self.coord_entries):
@@ -1117,24 +1033,210 @@ class GUIController:
                 x_val, y_val = display_xy[i] if i < len(display_xy) else (0.0, 0.0)
                 z_val = display_z[i] if i < len(display_z) else 0.0
                 
-                # 更新输入框内容
-                xe.config(state="normal")
-                xe.delete(0, tk.END)
-                xe.insert(0, f"{x_val:.1f}")
-                xe.config(state="readonly")
-                
-                ye.config(state="normal")
-                ye.delete(0, tk.END)
-                ye.insert(0, f"{y_val:.1f}")
-                ye.config(state="readonly")
-                
-                ze.config(state="normal")
-                ze.delete(0, tk.END)
-                ze.insert(0, f"{z_val:.1f}")
-                ze.config(state="readonly")
+                # 更新输入框内容（数值未变的不重写，减少 Tk 调用）
+                for entry, val in ((xe, x_val), (ye, y_val), (ze, z_val)):
+                    text = f"{val:.1f}"
+                    if entry.get() == text:
+                        continue
+                    entry.config(state="normal")
+                    entry.delete(0, tk.END)
+                    entry.insert(0, text)
+                    entry.config(state="readonly")
             except Exception:
                 pass
 
+    # ——— 图表：图元只创建一次，之后原地更新 + blit ———
+    def _build_charts(self):
+        """
+        创建四张图的全部图元（柱/散点/文字/连线/图例），固定标题、坐标范围与刻度。
+        随数据变化的图元设为 animated：整图重绘时不画它们，背景按子图分别缓存，
+        之后由 _blit_charts 只重绘并 blit 数据有变化的子图。动态文字裁剪到所在子图内，
+        保证每个子图的图元都落在自身 bbox 中。
+        """
+        import matplotlib.lines as mlines
+
+        names = [l.name for l in self.legs]
+        n = len(names)
+
+        # Z 柱状图 - 调整为小图显示
+        ax = self.ax_z
+        ax.set_title("Z轴高度", fontsize=20); ax.set_ylim(0,700)
+        self._z_bars = ax.bar(names, [0.0]*n, color='skyblue')
+        # 调整字体大小和标签旋转
+        ax.tick_params(axis='x', labelsize=9, rotation=45)
+        ax.tick_params(axis='y', labelsize=9)
+        self._z_texts = [ax.text(b.get_x()+b.get_width()/2, 8, "", ha='center', va='bottom', fontsize=8)
+                         for b in self._z_bars]
+        z_dynamic = list(self._z_bars) + self._z_texts
+
+        # XY坐标图（放大显示，占据上半部分）
+        ax = self.ax_xy
+        ax.set_title("腿子XY坐标分布", fontsize=20)
+        ax.set_xlabel("X (cm)", fontsize=12); ax.set_ylabel("Y (cm)", fontsize=12)
+        ax.grid(True); ax.set_aspect('equal')
+        ax.tick_params(axis='both', labelsize=12)
+        # 设置固定的坐标轴范围（紧凑显示，减少边界）；关闭自动缩放，更新数据不会改动坐标轴
+        ax.set_xlim(-100, 2500)
+        ax.set_ylim(-20, 350)
+        ax.set_autoscale_on(False)
+        # 腿子位置：一个散点对象，颜色按腿设置（选中腿为绿色）
+        self._leg_scatter = ax.scatter([0.0]*n, [0.0]*n, c=self.leg_colors[:n], s=120, marker='o',
+                                       edgecolors='black', linewidth=1)
+        # 标注腿子编号 - 放大字体
+        self._leg_labels = [ax.text(0, 0, str(i+1), fontsize=14, ha='center', fontweight='bold')
+                            for i in range(n)]
+        # 对称腿对连线：一条折线，腿对之间用 NaN 断开
+        self._pair_line, = ax.plot([], [], color='gray', linestyle='--', alpha=0.6, linewidth=2)
+        # 当前几何中心（蓝色边框正方形，透明填充） - 小尺寸
+        self._cur_center = ax.scatter([0.0], [0.0], c='none', s=10, marker='s', edgecolors='blue', linewidth=1)
+        # 理论几何中心（绿色边框圆形，透明填充） - 更大尺寸
+        self._theory_center = ax.scatter([0.0], [0.0], c='none', s=80, marker='o', edgecolors='green', linewidth=1)
+        # 中心偏差连线（很细的红色实线），偏差不超过 1 时隐藏
+        self._dev_line, = ax.plot([], [], color='red', linestyle='-', linewidth=0.8, alpha=0.8)
+
+        # 图例 - 使用实际形状和颜色；图例是静态背景的一部分（重绘图例开销最大），
+        # 中心坐标不再写进图例文字，由上方 center_info_label 显示
+        legend_elements = [
+            mlines.Line2D([], [], color='red', marker='o', linestyle='None',
+                          markersize=10, markeredgecolor='black', markeredgewidth=1, label='普通腿子'),
+            mlines.Line2D([], [], color='green', marker='o', linestyle='None',
+                          markersize=10, markeredgecolor='black', markeredgewidth=1, label='选中腿子'),
+            mlines.Line2D([], [], color='none', marker='s', linestyle='None',
+                          markersize=8, markeredgecolor='blue', markeredgewidth=2, label='当前几何中心'),
+            mlines.Line2D([], [], color='none', marker='o', linestyle='None',
+                          markersize=12, markeredgecolor='green', markeredgewidth=2, label='理论几何中心'),
+            mlines.Line2D([], [], color='red', linestyle='-', linewidth=2, alpha=0.8, label='中心偏差'),
+        ]
+        self._xy_legend = ax.legend(handles=legend_elements, loc='upper right', fontsize=12)
+        xy_dynamic = [self._leg_scatter, self._pair_line, self._cur_center, self._theory_center,
+                      self._dev_line] + self._leg_labels
+
+        # 四角翘曲图 - 调整为小图显示
+        ax = self.ax_att
+        ax.set_title("四角翘曲", fontsize=20)
+        self._att_bars = ax.bar(["左前", "左后", "右后", "右前"], [0.0]*4, color='orange')
+        ax.set_ylim(-100, 100)
+        ax.tick_params(axis='x', labelsize=9, rotation=30)
+        ax.tick_params(axis='y', labelsize=9)
+        self._att_texts = [ax.text(b.get_x() + b.get_width()/2., 5, "", ha='center', va='bottom', fontsize=8)
+                           for b in self._att_bars]
+        att_dynamic = list(self._att_bars) + self._att_texts
+
+        # 受力监测图 - 调整为小图显示
+        ax = self.ax_force
+        ax.set_title("受力监测", fontsize=20)
+        self._force_bars = ax.bar(names, [0.0]*n, color='green')
+        ax.set_ylim(0, 150)
+        ax.tick_params(axis='x', labelsize=9, rotation=45)
+        ax.tick_params(axis='y', labelsize=9)
+        force_dynamic = list(self._force_bars)
+
+        # 子图 → 其动态图元
+        self._chart_artists = {self.ax_z: z_dynamic, self.ax_xy: xy_dynamic,
+                               self.ax_att: att_dynamic, self.ax_force: force_dynamic}
+        for ax, artists in self._chart_artists.items():
+            for a in artists:
+                a.set_animated(True)
+                a.set_clip_box(ax.bbox)
+                a.set_clip_on(True)
+        self._chart_bg = {}     # 子图 → 背景缓存
+        self._chart_keys = {}   # 子图 → 上次绘制的数据键
+        self._chart_blit = bool(getattr(self.canvas, "supports_blit", False))
+        # 整图重绘（首次显示/窗口缩放）后重新缓存背景
+        self.canvas.mpl_connect("draw_event", self._on_chart_draw)
+
+    def _on_chart_draw(self, event):
+        """整图重绘完成：逐子图缓存不含动态图元的背景，再把动态图元画上"""
+        self._chart_bg = {ax: self.canvas.copy_from_bbox(ax.bbox) for ax in self._chart_artists}
+        for ax in self._chart_artists:
+            self._draw_chart_artists(ax)
+
+    def _draw_chart_artists(self, ax):
+        for a in self._chart_artists[ax]:
+            ax.draw_artist(a)
+
+    def _update_charts(self, display_z, display_xy, cz, force_vals, current_c, theory_c):
+        """只更新数据有变化的子图的图元并 blit 这些子图（尚无背景缓存时退回整图重绘）"""
+        dzs = [display_z[i] - cz for i in [0,1,10,11]]
+        keys = {self.ax_z: tuple(display_z),
+                self.ax_xy: (tuple(display_xy), current_c, theory_c, tuple(self.leg_colors)),
+                self.ax_att: tuple(dzs),
+                self.ax_force: tuple(force_vals)}
+        dirty = [ax for ax, k in keys.items() if self._chart_keys.get(ax) != k]
+        if not dirty and self._chart_bg:
+            return
+        self._chart_keys = keys
+
+        # Z 柱状图
+        if self.ax_z in dirty:
+            for b, t, z in zip(self._z_bars, self._z_texts, display_z):
+                b.set_height(z)
+                t.set_y(z + 8)
+                t.set_text(f"{z:.0f}")
+
+        # XY坐标图
+        if self.ax_xy in dirty:
+            n = len(self._leg_labels)
+            xs = [xy[0] for xy in display_xy[:n]]; ys = [xy[1] for xy in display_xy[:n]]
+            self._leg_scatter.set_offsets(list(zip(xs, ys)))
+            self._leg_scatter.set_facecolors(self.leg_colors[:len(xs)])
+            for t, x, y in zip(self._leg_labels, xs, ys):
+                t.set_position((x, y + 50))
+            px, py = [], []
+            for i in range(0, len(xs) - 1, 2):
+                px += [xs[i], xs[i+1], float("nan")]
+                py += [ys[i], ys[i+1], float("nan")]
+            self._pair_line.set_data(px, py)
+
+            (current_cx, current_cy), (theory_cx, theory_cy) = current_c, theory_c
+            self._cur_center.set_offsets([(current_cx, current_cy)])
+            self._theory_center.set_offsets([(theory_cx, theory_cy)])
+            deviated = abs(current_cx - theory_cx) > 1 or abs(current_cy - theory_cy) > 1
+            self._dev_line.set_data([current_cx, theory_cx], [current_cy, theory_cy])
+            self._dev_line.set_visible(deviated)
+
+        # 四角翘曲图
+        if self.ax_att in dirty:
+            for b, t, dz in zip(self._att_bars, self._att_texts, dzs):
+                b.set_height(dz)
+                t.set_y(dz + (5 if dz >= 0 else -10))
+                t.set_verticalalignment('bottom' if dz >= 0 else 'top')
+                t.set_text(f"{dz:.0f}")
+
+        # 受力监测图
+        if self.ax_force in dirty:
+            for b, f in zip(self._force_bars, force_vals):
+                b.set_height(f)
+
+        self._blit_charts(dirty)
+
+    def _blit_charts(self, axes):
+        """恢复各子图背景、重画其动态图元，并只 blit 这些子图的 bbox"""
+        if not self._chart_blit or not self._chart_bg:
+            # 首次显示前（或后端不支持 blit）：整图重绘，draw_event 中缓存背景
+            self.canvas.draw()
+            return
+        for ax in axes:
+            self.canvas.restore_region(self._chart_bg[ax])
+            self._draw_chart_artists(ax)
+            self.canvas.blit(ax.bbox)
+
+    def _update_loop_stats(self):
+        """刷新控制循环调度统计显示"""
+        try:
+            st = self.controller.control.get_loop_stats()
+        except Exception:
+            return
+        rs = self.refresh_scheduler.stats()
+        ui_txt = f"  界面：{rs.fps:.0f}/{rs.max_fps:.0f}fps  合并：{rs.skipped}"
+        if st.ticks == 0:
+            self.loop_stats_label.config(text="实际频率：-" + ui_txt, fg="gray")
+            return
+        self.loop_stats_label.config(
+            text=f"实际频率：{st.achieved_hz:.2f}Hz  抖动：{st.mean_jitter_ms:.1f}/{st.max_jitter_ms:.1f}ms  超时：{st.overruns}"
+                 + ui_txt,
+            fg="red" if st.overruns else "gray")
+
     # ——— 受力模拟相关方法 ———
     def _start_force_simulation_timer(self):
         """启动受力模拟定时器"""
@@ -1306,7 +1408,7 @@ class GUIController:
         except Exception: pass
         self.root.destroy(); sys.exit(0)
 
-def start_gui(controller):
+def start_gui(controller, max_fps: float = REFRESH_MAX_FPS):
     root = tk.Tk()
     
     # 设置窗口初始大小（作为退出全屏时的默认尺寸）
@@ -1356,7 +1458,7 @@ def start_gui(controller):
     main_canvas.bind('<Configure>', _configure_canvas_frame)
     
     # 创建GUI控制器，传入scrollable_frame而不是root
-    app = GUIController(scrollable_frame, controller)
+    app = GUIController(scrollable_frame, controller, max_fps=max_fps)
     
     # 将滚动条引用传递给app，以便在全屏时控制
     app.main_canvas = main_canvas
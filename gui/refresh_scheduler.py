@@ -0,0 +1,93 @@
+# gui/refresh_scheduler.py
+# 界面刷新调度：脏标记 + 帧率上限。任意线程可多次 request()，两帧之间的所有请求合并为一次重绘，
+# Tk 事件队列里同一时刻最多只有一个待执行的刷新，控制循环再快也不会让界面积压滞后
+import threading, time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+@dataclass
+class RefreshStats:
+    max_fps: float
+    requests: int          # 累计刷新请求次数
+    frames: int            # 实际重绘次数
+    skipped: int           # 被合并掉的请求数（requests - frames，不含尚未执行的一次）
+    last_ms: float         # 最近一次重绘耗时
+    mean_ms: float         # 平均重绘耗时
+    fps: float             # 最近一秒的实际帧率
+
+class RefreshScheduler:
+    """
+    root: Tk 根窗口（用 root.after 把重绘放到主线程）
+    callback: 重绘函数，调用为 callback(status_text=...)
+    max_fps: 最大刷新帧率；两次重绘起始时间至少间隔 1/max_fps 秒
+    status_text 以最后一次请求为准；request() 未给出时沿用上一次的文字。
+    """
+    def __init__(self, root, callback: Callable[..., None], max_fps: float = 20.0):
+        self.root = root
+        self.callback = callback
+        self.set_max_fps(max_fps)
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._scheduled = False
+        self._status = ""
+        self._last_frame = 0.0
+        self._requests = 0
+        self._frames = 0
+        self._draw_total = 0.0
+        self._last_ms = 0.0
+        self._fps = 0.0
+        self._fps_t0 = time.monotonic()
+        self._fps_frames = 0
+
+    def set_max_fps(self, max_fps: float):
+        if max_fps <= 0:
+            raise ValueError("max_fps 必须为正数")
+        self.max_fps = float(max_fps)
+        self._min_interval = 1.0 / self.max_fps
+
+    def request(self, status_text: Optional[str] = None):
+        """标记界面需要刷新（线程安全）；本帧内已有待执行的刷新时只更新状态文字"""
+        with self._lock:
+            self._requests += 1
+            if status_text is not None:
+                self._status = status_text
+            self._dirty = True
+            if self._scheduled:
+                return
+            self._scheduled = True
+            delay = self._last_frame + self._min_interval - time.monotonic()
+        try:
+            self.root.after(max(0, int(delay * 1000)), self._run)
+        except Exception:  # 窗口已销毁
+            with self._lock:
+                self._scheduled = False
+
+    def _run(self):
+        """主线程：清脏标记后重绘一次"""
+        with self._lock:
+            self._scheduled = False
+            if not self._dirty:
+                return
+            self._dirty = False
+            status = self._status
+        t0 = time.monotonic()
+        self._last_frame = t0
+        try:
+            self.callback(status_text=status)
+        finally:
+            dt = time.monotonic() - t0
+            self._frames += 1
+            self._draw_total += dt
+            self._last_ms = dt * 1000.0
+            self._fps_frames += 1
+            if t0 - self._fps_t0 >= 1.0:
+                self._fps = self._fps_frames / (t0 - self._fps_t0)
+                self._fps_t0, self._fps_frames = t0, 0
+
+    def stats(self) -> RefreshStats:
+        with self._lock:
+            requests = self._requests
+            pending = 1 if self._dirty else 0
+        frames = self._frames
+        return RefreshStats(self.max_fps, requests, frames, max(0, requests - frames - pending),
+                            self._last_ms, self._draw_total * 1000.0 / max(1, frames), self._fps)
@@ -4,18 +4,24 @@ from typing import List, Dict, Optional, Any
 import threading
 
 from .actuator_driver import ActuatorDriver
+from core.clock import SYSTEM_CLOCK
+from core.leg_unit import store_of
 
 class DriverMock(ActuatorDriver):
     """
     简单的 mock 驱动：把下发的位移直接应用到传入的 legs 引用上（写回 LegUnit），
     以便 GUI 能即时看到位置变化（用于本地仿真）。单位按 ActuatorDriver 说明为 mm。
+    clock：时间源（默认系统时钟；无头仿真传入 VirtualClock），用于记录最近一次下发时刻。
     """
+    Z_SIGN = 1.0  # 正 dz 对应的 z 变化方向（本类沿用旧有演示语义：z 增大）
 
-    def __init__(self, legs: Optional[List[Any]] = None, logger=None):
+    def __init__(self, legs: Optional[List[Any]] = None, logger=None, clock=None):
         self._legs = legs or []
         self._logger = logger
         self._connected = True
         self._lock = threading.Lock()
+        self._clock = clock or SYSTEM_CLOCK
+        self.last_command_ts: Optional[float] = None
 
     def connect(self) -> bool:
         self._connected = True
@@ -33,7 +39,12 @@ class DriverMock(ActuatorDriver):
         单位：mm。正 dz 表示下降（增大 z 值）。
         """
         with self._lock:
+            self.last_command_ts = self._clock.monotonic()
             try:
+                st = store_of(self._legs)
+                if st is not None:
+                    self._apply_batch_to_store(st, cmds)
+                    return True
                 for c in cmds:
                     leg_id = int(c.get("id", -1))
                     dz = float(c.get("dz", 0.0))
@@ -49,6 +60,7 @@ class DriverMock(ActuatorDriver):
 
     def move_leg_delta(self, leg_id: int, dz: float, dx: float, dy: float) -> bool:
         with self._lock:
+            self.last_command_ts = self._clock.monotonic()
             try:
                 self._apply_to_leg(leg_id, dz, dx, dy)
                 return True
@@ -67,6 +79,19 @@ class DriverMock(ActuatorDriver):
                 except Exception:
                     pass
 
+    # 内部：整批增量直接写入 LegStateStore 数组（与 _apply_to_leg 语义一致）
+    def _apply_batch_to_store(self, st, cmds: List[Dict]):
+        import numpy as np
+        n = len(cmds)
+        idx = np.fromiter((int(c.get("id", -1)) for c in cmds), dtype=np.int64, count=n) - 1
+        dz = np.fromiter((float(c.get("dz", 0.0)) for c in cmds), dtype=float, count=n)
+        dx = np.fromiter((float(c.get("dx", 0.0)) for c in cmds), dtype=float, count=n)
+        dy = np.fromiter((float(c.get("dy", 0.0)) for c in cmds), dtype=float, count=n)
+        ok = (idx >= 0) & (idx < st.n)
+        idx = idx[ok]
+        st.apply_delta(idx, dx[ok], dy[ok], self.Z_SIGN * dz[ok], z_floor=0.0)
+        st.set_status_all("MOVING", idx)
+
     # 内部：把增量应用到指定 leg（id 从 1 开始）
     def _apply_to_leg(self, leg_id: int, dz_mm: float, dx_mm: float, dy_mm: float):
         idx = int(leg_id) - 1
@@ -75,9 +100,9 @@ class DriverMock(ActuatorDriver):
         leg = self._legs[idx]
         # 保护性读取/写入，若属性不存在则跳过
         try:
-            # z 单位为 mm，正 dz 表示下降（增加 z 值）
+            # z 单位为 mm，方向由 Z_SIGN 决定
             current_z = float(getattr(leg, "z", 0.0))
-            new_z = max(0.0, current_z + dz_mm)
+            new_z = max(0.0, current_z + self.Z_SIGN * dz_mm)
             setattr(leg, "z", new_z)
         except Exception:
             pass
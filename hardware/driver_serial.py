@@ -1,40 +1,144 @@
 # hardware/driver_serial.py
-from typing import List, Dict
-import struct, time
+import bisect, collections, copy, threading, time, struct
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
 from .actuator_driver import ActuatorDriver
+from .frame_codec import CMD_SET_TELEM_FORMAT, Frame, FrameDecoder
 from .serial_interface import SerialInterface
+from comm.crc import crc16_modbus as crc16_le  # 查表 CRC16/MODBUS（与 comm 帧共用）
 
-def crc16_le(data: bytes) -> int:
-    crc = 0xFFFF
-    for b in data:
-        crc ^= b
-        for _ in range(8):
-            crc = ((crc >> 1) ^ 0xA001) if (crc & 1) else (crc >> 1)
-    return crc & 0xFFFF
+CMD_BATCH = 0x01
+CMD_SINGLE = 0x02
+CMD_ESTOP = 0x03
+CMD_SET_ACK_SEQ = 0x05   # payload [enable, seq]：请求设备在 ACK 中回显序号
+CMD_ACK = 0x81      # ACK payload 可为空（旧固件）、[被确认的 cmd]，或 [被确认的 cmd, seq]（已开启序号回显）
+
+RTT_BUCKETS_MS = (0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 50.0, 100.0, 200.0, 500.0)
 
 def pack_frame(cmd: int, payload: bytes) -> bytes:
     stx = 0xAA55
     length = 1 + len(payload)
     head = struct.pack("<HB", stx, length) + struct.pack("<B", cmd)
-    crc = crc16_le(head[2:] + payload)
+    crc = crc16_le(payload, crc16_le(head[2:]))   # 分段增量计算，不拼接
     return head + payload + struct.pack("<H", crc)
 
 def mm_to_dm(v_mm: float) -> int:
     return int(round(v_mm * 10.0))
 
+@dataclass
+class RttHistogram:
+    """往返时延直方图：counts[i] 为 ≤ bounds_ms[i] 的次数，最后一格为超出上限的"""
+    bounds_ms: Tuple[float, ...] = RTT_BUCKETS_MS
+    counts: List[int] = field(default_factory=lambda: [0] * (len(RTT_BUCKETS_MS) + 1))
+    n: int = 0
+    total_ms: float = 0.0
+    min_ms: float = 0.0
+    max_ms: float = 0.0
+
+    def add(self, ms: float):
+        self.counts[bisect.bisect_left(self.bounds_ms, ms)] += 1
+        if not self.n or ms < self.min_ms:
+            self.min_ms = ms
+        self.n += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.n if self.n else 0.0
+
+    def percentile(self, p: float) -> float:
+        """p 分位所在桶的上限（落在最后一格时返回 max_ms）"""
+        if not self.n:
+            return 0.0
+        rank = p / 100.0 * self.n
+        acc = 0
+        for i, c in enumerate(self.counts):
+            acc += c
+            if acc >= rank and c:
+                return self.bounds_ms[i] if i < len(self.bounds_ms) else self.max_ms
+        return self.max_ms
+
+    def summary(self) -> str:
+        return (f"n={self.n} min={self.min_ms:.1f}ms mean={self.mean_ms:.1f}ms p50≤{self.percentile(50):g}ms "
+                f"p99≤{self.percentile(99):g}ms max={self.max_ms:.1f}ms")
+
+@dataclass
+class AckStats:
+    sent: int = 0          # 发出的帧（含重试）
+    acked: int = 0
+    timeouts: int = 0      # 等待 ACK 超时的发送次数
+    late_acks: int = 0     # 已超时请求的迟到 ACK（被丢弃，不会算到后续请求上）
+    dropped_placeholders: int = 0   # 未回显序号时，因更新的帧可能已收到 ACK 而提前作废的占位
+    unexpected: int = 0    # 没有在途请求或确认的 cmd/序号对不上的 ACK
+    crc_errors: int = 0
+    rtt: Dict[int, RttHistogram] = field(default_factory=dict)   # cmd -> 往返时延直方图
+
+class _Pending:
+    __slots__ = ("seq", "wire", "cmd", "t_sent", "event", "acked", "expires", "timed_out")
+
+    def __init__(self, seq: int, cmd: int, t_sent: float):
+        self.seq = seq
+        self.wire = (seq - 1) % 255 + 1        # 线上序号 1..255（开启序号回显时附在 payload 末尾）
+        self.cmd = cmd
+        self.t_sent = t_sent
+        self.event = threading.Event()
+        self.acked = False
+        self.expires: Optional[float] = None   # 超时后作为占位保留到此时刻，吸收迟到的 ACK
+        self.timed_out = False                 # False 表示不等 ACK 的请求（急停）的占位
+
 class DriverSerial(ActuatorDriver):
-    def __init__(self, port: str, baudrate: int = 115200, timeout: float = 0.05, retry: int = 1, logger=None):
+    """
+    执行器串口驱动。RX 经 FrameDecoder 解帧（拆包/粘包/CRC），ACK 与请求按发送序号匹配：
+    - 驱动为每次发送分配序号并按序排入在途队列，收到 ACK 即 Event 唤醒发送方（不再轮询）；
+      多个线程（控制循环/单腿控制/急停）可同时在途
+    - 序号回显（ack_seq=True 时连接后协商，MockSerialDevice 已支持）：每帧 payload 末尾附 1 字节序号，
+      设备在 ACK 中原样回显，按 (cmd, 序号) 精确匹配；超时的请求留作占位 late_ack_window 秒吸收迟到的 ACK
+    - 设备不支持时（旧固件，按收到的顺序逐帧回 ACK）按 FIFO 确认队首。超时请求的占位只在其后没有更新的帧、
+      或更新的帧发出尚不足其最小往返时延（此时的 ACK 不可能属于它）时吸收 ACK；否则占位作废，
+      避免一次丢帧让后续 ACK 全被当作迟到
+    - ACK payload 带被确认的 cmd 时额外核对，对不上的计为 unexpected
+    - 每个 cmd 的往返时延记入 RttHistogram，ack_stats() 返回快照
+    """
+    def __init__(self, port: str, baudrate: int = 115200, timeout: float = 0.05, retry: int = 1, logger=None,
+                 ack_timeout: float = 0.3, late_ack_window: float = 1.0, ack_seq: bool = True):
         self.iface = SerialInterface(port, baudrate, timeout, logger=logger)
         self.retry = retry
         self.logger = logger
-        self._last_rx = b""
+        self.ack_timeout = ack_timeout
+        self.late_ack_window = late_ack_window
+        self._decoder = FrameDecoder()
+        self._write_lock = threading.Lock()   # 登记序号与写串口须原子，保证在途队列顺序与线上顺序一致
+        self._ack_lock = threading.Lock()     # 保护在途队列与统计
+        self._inflight: Deque[_Pending] = collections.deque()
+        self._seq = 0
+        self._stats = AckStats()
+        self.ack_seq = ack_seq
+        self._seq_echo = False                # 设备已确认回显序号
 
     def connect(self) -> bool:
         ok = self.iface.open()
         self.iface.start_reader(self._on_rx)
         if ok and self.logger: self.logger.info(f"串口已连接：{self.iface.port}@{self.iface.baudrate}")
+        if ok and self.ack_seq:
+            self._negotiate_seq_echo()
         return ok
 
+    def _negotiate_seq_echo(self):
+        """请求设备回显序号；ACK 为 [CMD_SET_ACK_SEQ, seq] 即开启，旧固件（ACK 不带序号/不回 ACK）沿用 FIFO 匹配"""
+        self._seq_echo = False
+        try:
+            self._send(CMD_SET_ACK_SEQ, b"\x01", expect_ack=True)
+        except Exception as e:
+            if self.logger: self.logger.exception(e, "序号回显协商失败")
+        if self.logger:
+            self.logger.info("ACK 匹配：" + ("设备回显序号" if self._seq_echo else "设备不支持序号回显，按顺序匹配"))
+
+    @property
+    def seq_echo(self) -> bool:
+        return self._seq_echo
+
     def disconnect(self) -> None:
         self.iface.stop_reader()
         self.iface.close()
@@ -43,9 +147,14 @@ class DriverSerial(ActuatorDriver):
     def is_connected(self) -> bool:
         return self.iface.is_open()
 
+    def _serial_log_on(self) -> bool:
+        """串口监视通道是否开启；关闭时跳过批量摘要/十六进制串的构造"""
+        return self.logger is not None and self.logger.is_enabled(channel="serial")
+
     def apply_batch(self, cmds: List[Dict]) -> bool:
         # 批量命令一行显示
-        if self.logger:
+        log_on = self._serial_log_on()
+        if log_on:
             cmd_summary = ", ".join([f"L{int(c['id']):02d}(Δz={c['dz']:.1f},Δx={c['dx']:.1f},Δy={c['dy']:.1f})" for c in cmds])
             self.logger.serial(f"TX BATCH: {cmd_summary}", direction="TX")
 
@@ -57,66 +166,175 @@ class DriverSerial(ActuatorDriver):
                                    mm_to_dm(float(c["dz"])),
                                    mm_to_dm(float(c["dx"])),
                                    mm_to_dm(float(c["dy"])))
-        frame = pack_frame(0x01, bytes(payload))
-        if self.logger: self.logger.serial(f"TX frame {len(frame)}B", direction="TX")
-        return self._send(frame, expect_ack=True)
+        return self._send(CMD_BATCH, bytes(payload), expect_ack=True)
 
     def move_leg_delta(self, leg_id: int, dz: float, dx: float, dy: float) -> bool:
-        if self.logger:
-            self.logger.serial(f"TX SINGLE: L{int(leg_id):02d}(Δz={dz:.1f},Δx={dx:.1f},Δy={dy:.1f})", direction="TX")
+        log_on = self._serial_log_on()
+        if log_on:
+            self.logger.serial("TX SINGLE: L%02d(Δz=%.1f,Δx=%.1f,Δy=%.1f)", int(leg_id), dz, dx, dy, direction="TX")
         payload = struct.pack("<Bhhh", int(leg_id), mm_to_dm(dz), mm_to_dm(dx), mm_to_dm(dy))
-        frame = pack_frame(0x02, payload)
-        if self.logger: self.logger.serial(f"TX frame {len(frame)}B", direction="TX")
-        return self._send(frame, expect_ack=True)
+        return self._send(CMD_SINGLE, payload, expect_ack=True)
 
     def stop_all(self) -> None:
         try:
             if self.logger: self.logger.serial("TX EMERGENCY STOP", direction="TX")
-            self._send(pack_frame(0x03, b""), expect_ack=False)
+            self._send(CMD_ESTOP, b"", expect_ack=False)
         except Exception as e:
             if self.logger: self.logger.exception(e, "stop_all 发送失败")
 
-    def _send(self, frame: bytes, expect_ack: bool = True) -> bool:
+    def ack_stats(self) -> AckStats:
+        """ACK 统计与各 cmd 往返时延直方图的快照"""
+        with self._ack_lock:
+            return copy.deepcopy(self._stats)
+
+    def _send(self, cmd: int, payload: bytes, expect_ack: bool = True) -> bool:
         last_err = None
         for attempt in range(max(1, self.retry)):
+            pending = None
             try:
                 if not self.is_connected():
                     if self.logger: self.logger.serial("reconnect", direction="TX")
                     self.connect()
-                self.iface.write(frame)
-                if expect_ack:
-                    t0 = time.time()
-                    while time.time() - t0 < 0.3:
-                        if b"\x81" in self._last_rx:
-                            return True
-                        time.sleep(0.01)
-                    if self.logger: self.logger.warn("等待ACK超时")
-                else:
+                with self._write_lock:
+                    pending = self._register(cmd)
+                    # 协商帧总带序号（设备此前是否已开启回显都能解析）
+                    if self._seq_echo or cmd == CMD_SET_ACK_SEQ:
+                        frame = pack_frame(cmd, payload + bytes([pending.wire]))
+                    else:
+                        frame = pack_frame(cmd, payload)
+                    self.iface.write(frame)
+                if self._serial_log_on():
+                    self.logger.serial("TX frame %dB seq=%d", len(frame), pending.wire, direction="TX")
+                if not expect_ack:
+                    # 设备同样会回 ACK：直接转为占位，避免被后续请求认领
+                    self._expire(pending, timed_out=False)
                     return True
+                if pending.event.wait(self.ack_timeout):
+                    return True
+                if not self._expire(pending):
+                    return True       # 超时判定与 ACK 同时发生
+                if self.logger: self.logger.warn("等待ACK超时 cmd=0x%02X seq=%d", cmd, pending.seq)
             except Exception as e:
                 last_err = e
+                if pending is not None:
+                    self._discard(pending)
                 if self.logger: self.logger.exception(e, "串口发送失败")
                 time.sleep(0.02)
         if last_err:
             raise last_err
         return False
 
+    def _register(self, cmd: int) -> _Pending:
+        with self._ack_lock:
+            self._seq = (self._seq + 1) & 0xFFFFFFFF
+            p = _Pending(self._seq, cmd, time.perf_counter())
+            self._inflight.append(p)
+            self._stats.sent += 1
+        return p
+
+    def _expire(self, p: _Pending, timed_out: bool = True) -> bool:
+        """未确认的请求转为占位；已确认返回 False"""
+        with self._ack_lock:
+            if p.acked:
+                return False
+            p.expires = time.perf_counter() + self.late_ack_window
+            p.timed_out = timed_out
+            if timed_out:
+                self._stats.timeouts += 1
+        return True
+
+    def _discard(self, p: _Pending):
+        """写失败：帧未发出，从在途队列移除"""
+        with self._ack_lock:
+            try:
+                self._inflight.remove(p)
+            except ValueError:
+                pass
+
+    def _rtt_floor_s(self, cmd: int) -> float:
+        """该 cmd 已观测到的最小往返时延（秒）；尚无样本时为 0"""
+        hist = self._stats.rtt.get(cmd)
+        return hist.min_ms / 1000.0 if hist is not None and hist.n else 0.0
+
+    def _may_be_acked(self, p: _Pending, ack_cmd: Optional[int], now: float) -> bool:
+        """这个 ACK 是否可能属于 p：cmd 相符（ACK 带 cmd 时），且 p 发出已不短于其最小往返时延"""
+        return (ack_cmd is None or ack_cmd == p.cmd) and now - p.t_sent >= self._rtt_floor_s(p.cmd)
+
+    def _match_fifo(self, ack_cmd: Optional[int], now: float) -> Optional[_Pending]:
+        """设备不回显序号：按顺序确认队首；持有 _ack_lock 时调用"""
+        q = self._inflight
+        while q and q[0].expires is not None:
+            if q[0].expires <= now:
+                q.popleft()             # 占位到期：设备确实没回这一帧
+            elif len(q) > 1 and self._may_be_acked(q[1], ack_cmd, now):
+                q.popleft()             # 更新的帧可能已收到 ACK：占位不再吸收
+                self._stats.dropped_placeholders += 1
+            else:
+                break
+        if not q or (ack_cmd is not None and ack_cmd != q[0].cmd):
+            return None
+        return q.popleft()
+
+    def _match_seq(self, ack_cmd: int, wire: int, now: float) -> Optional[_Pending]:
+        """设备回显序号：按 (cmd, 序号) 精确匹配；持有 _ack_lock 时调用"""
+        q = self._inflight
+        while q and q[0].expires is not None and q[0].expires <= now:
+            q.popleft()
+        for p in q:
+            if p.wire == wire and p.cmd == ack_cmd:
+                q.remove(p)
+                return p
+        return None
+
+    def _on_ack(self, fr: Frame) -> str:
+        now = time.perf_counter()
+        pl = fr.payload
+        if pl[:1] == bytes([CMD_SET_TELEM_FORMAT]):
+            # 单口模式下 SensorSystem 的遥测格式协商帧也走控制口，其 ACK 与本驱动的在途请求无关
+            return "ACK cmd=0x04 (遥测格式协商)"
+        with self._ack_lock:
+            st = self._stats
+            if len(pl) >= 2 and (self._seq_echo or pl[0] == CMD_SET_ACK_SEQ):
+                p = self._match_seq(pl[0], pl[1], now)
+                if p is None:
+                    st.unexpected += 1
+                    return f"ACK cmd=0x{pl[0]:02X} seq={pl[1]} (无对应在途请求)"
+            else:
+                p = self._match_fifo(pl[0] if pl else None, now)
+                if p is None:
+                    st.unexpected += 1
+                    q = self._inflight
+                    if not q:
+                        return "ACK (无在途请求)"
+                    return f"ACK cmd=0x{pl[0]:02X} (与在途 0x{q[0].cmd:02X} 不符)"
+            if p.expires is not None:
+                if not p.timed_out:
+                    return f"ACK seq={p.seq} (cmd=0x{p.cmd:02X}，未等待)"
+                st.late_acks += 1
+                return f"ACK seq={p.seq} (迟到 {(now - p.t_sent) * 1000:.1f}ms)"
+            if p.cmd == CMD_SET_ACK_SEQ:
+                self._seq_echo = len(pl) >= 2 and pl[1] == p.wire
+            p.acked = True
+            rtt_ms = (now - p.t_sent) * 1000.0
+            st.acked += 1
+            hist = st.rtt.get(p.cmd)
+            if hist is None:
+                hist = st.rtt[p.cmd] = RttHistogram()
+            hist.add(rtt_ms)
+        p.event.set()
+        return f"ACK seq={p.seq} rtt={rtt_ms:.1f}ms"
+
     def _on_rx(self, chunk: bytes):
-        self._last_rx = chunk
-        if self.logger: 
-            hex_str = ' '.join(f'{b:02X}' for b in chunk)
-            # 尝试解析ACK帧
-            frame_info = ""
-            if len(chunk) >= 4:
-                try:
-                    stx = int.from_bytes(chunk[:2], 'little')
-                    if stx == 0xAA55:
-                        length = chunk[2]
-                        cmd = chunk[3]
-                        if cmd == 0x81:
-                            frame_info = " (ACK)"
-                        else:
-                            frame_info = f" (CMD=0x{cmd:02X})"
-                except Exception:
-                    pass
-            self.logger.serial(f"RX {len(chunk)}B: {hex_str}{frame_info}", direction="RX")
+        crc_before = self._decoder.crc_errors
+        infos = []
+        for fr in self._decoder.feed(chunk):
+            if fr.cmd == CMD_ACK:
+                infos.append(self._on_ack(fr))
+            else:
+                infos.append(f"CMD=0x{fr.cmd:02X}")
+        if self._decoder.crc_errors != crc_before:
+            with self._ack_lock:
+                self._stats.crc_errors += self._decoder.crc_errors - crc_before
+        if self._serial_log_on():
+            frame_info = f" ({'; '.join(infos)})" if infos else ""
+            self.logger.serial("RX %dB: %s%s", len(chunk), chunk.hex(" ").upper(), frame_info, direction="RX")
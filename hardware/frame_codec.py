@@ -0,0 +1,100 @@
+# hardware/frame_codec.py
+# 下位机串口帧编解码 + 二进制遥测帧
+#
+# 帧格式（小端，与 DriverSerial/MockSerialDevice 一致）：
+#   STX(55 AA) + LEN(u8, =1+len(payload)) + CMD(u8) + PAYLOAD + CRC16-MODBUS(u16，覆盖 LEN+CMD+PAYLOAD)
+#
+# 二进制遥测（CMD_TELEMETRY，设备上报段 0xC0+），每周期一帧，替代 37 行文本：
+#   TELEM_HEAD  seq(u32) + ts_ms(u32, 设备启动后毫秒) + n(u8) + roll/pitch/yaw(i16, 1e-4 rad)
+#   数组        forces[n](i16, 0.1N) + z[n](i16, 0.1mm) + x[n](i16, 0.1mm) + y[n](i16, 0.1mm)
+#   量程        数值 ±3276.7 mm/N、姿态 ±3.2767 rad；超出量程时 encode_telemetry 抛 ValueError（不静默饱和）
+#   12 腿时整帧 117 字节（文本约 480 字节/周期），115200 波特率下可支持 50~100Hz 遥测
+#
+# 协商：上位机在遥测口发送 CMD_SET_TELEM_FORMAT(payload=[TELEM_BINARY])；
+#       支持的设备随后改发二进制帧，不支持的设备继续发文本（上位机按收到的内容自动识别）
+import struct
+from dataclasses import dataclass
+from typing import Tuple
+
+import numpy as np
+
+from comm.crc import crc16_modbus as crc16_le  # 查表 CRC16/MODBUS（与 comm 帧共用）
+from comm.framer import Decoder
+
+STX = b"\x55\xAA"
+
+CMD_SET_TELEM_FORMAT = 0x04
+CMD_TELEMETRY = 0xC2
+
+TELEM_TEXT = 0
+TELEM_BINARY = 1
+
+TELEM_HEAD = struct.Struct("<IIBhhh")
+ATT_SCALE = 10000.0   # rad → 1e-4 rad
+VAL_SCALE = 10.0      # mm/N → 0.1mm/0.1N
+_I16_MIN, _I16_MAX = -32768, 32767
+
+def pack_frame(cmd: int, payload: bytes) -> bytes:
+    # STX(0xAA55,2) + LEN(1) + CMD(1) + PAYLOAD + CRC(2)
+    stx = 0xAA55
+    length = 1 + len(payload)
+    head = struct.pack("<HB", stx, length) + struct.pack("<B", cmd)
+    crc = crc16_le(payload, crc16_le(head[2:]))   # 分段增量计算，不拼接
+    return head + payload + struct.pack("<H", crc)
+
+@dataclass
+class Frame:
+    cmd: int
+    payload: bytes
+
+    @classmethod
+    def from_raw(cls, raw: bytes) -> "Frame":
+        return cls(cmd=raw[3], payload=raw[4:-2])
+
+class FrameDecoder(Decoder):
+    """
+    下位机帧解帧器：与 comm.framer.Decoder 同一实现（整块扫描、拆包/粘包/错包、CRC 错只跳一字节），
+    仅 CRC 从 LEN 起算，解出 Frame(cmd, payload)。
+    """
+    def __init__(self):
+        super().__init__(crc_offset=2, frame_type=Frame)
+
+@dataclass
+class TelemetryFrame:
+    seq: int
+    ts_ms: int
+    attitude: Tuple[float, float, float]
+    forces: np.ndarray
+    z: np.ndarray
+    x: np.ndarray
+    y: np.ndarray
+
+def _fixed(name: str, values, scale: float) -> np.ndarray:
+    q = np.rint(np.asarray(values, dtype=float) * scale)
+    bad = ~((q >= _I16_MIN) & (q <= _I16_MAX))   # 含 NaN
+    if bad.any():
+        k = int(np.flatnonzero(bad)[0])
+        raise ValueError(f"遥测 {name}[{k}]={float(np.asarray(values, dtype=float)[k]):g} 超出 int16 定点量程"
+                         f"（±{_I16_MAX / scale:g}）")
+    return q.astype("<i2")
+
+def encode_telemetry(seq: int, ts_ms: int, attitude, forces, z, x, y) -> bytes:
+    """返回遥测帧 payload（不含帧头/CRC），数值按定点量化；任一数值超出 int16 量程时抛 ValueError"""
+    n = len(z)
+    att = _fixed("attitude", attitude[:3], ATT_SCALE)
+    head = TELEM_HEAD.pack(seq & 0xFFFFFFFF, int(ts_ms) & 0xFFFFFFFF, n, *att.tolist())
+    body = np.concatenate([_fixed("forces", forces, VAL_SCALE), _fixed("z", z, VAL_SCALE),
+                           _fixed("x", x, VAL_SCALE), _fixed("y", y, VAL_SCALE)])
+    return head + body.tobytes()
+
+def decode_telemetry(payload: bytes) -> TelemetryFrame:
+    """解析遥测帧 payload；长度不符时抛 ValueError"""
+    if len(payload) < TELEM_HEAD.size:
+        raise ValueError(f"遥测帧过短：{len(payload)}B")
+    seq, ts_ms, n, r, p, y = TELEM_HEAD.unpack_from(payload, 0)
+    if len(payload) != TELEM_HEAD.size + 8 * n:
+        raise ValueError(f"遥测帧长度不符：n={n}, {len(payload)}B")
+    # 除以刻度（而非乘倒数），与文本协议 float("600.1") 的取值逐位一致
+    arr = np.frombuffer(payload, dtype="<i2", count=4 * n, offset=TELEM_HEAD.size).reshape(4, n) / VAL_SCALE
+    return TelemetryFrame(seq=seq, ts_ms=ts_ms, attitude=(r / ATT_SCALE, p / ATT_SCALE, y / ATT_SCALE),
+                          forces=arr[0], z=arr[1], x=arr[2], y=arr[3])
@@ -7,30 +7,23 @@ import argparse
 import math
 from typing import Optional
 
+from .frame_codec import (CMD_SET_TELEM_FORMAT, CMD_TELEMETRY, TELEM_BINARY, FrameDecoder,
+                          encode_telemetry, pack_frame)
 from .serial_interface import SerialInterface
 
-def crc16_le(data: bytes) -> int:
-    crc = 0xFFFF
-    for b in data:
-        crc ^= b
-        for _ in range(8):
-            crc = ((crc >> 1) ^ 0xA001) if (crc & 1) else (crc >> 1)
-    return crc & 0xFFFF
-
-def pack_frame(cmd: int, payload: bytes) -> bytes:
-    # STX(0xAA55,2) + LEN(1) + CMD(1) + PAYLOAD + CRC(2)
-    stx = 0xAA55
-    length = 1 + len(payload)
-    head = struct.pack("<HB", stx, length) + struct.pack("<B", cmd)
-    crc = crc16_le(head[2:] + payload)
-    return head + payload + struct.pack("<H", crc)
-
 class MockSerialDevice:
     """
     双口模拟器：
-      - 控制口(ctrl): 接收 0x01(批量)/0x02(单腿)/0x03(急停)，回 0x81 ACK
-      - 遥测口(telem): 每100ms发送文本遥测：IMU/FOR(12)/Z(12)/XY(12)
+      - 控制口(ctrl): 接收 0x01(批量)/0x02(单腿)/0x03(急停)，回 0x81 ACK（payload=[cmd]）；
+        收到 0x05 [1, seq] 后开启序号回显：此后每帧（0x04 遥测格式帧除外）payload 末尾 1 字节为序号，
+        ACK 为 [cmd, seq]
+        （ack_seq=False 时模拟不支持序号回显的旧固件）
+      - 遥测口(telem): 每100ms发送文本遥测：IMU/FOR(12)/Z(12)/XY(12)，
+        或二进制遥测帧（0xC2，见 hardware/frame_codec.py），每周期一帧
     兼容旧用法：若只提供 --port，则该口既做控制也做遥测。
+    遥测格式 telem_format：
+      - "auto"：默认发文本，收到上位机 0x04 设置遥测格式帧后切换
+      - "text"/"binary"：固定格式，忽略上位机请求
     单位说明：
       - 控制帧 dz/dx/dy 为 0.1mm（dm），与上位机 DriverSerial.mm_to_dm 对齐
       - 遥测 Z 为 mm，小数1位
@@ -38,7 +31,8 @@ class MockSerialDevice:
     """
     def __init__(self, ctrl_port: str, telem_port: Optional[str] = None,
                  baudrate: int = 115200, logger=None, telemetry_interval: float = 0.1,
-                 disturbance_enabled: bool = True, disturbance_amplitude: float = 2.0, disturbance_frequency: float = 0.5):
+                 disturbance_enabled: bool = True, disturbance_amplitude: float = 2.0, disturbance_frequency: float = 0.5,
+                 telem_format: str = "auto", ack_seq: bool = True):
         self.ctrl = SerialInterface(ctrl_port, baudrate, timeout=0.02, logger=logger)
         self.telem = None
         if telem_port:
@@ -48,7 +42,6 @@ class MockSerialDevice:
             self.telem = self.ctrl
 
         self._stop = threading.Event()
-        self._rx_buf = bytearray()
         # 内部状态（0.1mm）
         self._z_dm = [int(random.uniform(5800, 6200)) for _ in range(12)]
         # 受力（N*10，发文本时会/10）
@@ -68,6 +61,17 @@ class MockSerialDevice:
         self._disturbance_frequency = disturbance_frequency  # 扰动频率（Hz）
         self._start_time = time.time()
 
+        # 遥测格式与二进制帧序号
+        self._telem_format = telem_format
+        self._telem_binary = telem_format == "binary"
+        self._telem_seq = 0
+        self._telem_decoder = FrameDecoder()
+        self._ctrl_decoder = FrameDecoder()
+
+        # ACK 序号回显：是否支持 / 是否已由上位机开启
+        self._ack_seq_supported = ack_seq
+        self._ack_seq = False
+
     # ——— 初始化XY分布（固定道岔腿子坐标）———
     def _default_xy(self):
         # 使用固定的道岔腿子坐标配置
@@ -130,8 +134,10 @@ class MockSerialDevice:
         self.ctrl.start_reader(self._on_rx_bytes)
         if self.telem is not self.ctrl:
             self.telem.open()
+            # 遥测口只接收遥测格式协商帧
+            self.telem.start_reader(self._on_telem_rx_bytes)
 
-        print(f"[MockDevice] 控制口: {self.ctrl.port}@{self.ctrl.baudrate}  | 遥测口: {self.telem.port}@{self.telem.baudrate}  | telem-interval: {self._telem_interval}s")
+        print(f"[MockDevice] 控制口: {self.ctrl.port}@{self.ctrl.baudrate}  | 遥测口: {self.telem.port}@{self.telem.baudrate}  | telem-interval: {self._telem_interval}s  | telem-format: {self._telem_format}")
         t = threading.Thread(target=self._telemetry_loop, daemon=True, name="mock_telem")
         t.start()
         try:
@@ -144,6 +150,7 @@ class MockSerialDevice:
             try: self.ctrl.close()
             except: pass
             if self.telem and self.telem is not self.ctrl:
+                self.telem.stop_reader()
                 try: self.telem.close()
                 except: pass
             print("[MockDevice] 设备已退出")
@@ -153,39 +160,46 @@ class MockSerialDevice:
 
     # ——— 控制口：接收上位机帧 ———
     def _on_rx_bytes(self, chunk: bytes):
-        if not chunk:
+        # 与上位机同一解帧器（校验 CRC，处理拆包/粘包）
+        for frame in self._ctrl_decoder.feed(chunk):
+            self._handle_cmd(frame.cmd, frame.payload)
+
+    def _on_telem_rx_bytes(self, chunk: bytes):
+        for frame in self._telem_decoder.feed(chunk):
+            if frame.cmd == CMD_SET_TELEM_FORMAT:
+                self._set_telem_format(frame.payload)
+
+    def _set_telem_format(self, payload: bytes):
+        if self._telem_format != "auto" or not payload:
             return
-        self._rx_buf.extend(chunk)
-        i = 0
-        while i + 4 <= len(self._rx_buf):
-            try:
-                stx, = struct.unpack_from("<H", self._rx_buf, i)
-                if stx != 0xAA55:
-                    i += 1
-                    continue
-                length = self._rx_buf[i+2]
-                cmd = self._rx_buf[i+3]
-                end = i + 4 + length + 2
-                if end > len(self._rx_buf):
-                    break
-                frame = self._rx_buf[i:end]
-                payload = frame[4:4+length-1]
-                # 简化不验CRC
-                self._handle_cmd(cmd, payload)
-                # 丢弃已处理
-                del self._rx_buf[:end]
-                i = 0
-            except Exception:
-                del self._rx_buf[:1]
-                i = 0
+        binary = payload[0] == TELEM_BINARY
+        if binary != self._telem_binary:
+            self._telem_binary = binary
+            print(f"[MockDevice] 遥测格式切换为：{'二进制帧' if binary else '文本'}")
 
     def _handle_cmd(self, cmd: int, payload: bytes):
-        # 回 ACK（在控制口）
+        # 序号回显：协商帧总带序号；开启后其余帧的序号在 payload 末尾。
+        # 遥测格式帧例外：由 SensorSystem 发出（单口模式下也走控制口），不知道驱动是否开启了回显，不带序号
+        seq = b""
+        if cmd == 0x05:
+            if self._ack_seq_supported and payload:
+                self._ack_seq = payload[0] == 1
+                seq = bytes(payload[1:2])
+        elif self._ack_seq and payload and cmd != CMD_SET_TELEM_FORMAT:
+            seq = bytes(payload[-1:])
+            payload = payload[:-1]
+
+        # 回 ACK（在控制口），payload 为被确认的 cmd（及回显的序号），供上位机核对
         try:
-            self.ctrl.write(pack_frame(0x81, b""))
+            self.ctrl.write(pack_frame(0x81, bytes([cmd]) + seq))
         except Exception:
             pass
 
+        if cmd == CMD_SET_TELEM_FORMAT:
+            # 单口模式下格式协商帧走控制口
+            self._set_telem_format(payload)
+            return
+
         if cmd == 0x03:
             # 急停：不再响应位移，但仍发遥测
             self._estop = True
@@ -223,10 +237,15 @@ class MockSerialDevice:
         # 受力稍微波动
         self._force[idx] = max(0, self._force[idx] + int(random.uniform(-5, 5)))
 
-    # ——— 遥测口：周期发文本遥测 ———
+    # ——— 遥测口：周期发文本/二进制遥测 ———
     def _telemetry_loop(self):
         while not self._stop.is_set():
             try:
+                if self._telem_binary:
+                    self._send_binary_telemetry()
+                    time.sleep(self._telem_interval)
+                    continue
+
                 # IMU（roll, pitch, yaw）
                 imu_line = f"IMU,{random.uniform(-0.02,0.02):.4f},{random.uniform(-0.02,0.02):.4f},0.0000\n"
                 self.telem.write(imu_line.encode("utf-8"))
@@ -253,6 +272,22 @@ class MockSerialDevice:
                 continue
             time.sleep(self._telem_interval)
 
+    def _send_binary_telemetry(self):
+        """一个周期的全部腿子数据打成一帧，一次写出"""
+        self._update_xy_positions_with_disturbance()
+        att = (random.uniform(-0.02, 0.02), random.uniform(-0.02, 0.02), 0.0)
+        self._telem_seq += 1
+        ts_ms = int((time.time() - self._start_time) * 1000)
+        try:
+            payload = encode_telemetry(self._telem_seq, ts_ms, att,
+                                       [f / 10.0 for f in self._force], [z / 10.0 for z in self._z_dm],
+                                       [p[0] for p in self._xy], [p[1] for p in self._xy])
+        except ValueError as e:
+            # 超出帧量程的周期不发（不发饱和后的错误数值）
+            print(f"[MockDevice] 遥测周期 {self._telem_seq} 未发送：{e}")
+            return
+        self.telem.write(pack_frame(CMD_TELEMETRY, payload))
+
 def main():
     ap = argparse.ArgumentParser(description="下位机串口模拟器（双口）")
     # 新用法：分别指定控制口与遥测口
@@ -262,6 +297,9 @@ def main():
     ap.add_argument("--port", help="单口兼容模式（控制+遥测同口）")
     ap.add_argument("--baud", type=int, default=115200, help="波特率")
     ap.add_argument("--telem-interval", type=float, default=0.1, help="遥测发送间隔（秒），默认0.1s")
+    ap.add_argument("--telem-format", choices=["auto", "text", "binary"], default="auto",
+                    help="遥测格式：auto（默认文本，按上位机请求切换）/text/binary")
+    ap.add_argument("--no-ack-seq", action="store_true", help="不支持 ACK 序号回显（模拟旧固件，上位机按顺序匹配 ACK）")
     # XY扰动参数
     ap.add_argument("--xy-disturbance", action="store_true", help="启用XY扰动功能")
     ap.add_argument("--disturbance-amplitude", type=float, default=2.0, help="扰动幅度（mm），默认2.0")
@@ -273,13 +311,17 @@ def main():
                               telemetry_interval=args.telem_interval,
                               disturbance_enabled=args.xy_disturbance,
                               disturbance_amplitude=args.disturbance_amplitude,
-                              disturbance_frequency=args.disturbance_frequency)
+                              disturbance_frequency=args.disturbance_frequency,
+                              telem_format=args.telem_format,
+                              ack_seq=not args.no_ack_seq)
     elif args.ctrl_port:
         dev = MockSerialDevice(ctrl_port=args.ctrl_port, telem_port=args.telem_port, baudrate=args.baud, 
                               telemetry_interval=args.telem_interval,
                               disturbance_enabled=args.xy_disturbance,
                               disturbance_amplitude=args.disturbance_amplitude,
-                              disturbance_frequency=args.disturbance_frequency)
+                              disturbance_frequency=args.disturbance_frequency,
+                              telem_format=args.telem_format,
+                              ack_seq=not args.no_ack_seq)
     else:
         print("请指定 --ctrl-port/--telem-port，或使用 --port 单口兼容模式。")
         return
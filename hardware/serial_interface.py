@@ -47,10 +47,18 @@ class SerialInterface:
             return n
 
     def read(self, size: int = 1024) -> bytes:
+        # 阻塞读不持有 _lock：pyserial 允许读写分属不同线程，读线程等待数据时不会卡住 write()
         with self._lock:
-            if not self._ser or not self._ser.is_open: raise RuntimeError("串口未打开")
-            b = self._ser.read(size)
-            return b
+            ser = self._ser
+        if not ser or not ser.is_open: raise RuntimeError("串口未打开")
+        return ser.read(size)
+
+    def read_available(self, max_size: int = 1024) -> bytes:
+        """有数据即返回（至少等 1 字节或 timeout），不为凑满 max_size 等到超时"""
+        with self._lock:
+            ser = self._ser
+        if not ser or not ser.is_open: raise RuntimeError("串口未打开")
+        return ser.read(min(max(ser.in_waiting, 1), max_size))
 
     # 读线程
     def start_reader(self, on_bytes: Callable[[bytes], None]):
@@ -72,7 +80,7 @@ class SerialInterface:
         if self.logger: self.logger.debug("SerialInterface._loop: reader started")
         while not self._stop.is_set():
             try:
-                chunk = self.read(512)
+                chunk = self.read_available(512)
                 if chunk:
                     on_bytes(chunk)
                 else:
@@ -16,15 +16,29 @@ def parse_args():
                    help="传感器输入来源：mock 或 serial")
     p.add_argument("--sensor-port", default=None, help="传感器串口号，例如 COM6（如用 serial）")
     p.add_argument("--sensor-baud", type=int, default=115200, help="传感器串口波特率")
+    p.add_argument("--sensor-format", choices=["text", "binary"], default="text",
+                   help="遥测格式：text（文本行）或 binary（向设备请求二进制遥测帧，不支持时自动沿用文本）")
+    # 规划后端
+    p.add_argument("--planner", choices=["python", "numpy"], default="python",
+                   help="Δz/Δx/Δy 规划后端：python（逐腿循环）或 numpy（向量化）")
+    # 记录
+    p.add_argument("--record", default=None,
+                   help="写入二进制记录文件（串口原始数据/样本/指令），可用 python -m core.replay 离线回放")
+    p.add_argument("--history-out", default=None,
+                   help="退出时将最近的融合遥测与下发指令历史（环形缓冲，最近约1小时）导出为 .npz")
     # 日志级别
     p.add_argument("--log-level", choices=["DEBUG", "INFO", "WARN", "ERROR"], default="INFO")
+    p.add_argument("--log-file", default=None, help="同时追加写入日志文件（后台写线程批量写入）")
+    # 界面
+    p.add_argument("--gui-fps", type=float, default=20.0,
+                   help="图表最大刷新帧率（控制循环更快时多次更新合并为一帧）")
     return p.parse_args()
 
 def main():
     args = parse_args()
 
     # 统一 Logger（带主日志与串口监视器两个通道）
-    logger = Logger(level=args.log_level)
+    logger = Logger(level=args.log_level, log_file=args.log_file)
 
     # 主控制器
     controller = MainController(
@@ -36,10 +50,14 @@ def main():
         sensor_mode=args.sensor,
         sensor_port=args.sensor_port,
         sensor_baud=args.sensor_baud,
+        sensor_format=args.sensor_format,
+        planner_backend=args.planner,
+        record_path=args.record,
+        history_path=args.history_out,
     )
 
     # 启动 GUI
-    start_gui(controller)
+    start_gui(controller, max_fps=args.gui_fps)
 
 if __name__ == "__main__":
     main()
@@ -9,9 +9,9 @@ class MockController:
         self.logger = self
         
         # 添加队列相关属性
-        import queue
-        self.gui_queue = queue.Queue()
-        self.serial_queue = queue.Queue()
+        from core.ring_queue import RingQueue
+        self.gui_queue = RingQueue(2000)
+        self.serial_queue = RingQueue(4000)
         
         # 模拟12个腿子的数据
         self.legs = []
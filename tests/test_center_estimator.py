@@ -0,0 +1,54 @@
+# tests/test_center_estimator.py
+# CenterEstimator 缓存：current_state 在样本未变时即 latest_state()，不重复推进EMA；手动修改腿子后按腿子即时计算
+import pytest
+
+from core.center_estimator import CenterEstimator
+from core.leg_unit import create_legs, generate_leg_positions
+
+class FakeSensor:
+    def __init__(self):
+        self.sample_seq = 0
+
+def _setup():
+    legs = create_legs()
+    generate_leg_positions(legs)
+    for l in legs:
+        l.z = 600.0
+    return legs, FakeSensor(), CenterEstimator()
+
+def _step(legs, sensor, est, dz):
+    for l in legs:
+        l.z += dz
+    sensor.sample_seq += 1
+    return est.estimate(legs, sensor)
+
+def test_current_state_is_latest_state_for_same_sample():
+    legs, sensor, est = _setup()
+    for _ in range(3):
+        _step(legs, sensor, est, -1.0)
+    committed = est.latest_state()
+    assert committed.center_z > 597.0 + 1e-6                # EMA 滞后于原始值
+    for _ in range(5):
+        assert est.current_state(legs, sensor) is committed
+    assert est.estimate(legs, sensor) is committed
+
+def test_manual_edit_invalidates_without_ema():
+    legs, sensor, est = _setup()
+    for _ in range(3):
+        _step(legs, sensor, est, -1.0)
+    committed = est.latest_state()
+    for l in legs:
+        l.z -= 10.0
+    est.mark_legs_changed()
+    cur = est.current_state(legs, sensor)
+    assert cur is not committed
+    assert cur.center_z == pytest.approx(587.0)             # 腿子当前值，不经EMA
+    assert est.latest_state() is committed                  # 预览不写缓存、不推进EMA
+    nxt = _step(legs, sensor, est, 0.0)
+    assert nxt.center_z == pytest.approx(0.35 * 587.0 + 0.65 * committed.center_z)
+    assert est.current_state(legs, sensor) is nxt           # 新的提交后重新命中
+
+def test_no_commit_yet_uses_legs():
+    legs, sensor, est = _setup()
+    assert est.latest_state() is None
+    assert est.current_state(legs, sensor).center_z == pytest.approx(600.0)
@@ -0,0 +1,88 @@
+# tests/test_cycle_assembler.py
+# CycleAssembler：完整周期提交、partial/dropped/late/lost 统计，以及提交的周期不混入两个周期的数据
+from core.cycle_assembler import FIELD_F, FIELD_XY, FIELD_Z, CycleAssembler
+
+N = 4
+
+def _fill(asm: CycleAssembler, base: float, legs=range(N), fields=(FIELD_F, FIELD_Z, FIELD_XY)):
+    for i in legs:
+        for bit in fields:
+            asm.put(bit, i, (base + i, base + i) if bit == FIELD_XY else base + i)
+
+def test_commits_once_all_legs_complete():
+    got = []
+    asm = CycleAssembler(N, on_commit=got.append)
+    asm.begin((0.1, 0.2, 0.0))
+    _fill(asm, 100.0, legs=range(N - 1))
+    assert asm.latest() is None and not got
+    _fill(asm, 100.0, legs=[N - 1])
+    cycle = asm.latest()
+    assert got == [cycle]
+    assert cycle.seq == 1 and cycle.att == (0.1, 0.2, 0.0)
+    assert cycle.z == (100.0, 101.0, 102.0, 103.0)
+    assert cycle.xy[2] == (102.0, 102.0)
+    assert asm.stats.committed == 1 and asm.stats.partial == 0
+
+def test_partial_cycle_is_discarded_and_missing_fields_counted():
+    asm = CycleAssembler(N)
+    asm.begin((0.0, 0.0, 0.0))
+    _fill(asm, 100.0, legs=[0, 1])
+    _fill(asm, 100.0, legs=[2], fields=(FIELD_F, FIELD_Z))     # 腿2缺 XY，腿3全缺
+    asm.begin((0.0, 0.0, 0.0))                                  # 下一周期开头打断
+    assert asm.latest() is None
+    st = asm.stats
+    assert st.partial == 1 and st.committed == 0
+    assert st.missing["XY"] == [0, 0, 1, 1]
+    assert st.missing["F"] == [0, 0, 0, 1]
+    assert st.missing["Z"] == [0, 0, 0, 1]
+
+def test_no_mixed_cycle_after_interruption():
+    asm = CycleAssembler(N)
+    asm.begin((0.0, 0.0, 0.0))
+    _fill(asm, 100.0, legs=range(N - 1))                        # 周期 A 未收齐
+    asm.begin((1.0, 1.0, 1.0))
+    _fill(asm, 200.0, legs=range(N - 1))                        # 周期 B 的前 3 腿
+    assert asm.latest() is None                                 # A 的第 4 腿不会与 B 拼成一个周期
+    _fill(asm, 200.0, legs=[N - 1])
+    cycle = asm.latest()
+    assert cycle.att == (1.0, 1.0, 1.0)
+    assert cycle.z == (200.0, 201.0, 202.0, 203.0)
+    assert cycle.forces == (200.0, 201.0, 202.0, 203.0)
+
+def test_late_duplicate_field_counted_and_overwrites():
+    asm = CycleAssembler(N)
+    asm.begin((0.0, 0.0, 0.0))
+    asm.put(FIELD_Z, 1, 50.0)
+    asm.put(FIELD_Z, 1, 51.0)                                   # 同一周期重发
+    assert asm.stats.late["Z"] == [0, 1, 0, 0]
+    _fill(asm, 100.0, legs=[0, 2, 3])
+    _fill(asm, 100.0, legs=[1], fields=(FIELD_F, FIELD_XY))
+    assert asm.latest().z[1] == 51.0
+
+def test_dropped_counts_unconsumed_cycles():
+    asm = CycleAssembler(N)
+    for k in range(3):
+        asm.begin((0.0, 0.0, 0.0))
+        _fill(asm, 100.0 * k)
+    assert asm.stats.dropped == 2                               # 前两个周期没被取走就被覆盖
+    assert asm.consume().seq == 3
+    asm.begin((0.0, 0.0, 0.0))
+    _fill(asm, 400.0)
+    assert asm.stats.dropped == 2                               # 已消费的周期被覆盖不算丢
+
+def test_binary_frames_count_device_seq_gaps_and_abandon_text():
+    asm = CycleAssembler(N)
+    asm.begin((0.0, 0.0, 0.0))
+    _fill(asm, 100.0, legs=[0])                                 # 半个文本周期
+    z = [1.0] * N
+    xy = [(0.0, 0.0)] * N
+    asm.commit_frame(10, (0.0, 0.0, 0.0), z, z, xy)
+    assert asm.stats.partial == 1
+    asm.commit_frame(11, (0.0, 0.0, 0.0), z, z, xy)
+    asm.commit_frame(15, (0.0, 0.0, 0.0), z, z, xy)             # 12..14 丢失
+    assert asm.stats.lost == 3
+    asm.commit_frame(0, (0.0, 0.0, 0.0), z, z, xy)              # 设备序号回绕/重启不算丢帧
+    asm.commit_frame(0xFFFFFFFF, (0.0, 0.0, 0.0), z, z, xy)
+    asm.commit_frame(0, (0.0, 0.0, 0.0), z, z, xy)               # u32 回绕后连续
+    assert asm.stats.lost == 3
+    assert asm.latest().device_seq == 0 and asm.stats.committed == 6
@@ -0,0 +1,129 @@
+# tests/test_driver_serial.py
+# DriverSerial ACK 匹配：与 MockSerialDevice 协商序号回显（及旧固件的顺序匹配），丢帧/迟到 ACK 后后续请求不受影响
+import threading
+
+import pytest
+
+from hardware.driver_serial import CMD_SINGLE, DriverSerial
+from hardware.frame_codec import CMD_SET_TELEM_FORMAT, TELEM_BINARY, pack_frame
+from hardware.mock_serial_device import MockSerialDevice
+
+class _HostPort:
+    """DriverSerial.iface 的替身：写出的帧按规则丢弃或交给模拟设备"""
+    def __init__(self, link: "_Link"):
+        self.link = link
+        self.port, self.baudrate = "fake", 115200
+        self.on_rx = None
+
+    def open(self) -> bool: return True
+    def close(self): pass
+    def is_open(self) -> bool: return True
+    def start_reader(self, cb): self.on_rx = cb
+    def stop_reader(self): pass
+
+    def write(self, data: bytes) -> int:
+        self.link.from_host(bytes(data))
+        return len(data)
+
+class _DevicePort:
+    """MockSerialDevice.ctrl 的替身：设备回的 ACK 延时后送回驱动的读回调"""
+    def __init__(self, link: "_Link"):
+        self.link = link
+
+    def write(self, data: bytes) -> int:
+        self.link.to_host(bytes(data))
+        return len(data)
+
+class _Link:
+    def __init__(self, ack_seq: bool = True):
+        self.dev = MockSerialDevice("fake", ack_seq=ack_seq)
+        self.dev.ctrl = _DevicePort(self)
+        self.host = _HostPort(self)
+        self.frames = 0                 # 上位机写出的帧数（含协商帧）
+        self.drop = set()               # 丢弃的帧序号（从 0 起）
+        self.ack_delay = {}             # 帧序号 -> 该帧 ACK 的延时（秒）
+        self._cur = 0
+        self._timers = []
+
+    def from_host(self, frame: bytes):
+        k = self.frames
+        self.frames += 1
+        if k in self.drop:
+            return
+        self._cur = k
+        self.dev._on_rx_bytes(frame)
+
+    def to_host(self, data: bytes):
+        delay = self.ack_delay.get(self._cur, 0.0)
+        if delay <= 0:
+            self.host.on_rx(data)
+            return
+        t = threading.Timer(delay, self.host.on_rx, [data])
+        self._timers.append(t)
+        t.start()
+
+    def join(self):
+        for t in self._timers:
+            t.join()
+
+def _driver(link: _Link, **kw) -> DriverSerial:
+    drv = DriverSerial("fake", ack_timeout=kw.pop("ack_timeout", 0.05), **kw)
+    drv.iface = link.host
+    drv.connect()
+    return drv
+
+@pytest.mark.parametrize("ack_seq", [True, False], ids=["seq-echo", "fifo"])
+def test_dropped_frame_does_not_poison_later_acks(ack_seq):
+    link = _Link(ack_seq=ack_seq)
+    drv = _driver(link)
+    assert drv.seq_echo is ack_seq
+    link.drop.add(link.frames)                     # 协商之后的第一帧丢失
+    assert drv.move_leg_delta(1, 1.0, 0.0, 0.0) is False
+    results = [drv.move_leg_delta(2, 0.5, 0.0, 0.0) for _ in range(8)]
+    assert results == [True] * 8
+    st = drv.ack_stats()
+    assert st.timeouts == 1 and st.acked == 1 + 8 and st.late_acks == 0 and st.unexpected == 0
+    assert st.rtt[CMD_SINGLE].n == 8
+
+@pytest.mark.parametrize("ack_seq", [True, False], ids=["seq-echo", "fifo"])
+def test_late_ack_before_next_frame_is_absorbed(ack_seq):
+    link = _Link(ack_seq=ack_seq)
+    drv = _driver(link, ack_timeout=0.03)
+    link.ack_delay[link.frames] = 0.1              # 超时之后、下一帧发出之前到达
+    assert drv.move_leg_delta(1, 1.0, 0.0, 0.0) is False
+    link.join()
+    assert drv.move_leg_delta(1, 1.0, 0.0, 0.0) is True
+    st = drv.ack_stats()
+    assert st.late_acks == 1 and st.timeouts == 1 and st.unexpected == 0
+
+def test_seq_echo_matches_late_ack_after_next_frame_exactly():
+    link = _Link(ack_seq=True)
+    drv = _driver(link, ack_timeout=0.03)
+    first = link.frames
+    link.ack_delay[first] = 0.2                    # 迟到的 ACK 在下一帧发出之后才到
+    link.ack_delay[first + 1] = 0.01
+    assert drv.move_leg_delta(1, 1.0, 0.0, 0.0) is False
+    assert drv.move_leg_delta(2, 1.0, 0.0, 0.0) is True
+    link.join()
+    st = drv.ack_stats()
+    assert st.late_acks == 1 and st.unexpected == 0
+
+def test_mock_strips_seq_before_applying_moves():
+    link = _Link(ack_seq=True)
+    drv = _driver(link)
+    z0 = list(link.dev._z_dm)
+    assert drv.move_leg_delta(3, 1.5, 0.0, 0.0)
+    assert drv.apply_batch([{"id": 4, "dz": 2.0, "dx": 0.0, "dy": 0.0},
+                            {"id": 5, "dz": 0.3, "dx": 0.0, "dy": 0.0}])
+    assert [z0[i] - link.dev._z_dm[i] for i in (2, 3, 4)] == [15, 20, 3]
+
+def test_single_port_telem_format_after_seq_echo():
+    # 单口模式：驱动先连接并开启序号回显，随后 SensorSystem 在同一口请求二进制遥测
+    link = _Link(ack_seq=True)
+    drv = _driver(link)
+    assert drv.seq_echo and not link.dev._telem_binary
+    link.from_host(pack_frame(CMD_SET_TELEM_FORMAT, bytes([TELEM_BINARY])))
+    assert link.dev._telem_binary
+    assert drv.move_leg_delta(1, 1.0, 0.0, 0.0)
+    st = drv.ack_stats()
+    assert st.unexpected == 0 and st.timeouts == 0
@@ -0,0 +1,76 @@
+# tests/test_framer.py
+# 统一解帧器：comm 帧（CRC 覆盖 STX）与下位机帧（CRC 从 LEN 起）的拆包/粘包、噪声与错帧重同步
+import random
+
+import pytest
+
+from comm.framer import Decoder, Frame, encode_frame
+from hardware.frame_codec import Frame as DevFrame, FrameDecoder, pack_frame
+
+CODECS = [
+    pytest.param(Decoder, encode_frame, id="comm"),
+    pytest.param(FrameDecoder, pack_frame, id="device"),
+]
+
+def _frames(n=20, seed=1):
+    rnd = random.Random(seed)
+    return [(rnd.randrange(256), rnd.randbytes(rnd.choice((0, 1, 8, 60)))) for _ in range(n)]
+
+def _got(frames):
+    return [(f.cmd, f.payload) for f in frames]
+
+@pytest.mark.parametrize("make_dec, encode", CODECS)
+def test_merged_and_split_packets(make_dec, encode):
+    want = _frames()
+    stream = b"".join(encode(c, p) for c, p in want)
+    # 整块（粘包）
+    dec = make_dec()
+    assert _got(dec.feed(stream)) == want
+    # 逐字节（最碎的拆包）
+    dec, out = make_dec(), []
+    for k in range(len(stream)):
+        out += dec.feed(stream[k:k + 1])
+    assert _got(out) == want
+    assert dec.frames == len(want) and dec.crc_errors == 0 and dec.skipped == 0 and not dec.buf
+
+@pytest.mark.parametrize("make_dec, encode", CODECS)
+def test_noise_between_frames_is_skipped(make_dec, encode):
+    want = _frames(n=10)
+    noise = [b"\x00\x55", b"\x55\x55", b"\xAA\x13", b"\x55\xAA\x00", b""] * 2
+    stream = b"".join(n + encode(c, p) for n, (c, p) in zip(noise, want))
+    dec = make_dec()
+    assert _got(dec.feed(stream)) == want
+    assert dec.skipped == sum(len(n) for n in noise)
+
+@pytest.mark.parametrize("make_dec, encode", CODECS)
+def test_resync_after_crc_error(make_dec, encode):
+    good1, bad, good2 = encode(0x81, b"\x01\x02"), bytearray(encode(0x82, b"\x03" * 10)), encode(0x83, b"")
+    bad[6] ^= 0xFF
+    dec = make_dec()
+    assert _got(dec.feed(good1 + bytes(bad) + good2)) == [(0x81, b"\x01\x02"), (0x83, b"")]
+    assert dec.crc_errors == 1
+
+@pytest.mark.parametrize("make_dec, encode", CODECS)
+def test_false_header_with_long_length_does_not_swallow_frames(make_dec, encode):
+    # 伪帧头声明 LEN=200：在凑够 200 字节前不能吞掉其后的真实帧
+    real = encode(0x90, b"abc")
+    dec = make_dec()
+    out = dec.feed(b"\x55\xAA\xC8" + real)
+    assert out == []                             # 等待伪帧到齐
+    out = dec.feed(bytes(200))
+    assert _got(out) == [(0x90, b"abc")] and dec.crc_errors == 1
+
+@pytest.mark.parametrize("make_dec, encode", CODECS)
+def test_split_header_byte_is_kept(make_dec, encode):
+    frame = encode(0x42, b"xyz")
+    dec = make_dec()
+    assert dec.feed(b"\x01\x02" + frame[:1]) == []
+    assert bytes(dec.buf) == frame[:1]           # 末尾 0x55 留待下一分片
+    assert _got(dec.feed(frame[1:])) == [(0x42, b"xyz")]
+
+def test_crc_offset_distinguishes_the_two_formats():
+    comm, dev = encode_frame(0x10, b"\x01"), pack_frame(0x10, b"\x01")
+    assert comm[:-2] == dev[:-2] and comm[-2:] != dev[-2:]
+    assert Decoder().feed(dev) == [] and FrameDecoder().feed(comm) == []
+    assert Decoder().feed(comm) == [Frame(cmd=0x10, payload=b"\x01", raw=comm)]
+    assert FrameDecoder().feed(dev) == [DevFrame(cmd=0x10, payload=b"\x01")]
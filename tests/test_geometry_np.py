@@ -0,0 +1,56 @@
+# tests/test_geometry_np.py
+# geometry_np（数组/批量）与 geometry.py（逐样本 dict）的等价性核对
+import random
+
+import numpy as np
+import pytest
+
+from core.geometry import SensorSnapshot, compute_center_and_theory
+from core.geometry_np import (LEG_IDS, compute_center_and_theory_batch, compute_center_and_theory_np,
+                              snapshot_to_arrays, snapshots_to_matrix)
+from core.leg_unit import FIXED_POSITIONS
+
+def _snapshot(rnd: random.Random, missing=(), unhealthy=()) -> SensorSnapshot:
+    ids = [int(k) for k in LEG_IDS if int(k) not in missing]
+    x = {k: FIXED_POSITIONS[k - 1][0] + rnd.uniform(-5, 5) for k in ids}
+    y = {k: FIXED_POSITIONS[k - 1][1] + rnd.uniform(-5, 5) for k in ids}
+    z = {k: 600.0 + rnd.uniform(-20, 20) for k in ids}
+    return SensorSnapshot(y_meas=y, z_meas=z, x_meas=x, force=dict.fromkeys(ids, 100.0),
+                          healthy={k: k not in unhealthy for k in ids})
+
+def _assert_same(snap: SensorSnapshot, geo, t=None):
+    ref = compute_center_and_theory(snap)
+    pick = (lambda a: a) if t is None else (lambda a: a[t])
+    assert pick(geo.Xc) == pytest.approx(ref.Xc, abs=1e-9)
+    assert pick(geo.Zc) == pytest.approx(ref.Zc, abs=1e-9)
+    y_theo, e_y = pick(geo.y_theo), pick(geo.e_y)
+    for k in LEG_IDS:
+        k = int(k)
+        if k in ref.y_theo:
+            assert y_theo[k - 1] == pytest.approx(ref.y_theo[k], abs=1e-9)
+        if k in ref.e_y:
+            assert e_y[k - 1] == pytest.approx(ref.e_y[k], abs=1e-9)
+        else:
+            assert np.isnan(e_y[k - 1])
+
+@pytest.mark.parametrize("missing,unhealthy", [((), ()), ((), (2,)), ((6, 11), ()), ((1,), (7,))])
+def test_single_snapshot_matches_scalar(missing, unhealthy):
+    rnd = random.Random(hash((missing, unhealthy)) & 0xFFFF)
+    for _ in range(50):
+        snap = _snapshot(rnd, missing, unhealthy)
+        x, y, z, h = snapshot_to_arrays(snap)
+        _assert_same(snap, compute_center_and_theory_np(x, y, z, h))
+
+def test_batch_matches_scalar_per_row():
+    rnd = random.Random(7)
+    snaps = [_snapshot(rnd, missing=rnd.sample(range(3, 13), rnd.randint(0, 2))) for _ in range(200)]
+    x, y, z, h = snapshots_to_matrix(snaps)
+    geo = compute_center_and_theory_batch(x, y, z, h)
+    assert geo.Xc.shape == (200,) and geo.e_y.shape == (200, len(LEG_IDS))
+    for t, snap in enumerate(snaps):
+        _assert_same(snap, geo, t)
+
+def test_empty_batch():
+    x, y, z, h = snapshots_to_matrix([])
+    geo = compute_center_and_theory_batch(x, y, z, h)
+    assert geo.Xc.shape == (0,)
@@ -0,0 +1,68 @@
+# tests/test_history.py
+# RingSeries：绕回后窗口连续且按时间排序、since 二分、latest、视图/拷贝语义；TelemetryHistory 导出往返
+import numpy as np
+
+from core.history import RingSeries, TelemetryHistory
+from core.sensor_system import FusedSample
+
+def _series(cap: int = 5) -> RingSeries:
+    return RingSeries(cap, {"ts": ((), np.float64), "v": ((2,), np.float32)})
+
+def _push(rs: RingSeries, start: int, stop: int):
+    for k in range(start, stop):
+        rs.append(ts=float(k), v=(k, -k))
+
+def test_window_before_wrap():
+    rs = _series()
+    assert rs.latest() is None and len(rs) == 0
+    assert rs.window()["ts"].shape == (0,)
+    _push(rs, 0, 3)
+    assert len(rs) == 3
+    assert rs.window()["ts"].tolist() == [0.0, 1.0, 2.0]
+    assert rs.window(2)["v"].tolist() == [[1.0, -1.0], [2.0, -2.0]]
+
+def test_window_after_wrap_is_contiguous_and_ordered():
+    rs = _series(5)
+    for total in range(6, 18):   # 覆盖绕回的每个相位
+        rs.clear()
+        _push(rs, 0, total)
+        assert len(rs) == 5 and rs.total == total
+        win = rs.window()
+        assert win["ts"].tolist() == [float(k) for k in range(total - 5, total)]
+        assert win["ts"].base is not None                      # 默认为视图（零拷贝）
+        assert win["v"][:, 1].tolist() == [-float(k) for k in range(total - 5, total)]
+        assert rs.window(3)["ts"].tolist() == [float(k) for k in range(total - 3, total)]
+        assert rs.window(99)["ts"].shape == (5,)
+        assert rs.window(0)["ts"].shape == (0,)
+
+def test_since_and_latest_after_wrap():
+    rs = _series(5)
+    _push(rs, 0, 12)
+    assert rs.since(9.5)["ts"].tolist() == [10.0, 11.0]
+    assert rs.since(0.0)["ts"].tolist() == [7.0, 8.0, 9.0, 10.0, 11.0]
+    assert rs.since(100.0)["ts"].shape == (0,)
+    last = rs.latest()
+    assert float(last["ts"]) == 11.0 and last["v"].tolist() == [11.0, -11.0]
+
+def test_view_is_overwritten_but_copy_is_kept():
+    rs = _series(4)
+    _push(rs, 0, 4)
+    view, kept = rs.window(), rs.window(copy=True)
+    _push(rs, 4, 8)                                  # 再写满一圈
+    assert kept["ts"].tolist() == [0.0, 1.0, 2.0, 3.0]
+    assert view["ts"].tolist() != kept["ts"].tolist()
+
+def test_telemetry_history_export_roundtrip(tmp_path):
+    h = TelemetryHistory(ids=[3, 7], capacity=3)
+    for k in range(5):
+        h.append_sample(FusedSample(seq=k, ts=float(k), center=(1.5, 3.5, 600.5 + k), attitude=(0.0, 0.0, 0.0),
+                                    ids=(3, 7), x=np.array([1.0, 2.0]), y=np.array([3.0, 4.0]),
+                                    z=np.array([600.0 + k, 601.0 + k]), forces=np.array([100.0, 110.0])))
+    h.append_commands(4.0, [{"id": 7, "dz": -1.5, "dx": 0.25, "dy": 0.0}, {"id": 99, "dz": 9.0, "dx": 0.0, "dy": 0.0}])
+    path = tmp_path / "hist.npz"
+    h.export_npz(str(path))
+    d = np.load(path)
+    assert d["ids"].tolist() == [3, 7]
+    assert d["samples_seq"].tolist() == [2, 3, 4]
+    assert d["samples_z"][:, 0].tolist() == [602.0, 603.0, 604.0]
+    assert d["commands_dz"].tolist() == [[0.0, -1.5]] and d["commands_dx"].tolist() == [[0.0, 0.25]]
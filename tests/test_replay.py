@@ -0,0 +1,24 @@
+# tests/test_replay.py
+# 记录 → 回放闭环：同一规划后端下重规划指令（含成对X抖动）逐位一致
+import pytest
+
+from core.replay import replay
+from core.simulation import Scenario, simulate
+
+@pytest.mark.parametrize("backend", ["python", "numpy"])
+def test_replay_reproduces_recorded_commands(tmp_path, backend):
+    path = str(tmp_path / "run.rec")
+    simulate(Scenario(seed=3, planner_backend=backend), duration=10.0, record_path=path)
+    rep = replay(path)
+    assert rep.jitter_exact
+    assert rep.ok, rep.summary()
+    assert rep.commands_compared > 0
+    assert rep.max_abs_diff == {"dz": 0.0, "dx": 0.0, "dy": 0.0}
+    assert rep.geometry_checked == rep.samples
+
+def test_cross_backend_replay_falls_back_to_jitter_tolerance(tmp_path):
+    path = str(tmp_path / "run.rec")
+    simulate(Scenario(seed=3), duration=10.0, record_path=path)
+    rep = replay(path, planner_backend="numpy")
+    assert not rep.jitter_exact
+    assert rep.ok, rep.summary()
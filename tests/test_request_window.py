@@ -0,0 +1,105 @@
+# tests/test_request_window.py
+# RequestWindow（CommService/AsyncCommService 共用的无 IO 核心）：窗口、seq 分配与隔离、ACK 匹配、重试判定
+from concurrent.futures import Future
+
+import pytest
+
+from comm.framer import Decoder
+from comm.request_window import SEQ_SPACE, PendingRequest, RequestWindow
+
+class FakeClock:
+    def __init__(self):
+        self.t = 100.0
+
+    def __call__(self) -> float:
+        return self.t
+
+def _req(cmd=0x10, payload=b"", retry=0) -> PendingRequest:
+    return PendingRequest(cmd, payload, 0.3, retry, Future())
+
+def _send_all(win: RequestWindow):
+    out = []
+    while (r := win.next_send()) is not None:
+        out.append(r)
+    return out
+
+def test_window_limits_in_flight_and_backlog_keeps_order():
+    win = RequestWindow(window=3)
+    reqs = [_req(payload=bytes([i])) for i in range(5)]
+    for r in reqs:
+        win.submit(r)
+    sent = _send_all(win)
+    assert sent == reqs[:3] and [r.seq for r in sent] == [1, 2, 3]
+    assert win.in_flight == 3 and win.queued == 2
+    assert win.match_ack(0x90, bytes([2, 0])) is reqs[1]
+    assert _send_all(win) == [reqs[3]] and reqs[3].seq == 4
+    assert win.stats.inflight_high_water == 3 and win.stats.sent == 4
+
+def test_frame_carries_seq_before_payload():
+    win = RequestWindow()
+    win.submit(_req(cmd=0x21, payload=b"\xAB"))
+    r = win.next_send()
+    fr, = Decoder().feed(win.frame(r))
+    assert fr.cmd == 0x21 and fr.payload == bytes([r.seq, 0xAB])
+
+def test_ack_must_match_seq_and_cmd():
+    win = RequestWindow()
+    win.submit(_req(cmd=0x10))
+    r = win.next_send()
+    assert win.match_ack(0x91, bytes([r.seq])) is None      # cmd 不对（0x10 的 ACK 为 0x90）
+    assert win.match_ack(0x90, bytes([r.seq + 1])) is None  # seq 不对
+    assert win.match_ack(0x90, b"") is None
+    assert win.match_ack(0x90, bytes([r.seq, 0])) is r
+    assert win.match_ack(0x90, bytes([r.seq, 0])) is None   # 重复 ACK
+    assert win.in_flight == 0 and win.stats.acked == 1
+
+def test_expired_seq_is_quarantined():
+    clk = FakeClock()
+    win = RequestWindow(window=1, seq_quarantine=1.0, clock=clk)
+    win.submit(_req())
+    r = win.next_send()
+    assert win.expire(r, r.seq) and not win.expire(r, r.seq)
+    assert win.match_ack(0x90, bytes([r.seq])) is None      # 迟到的 ACK 不会匹配
+    # 隔离期内 seq 1 被跳过：转一整圈后下一个可用的是 2
+    win._seq = SEQ_SPACE
+    win.submit(_req())
+    assert win.next_send().seq == 2
+    clk.t += 1.01
+    win.match_ack(0x90, bytes([2]))
+    win._seq = SEQ_SPACE
+    win.submit(_req())
+    assert win.next_send().seq == 1
+
+def test_retry_then_fail_counts_timeout():
+    win = RequestWindow()
+    r = _req(retry=1)
+    win.submit(r)
+    win.next_send()
+    assert win.expire(r, r.seq)
+    assert win.retry(r, TimeoutError())
+    win.requeue(r)
+    first = r.seq
+    assert win.next_send() is r and r.seq != first          # 重发换新 seq
+    assert win.expire(r, r.seq)
+    assert not win.retry(r, TimeoutError())
+    assert win.stats.retries == 1 and win.stats.timeouts == 1
+    assert not win.retry(_req(retry=3), TimeoutError(), stopped=True)
+
+def test_unsend_and_cancelled_requests():
+    win = RequestWindow()
+    a, b = _req(), _req()
+    b.future.cancel()
+    win.submit(b)
+    win.submit(a)
+    assert win.next_send() is a                             # 已取消的请求直接丢弃
+    win.unsend(a)
+    assert win.in_flight == 0 and win.stats.sent == 0
+    win.requeue(a)
+    win.next_send()
+    assert win.drain() == [a] and win.in_flight == 0 and win.queued == 0
+
+def test_window_bounds():
+    with pytest.raises(ValueError):
+        RequestWindow(window=0)
+    with pytest.raises(ValueError):
+        RequestWindow(window=SEQ_SPACE // 2 + 1)
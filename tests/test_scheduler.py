@@ -0,0 +1,31 @@
+# tests/test_scheduler.py
+# DeadlineScheduler：after_tick 回调收到刚结束 tick 的快照；回调异常不终止循环
+import threading
+
+from core.scheduler import DeadlineScheduler
+
+def _run(after_tick, n=5):
+    sched = DeadlineScheduler(0.001)
+    stop = threading.Event()
+    ticks = []
+
+    def tick():
+        ticks.append(1)
+        if len(ticks) >= n:
+            stop.set()
+
+    sched.run(tick, stop, after_tick=after_tick)
+    return sched, ticks
+
+def test_after_tick_sees_the_tick_just_finished():
+    seen = []
+    sched, ticks = _run(lambda st: seen.append(st.ticks))
+    assert seen == [1, 2, 3, 4, 5]
+
+def test_after_tick_exception_does_not_stop_loop():
+    def boom(st):
+        raise RuntimeError("callback")
+
+    sched, ticks = _run(boom)
+    st = sched.stats()
+    assert len(ticks) == 5 and st.ticks == 5 and st.callback_errors == 5
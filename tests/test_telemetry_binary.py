@@ -0,0 +1,53 @@
+# tests/test_telemetry_binary.py
+# 二进制遥测：定点量程检查、跨分片帧头识别、设备回到文本协议后的自动回退
+import pytest
+
+from core.logger import Logger
+from core.sensor_system import BINARY_FALLBACK_BYTES, SensorSystem
+from hardware.frame_codec import CMD_TELEMETRY, decode_telemetry, encode_telemetry, pack_frame
+
+def _text_cycle(z: float) -> bytes:
+    lines = ["IMU,0.0100,0.0000,0.0000"]
+    lines += [f"FOR,{i + 1},100.0" for i in range(12)]
+    lines += [f"Z,{i + 1},{z:.1f}" for i in range(12)]
+    lines += [f"XY,{i + 1},{i * 10.0:.1f},5.0" for i in range(12)]
+    return ("\n".join(lines) + "\n").encode()
+
+def _binary_cycle(seq: int, z: float) -> bytes:
+    return pack_frame(CMD_TELEMETRY, encode_telemetry(seq, 0, (0.0, 0.0, 0.0), [100.0] * 12, [z] * 12,
+                                                      [float(i) for i in range(12)], [5.0] * 12))
+
+def _parser() -> SensorSystem:
+    return SensorSystem(Logger(level="ERROR", console=False), mode="mock", telem_format="binary")
+
+def test_encode_rejects_out_of_range_values():
+    payload = encode_telemetry(1, 0, (0.01, 0.0, 0.0), [100.0] * 12, [3276.7] * 12, [0.0] * 12, [0.0] * 12)
+    assert decode_telemetry(payload).z[0] == pytest.approx(3276.7)
+    with pytest.raises(ValueError, match="z"):
+        encode_telemetry(1, 0, (0.0, 0.0, 0.0), [100.0] * 12, [3276.8] * 12, [0.0] * 12, [0.0] * 12)
+    with pytest.raises(ValueError, match="forces"):
+        encode_telemetry(1, 0, (0.0, 0.0, 0.0), [float("nan")] * 12, [0.0] * 12, [0.0] * 12, [0.0] * 12)
+
+def test_header_split_across_reads_switches_to_binary():
+    p = _parser()
+    frame = _binary_cycle(1, 555.5)
+    p.feed(_text_cycle(600.0) + frame[:1])   # 55 | AA 落在两次读取之间
+    assert not p._binary_active
+    assert p.legs_state()["z"][0] == 600.0
+    p.feed(frame[1:])
+    assert p._binary_active
+    assert p.legs_state()["z"][0] == 555.5
+
+def test_falls_back_to_text_when_frames_stop():
+    p = _parser()
+    p.feed(_binary_cycle(1, 555.5))
+    assert p._binary_active
+    sent = 0
+    z = 590.0
+    while sent <= BINARY_FALLBACK_BYTES:
+        chunk = _text_cycle(z)
+        p.feed(chunk)
+        sent += len(chunk)
+    assert not p._binary_active
+    p.feed(_text_cycle(580.0))
+    assert p.legs_state()["z"][0] == 580.0
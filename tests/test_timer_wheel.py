@@ -0,0 +1,81 @@
+# tests/test_timer_wheel.py
+# TimerWheel：注入时钟驱动，不早到、取消、超过一圈的定时器、长时间未推进后的追赶
+from comm.timer_wheel import TimerWheel
+
+class FakeClock:
+    def __init__(self):
+        self.t = 50.0
+
+    def __call__(self) -> float:
+        return self.t
+
+def _wheel(slots: int = 8):
+    clk = FakeClock()
+    return clk, TimerWheel(tick_s=0.01, slots=slots, clock=clk)
+
+def test_fires_after_deadline_never_before():
+    clk, wheel = _wheel()
+    fired = []
+    wheel.schedule(0.035, lambda: fired.append(clk.t))
+    for _ in range(10):
+        clk.t += 0.005
+        wheel.advance()
+    assert len(fired) == 1 and fired[0] >= 50.035
+    assert fired[0] < 50.035 + 2 * wheel.tick_s             # 最多晚一个 tick（加一步推进间隔）
+    assert len(wheel) == 0
+
+def test_advance_with_explicit_now_checks_deadline():
+    clk, wheel = _wheel()
+    fired = []
+    wheel.schedule(0.02, lambda: fired.append(1))
+    assert wheel.advance(now=50.0199) == 0 and not fired
+    assert wheel.advance(now=50.031) == 1 and fired == [1]
+
+def test_cancel():
+    clk, wheel = _wheel()
+    fired = []
+    t = wheel.schedule(0.02, lambda: fired.append("a"))
+    wheel.schedule(0.02, lambda: fired.append("b"))
+    t.cancel()
+    clk.t += 0.05
+    assert wheel.advance() == 1
+    assert fired == ["b"] and len(wheel) == 0
+
+def test_timer_more_than_one_lap_out():
+    clk, wheel = _wheel(slots=8)                             # 一圈 0.08s
+    fired = []
+    wheel.schedule(0.25, lambda: fired.append(clk.t))        # 三圈多
+    wheel.schedule(0.03, lambda: fired.append(-1.0))
+    while clk.t < 50.24:
+        clk.t += 0.01
+        wheel.advance()
+    assert fired == [-1.0]                                   # 经过同一槽时未到期，留在槽里
+    while clk.t < 50.30:
+        clk.t += 0.01
+        wheel.advance()
+    assert len(fired) == 2 and fired[1] >= 50.25
+
+def test_catch_up_after_long_gap():
+    clk, wheel = _wheel(slots=8)
+    fired = []
+    for d in (0.01, 0.05, 0.07, 0.3, 0.9):
+        wheel.schedule(d, lambda d=d: fired.append(d))
+    clk.t += 0.5                                             # 落后超过六圈
+    assert wheel.advance() == 4
+    assert sorted(fired) == [0.01, 0.05, 0.07, 0.3]
+    clk.t += 0.5
+    wheel.advance()
+    assert fired[-1] == 0.9 and len(wheel) == 0
+
+def test_schedule_after_catch_up_is_not_early():
+    clk, wheel = _wheel(slots=8)
+    clk.t += 1.0
+    wheel.advance()
+    fired = []
+    wheel.schedule(0.02, lambda: fired.append(clk.t))
+    clk.t += 0.015
+    wheel.advance()
+    assert not fired
+    clk.t += 0.02
+    wheel.advance()
+    assert fired and fired[0] >= 51.02